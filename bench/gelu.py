@@ -0,0 +1,52 @@
+import argparse
+import csv
+import math
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from herg.graph_caps.gnn import gelu
+
+_ERF = np.vectorize(math.erf)
+
+
+def gelu_vectorize(x):
+    """The former NumPy path: one math.erf call per element."""
+    return 0.5 * x * (1.0 + _ERF(x / math.sqrt(2)))
+
+
+IMPLS = {
+    "np.vectorize": gelu_vectorize,
+    "erf": lambda x: gelu(x, "none"),
+    "tanh": lambda x: gelu(x, "tanh"),
+}
+
+
+def melem_per_s(fn, x, min_time: float = 0.2) -> float:
+    runs = 0
+    t0 = time.perf_counter()
+    while runs == 0 or time.perf_counter() - t0 < min_time:
+        fn(x)
+        runs += 1
+    return runs * x.size / (time.perf_counter() - t0) / 1e6
+
+
+p = argparse.ArgumentParser()
+p.add_argument('--shapes', default='64x2048,256x6000')
+p.add_argument('--scale', type=float, default=3.0, help='std of the N(0, s²) inputs')
+args = p.parse_args()
+
+rng = np.random.default_rng(0)
+writer = csv.writer(sys.stdout)
+writer.writerow(["n", "dim", "impl", "melem_per_s", "max_abs_err"])
+for shape in args.shapes.split(','):
+    n, dim = (int(v) for v in shape.split('x'))
+    x = args.scale * rng.standard_normal((n, dim))
+    ref = gelu_vectorize(x)
+    for name, fn in IMPLS.items():
+        err = float(np.max(np.abs(fn(x) - ref)))
+        writer.writerow([n, dim, name, f"{melem_per_s(fn, x):.2f}", f"{err:.2e}"])
+        sys.stdout.flush()
@@ -0,0 +1,52 @@
+import argparse
+import time
+import csv
+import numpy as np
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from herg.graph_caps.blocks import BLOCK_SIZE
+from herg.graph_caps.store import CapsuleStore
+from herg.graph_caps.step import k_radius_pass, k_radius_pass_bfs
+
+DIM = 2 * BLOCK_SIZE
+DEGREE = 4
+RADIUS = 2
+
+
+def build(n: int) -> CapsuleStore:
+    """Random out-degree-4 graph; only `fast` matters to the radius pass."""
+    rng = np.random.default_rng(0)
+    store = CapsuleStore(dim=DIM, db_path=":memory:")
+    fast = rng.integers(0, 2, size=(n, DIM), dtype=np.int8) * np.int8(2) - np.int8(1)
+    store.caps.add_many(range(n), fast, fast)
+    src = np.repeat(np.arange(n), DEGREE)
+    dst = rng.integers(0, n, size=n * DEGREE)
+    store.edges.src, store.edges.dst, store.edges.wts = src, dst, np.ones(n * DEGREE)
+    return store
+
+
+def ticks_per_s(fn, store, min_time: float = 1.0) -> float:
+    ticks = 0
+    t0 = time.time()
+    while ticks == 0 or time.time() - t0 < min_time:
+        fn(store, RADIUS)
+        ticks += 1
+    return ticks / (time.time() - t0)
+
+
+p = argparse.ArgumentParser()
+p.add_argument('--sizes', default='10000,100000,1000000')
+p.add_argument('--bfs-max', type=int, default=10000, help='largest size to time the per-capsule BFS at')
+args = p.parse_args()
+
+writer = csv.writer(sys.stdout)
+writer.writerow(["capsules", "edges", "whole_graph_tps", "bfs_tps"])
+for n in [int(x) for x in args.sizes.split(',')]:
+    store = build(n)
+    tps = ticks_per_s(k_radius_pass, store, min_time=0)
+    bfs = ticks_per_s(k_radius_pass_bfs, store, min_time=0) if n <= args.bfs_max else float('nan')
+    writer.writerow([n, n * DEGREE, f"{tps:.3f}", f"{bfs:.3f}"])
+    sys.stdout.flush()
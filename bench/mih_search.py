@@ -0,0 +1,46 @@
+import time
+import csv
+import numpy as np
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from herg.faiss_wrapper import HybridIndex, MIHIndex
+
+# expand_seed output is uniform random bits, so sample packed rows directly
+LANE = (4096, 2048, 2048)
+N = 20000
+NQ = 20
+rng = np.random.default_rng(0)
+X = rng.integers(0, 256, size=(N, 2048), dtype=np.uint8)
+
+flat = HybridIndex(LANE)
+mih = MIHIndex(LANE)
+flat.add(X)
+mih.add(X)
+
+
+def noisy(rows: np.ndarray, p: float) -> np.ndarray:
+    """Corrupt each byte with probability p."""
+    hit = rng.random(rows.shape) < p
+    return rows ^ (hit * rng.integers(1, 256, size=rows.shape)).astype(np.uint8)
+
+
+rows = []
+for k in (1, 10):
+    for p in (0.0, 0.005, 0.01, 0.02, 0.05):
+        Q = noisy(X[rng.integers(0, N, size=NQ)], p)
+        t0 = time.time()
+        D_flat, I_flat = flat.search(Q, k)
+        t_flat = (time.time() - t0) / NQ
+        t0 = time.time()
+        D_mih, I_mih = mih.search(Q, k)
+        t_mih = (time.time() - t0) / NQ
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(I_flat, I_mih)])
+        rows.append((k, p, t_flat * 1e3, t_mih * 1e3, recall, mih.last_candidates / NQ))
+
+writer = csv.writer(sys.stdout)
+writer.writerow(["k", "noise", "flat_ms", "mih_ms", "recall", "candidates"])
+for k, p, tf, tm, rec, cand in rows:
+    writer.writerow([k, p, f"{tf:.2f}", f"{tm:.2f}", f"{rec:.3f}", f"{cand:.0f}"])
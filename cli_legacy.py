@@ -72,7 +72,7 @@ def main() -> None:
         metrics = MetricStore()
         next_print = time.time() + args.metrics if args.metrics else None
         with ctx:
-            from herg.graph_caps.step import k_radius_pass, adf_update
+            from herg.graph_caps.step import k_radius_pass, adf_update_batch
             from herg.graph_caps.gossip import gap_junction_gossip
             from herg.graph_caps.prune import sticky_pool_prune
             store = CapsuleStore()
@@ -87,8 +87,7 @@ def main() -> None:
                 prev_mu = cap.mu.copy()
                 k_radius_pass(store, cfg.radius)
                 if tick % cfg.gossip_every == 0:
-                    for c in list(store.caps.values()):
-                        adf_update(c, c.fast, 1.0, cfg.eta)
+                    adf_update_batch(store, store.caps.ids, store.caps.fast, 1.0, cfg.eta)
                     gap_junction_gossip(store)
                     sticky_pool_prune(store)
                 metrics.update(
@@ -4,7 +4,7 @@ Wrapper around your existing HERG encoder that adds:
   • prefix() helper for sharding
 """
 from hashlib import blake2b
-from typing import Tuple
+from typing import List, Sequence, Tuple
 import numpy as np
 
 
@@ -21,43 +21,67 @@ SHARD_BITS = 8          # prefix length → 256 shards max
 
 # --- API --------------------------------------------------------------------
 
-def expand_seed(seed: bytes,
-                lane_split: tuple[int, int, int] = (4096, 2048, 2048),
-                dtype=np.uint8) -> Tuple[np.ndarray, int]:
-    """Return packed mixed-radix vector and 64-bit blake2 hash."""
+_QUAD_SHIFTS = np.arange(2, dtype=np.uint8)
+_NIBBLE_SHIFTS = np.arange(4, dtype=np.uint8)
+
+
+def _lanes(seed: bytes, lane_split: tuple[int, int, int]):
+    """Draw the raw binary/quaternary/nibble lanes for one seed."""
     if isinstance(seed, str):
         seed = seed.encode()
-
     d1, d2, d3 = lane_split
     rng = _philox(seed)
     bin_bits = rng.integers(0, 2, size=d1, dtype=np.uint8)
     quads = rng.integers(0, 4, size=d2, dtype=np.uint8)
     nibbles = rng.integers(0, 16, size=d3, dtype=np.uint8)
+    return bin_bits, quads, nibbles
+
+
+def _pack(bin_bits: np.ndarray, quads: np.ndarray, nibbles: np.ndarray) -> np.ndarray:
+    """Pack lanes LSB-first into bytes; works on (d,) or (N, d) inputs."""
+    lead = bin_bits.shape[:-1]
+    q = (quads[..., None] >> _QUAD_SHIFTS) & 1
+    n = (nibbles[..., None] >> _NIBBLE_SHIFTS) & 1
+    bits = np.concatenate(
+        [bin_bits, q.reshape(*lead, -1), n.reshape(*lead, -1)], axis=-1
+    )
+    return np.packbits(bits, axis=-1, bitorder="little")
+
 
-    total_bits = d1 + 2 * d2 + 4 * d3
-    vec_len = (total_bits + 7) // 8
-    vec = np.zeros(vec_len, dtype=dtype)
-
-    bit_idx = 0
-    for b in bin_bits:
-        vec[bit_idx >> 3] |= b << (bit_idx & 7)
-        bit_idx += 1
-    for q in quads:
-        for i in range(2):
-            vec[bit_idx >> 3] |= ((q >> i) & 1) << (bit_idx & 7)
-            bit_idx += 1
-    for n in nibbles:
-        for i in range(4):
-            vec[bit_idx >> 3] |= ((n >> i) & 1) << (bit_idx & 7)
-            bit_idx += 1
-
-    h = blake2b(vec.tobytes(), digest_size=8).digest()
-    return vec, int.from_bytes(h, "big")
+def _hash(vec: np.ndarray) -> int:
+    return int.from_bytes(blake2b(vec.tobytes(), digest_size=8).digest(), "big")
+
+
+def expand_seed(seed: bytes,
+                lane_split: tuple[int, int, int] = (4096, 2048, 2048),
+                dtype=np.uint8) -> Tuple[np.ndarray, int]:
+    """Return packed mixed-radix vector and 64-bit blake2 hash."""
+    vec = _pack(*_lanes(seed, lane_split)).astype(dtype, copy=False)
+    return vec, _hash(vec)
+
+
+def expand_seeds(seeds: Sequence[bytes],
+                 lane_split: tuple[int, int, int] = (4096, 2048, 2048),
+                 dtype=np.uint8) -> Tuple[np.ndarray, List[int]]:
+    """Batched `expand_seed`: (N, bytes) packed matrix and per-row hashes."""
+    d1, d2, d3 = lane_split
+    n = len(seeds)
+    bins = np.empty((n, d1), dtype=np.uint8)
+    quads = np.empty((n, d2), dtype=np.uint8)
+    nibbles = np.empty((n, d3), dtype=np.uint8)
+    for i, seed in enumerate(seeds):
+        bins[i], quads[i], nibbles[i] = _lanes(seed, lane_split)
+    vecs = _pack(bins, quads, nibbles).astype(dtype, copy=False)
+    return vecs, [_hash(v) for v in vecs]
 
 def encode(seed: str | bytes) -> Tuple[np.ndarray, int]:
     """Wrapper for backward compatibility."""
     return expand_seed(seed, LANE_SPLIT)
 
+def encode_many(seeds: Sequence[str | bytes]) -> Tuple[np.ndarray, List[int]]:
+    """Batched `encode` for a whole request batch."""
+    return expand_seeds(seeds, LANE_SPLIT)
+
 def prefix(hash_int: int) -> str:
     """
     Returns two-hex-digit shard key, e.g. '7a'
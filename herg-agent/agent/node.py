@@ -1,6 +1,6 @@
 """
 One shard:  • query / update API
-            • local Faiss IVF+PQ index
+            • local Faiss index (IVF+PQ by default, see herg.config)
             • background tasks: push_closed_chunks, hydrate_prefix
 """
 
@@ -10,8 +10,9 @@ import numpy as np
 import faiss, orjson, uvicorn
 from fastapi import FastAPI, HTTPException, Request
 from agent.utils import safe_search, cosine
-from herg.faiss_wrapper import make_index
-from herg.hvlogfs import HVLogFS          # assuming you expose this
+from herg import config
+from herg.faiss_wrapper import make_index, min_train_size, train_sample_size
+from herg.hvlogfs import HVLogFS
 from agent.encoder_ext import encode, prefix
 from agent.memory import MemoryCapsule, SelfCapsule, maybe_branch
 if os.getenv("S3_BUCKET"):
@@ -31,16 +32,18 @@ if SHARD_KEY is None:
     raise SystemExit("must set SHARD_KEY env")
 
 DIM = 2048
-NLIST = 4096               # IVF coarse bins
-M = 64                     # PQ code size
 
 API_KEY = os.getenv("NODE_KEY")
 app = FastAPI()
 hvlog = HVLogFS(str(HVLOG_DIR))
-index = faiss.IndexIDMap(make_index(DIM))
+index = faiss.IndexIDMap(make_index(DIM))     # flat until enough vectors to train
 id_map = {}         # capsule_id -> (chunk_offset, meta_dict, mu)
+_hwm = 0            # last hvlog LSN folded into the index
+rebuild_stats = {"duration_s": 0.0, "delta": 0, "added": 0, "removed": 0,
+                 "lsn": 0, "ntotal": 0, "rebuilds": 0}
 
 SIM_THR = 0.88
+ADD_BATCH = 1 << 16     # vectors per add_with_ids when filling a trained index
 
 
 class _Graph:
@@ -84,9 +87,16 @@ def _auth(request: Request) -> None:
 async def health():
     return {"ok": True}
 
+@app.get("/metrics", tags=["_infra"])
+async def metrics():
+    return {"index_rebuild": rebuild_stats}
+
 @app.on_event("startup")
 async def _load():
-    asyncio.create_task(hydrate_prefix(SHARD_KEY))
+    hydrated = asyncio.create_task(hydrate_prefix(SHARD_KEY))
+    global _hwm
+    id_map.clear()
+    _hwm = 0
     await _rebuild()
     # load persisted SELF capsule if present
     global self_cap
@@ -97,20 +107,107 @@ async def _load():
             self_cap.mean_reward = float(cap.meta.get("mean_reward", 0.0))
             self_cap.entropy = float(cap.meta.get("entropy", 0.0))
             break
+    asyncio.create_task(_train_when_ready(hydrated))
     asyncio.create_task(_rebuild_periodic())
 
+def _train_index(cfg, vecs: dict):
+    """Train ``cfg.index_type`` on a sample of ``vecs`` and add them all (runs off-loop)."""
+    ids = np.fromiter(vecs, np.int64, len(vecs))
+    limit = train_sample_size(cfg)
+    pick = np.arange(len(ids))
+    if len(ids) > limit:
+        pick = np.sort(np.random.default_rng(0).choice(len(ids), limit, replace=False))
+    train = np.stack([vecs[int(ids[i])] for i in pick]).reshape(-1, DIM) if limit else None
+    new = faiss.IndexIDMap(make_index(DIM, cfg, train))
+    for lo in range(0, len(ids), ADD_BATCH):
+        part = ids[lo:lo + ADD_BATCH]
+        new.add_with_ids(np.stack([vecs[int(c)] for c in part]).reshape(-1, DIM), part)
+    return new
+
+async def _train_when_ready(hydrated):
+    """Swap the flat startup index for ``cfg.index_type`` once the shard is
+    hydrated and holds ``min_train_size`` vectors; training runs in a thread."""
+    global index
+    try:
+        await hydrated
+    except Exception:
+        log.exception("hydrate_prefix(%s) failed", SHARD_KEY)
+    cfg = config.load()
+    if cfg.index_type == "flat":
+        return
+    while True:
+        await _rebuild()
+        if len(id_map) >= max(min_train_size(cfg), 1):
+            break
+        await asyncio.sleep(300)
+    snap = {cid: mu for cid, (_, _, mu) in id_map.items()}
+    new = await asyncio.get_running_loop().run_in_executor(None, _train_index, cfg, snap)
+    # fold in whatever changed while training ran
+    stale = [cid for cid, mu in snap.items() if id_map.get(cid, (None, None, None))[2] is not mu]
+    _remove(stale, new)
+    fresh = [cid for cid in id_map if snap.get(cid) is not id_map[cid][2]]
+    if fresh:
+        new.add_with_ids(np.stack([id_map[c][2] for c in fresh]).reshape(-1, DIM),
+                         np.asarray(fresh, np.int64))
+    index = new
+    rebuild_stats["ntotal"] = int(index.ntotal)
+    log.info("Trained %s index on %d vectors", cfg.index_type, len(snap))
+
+def _remove(ids, target=None) -> int:
+    if not ids:
+        return 0
+    try:
+        return int((index if target is None else target).remove_ids(np.asarray(ids, np.int64)))
+    except RuntimeError:            # e.g. HNSW cannot delete
+        log.warning("index cannot remove ids; %d stale entries kept", len(ids))
+        return 0
+
 async def _rebuild():
-    vecs, ids = [], []
-    for cap in hvlog.iter_capsules(prefix=SHARD_KEY):
-        if not getattr(cap, "active", True):
+    """Fold capsules logged since the last pass (the high-water mark) into the index."""
+    global _hwm
+    t0 = time.perf_counter()
+    fresh = hvlog.refresh()         # segments hydrated since the last pass
+    hwm = hvlog.lsn
+    latest = {}
+    for cap in hvlog.iter_capsules(prefix=SHARD_KEY, since=_hwm):
+        if cap.lsn > hwm:
+            break
+        latest[cap.id_int] = cap
+    known = id_map.keys() | latest.keys()
+    for chunk in fresh:             # older LSNs: only backfill ids not seen locally
+        if chunk.prefix != SHARD_KEY:
             continue
+        for cap in chunk.capsules():
+            if cap.id_int not in known:
+                latest[cap.id_int] = cap
+    dead = {}
+    for lsn, cid in hvlog.iter_tombstones(since=_hwm):
+        if lsn <= hwm:
+            dead[cid] = lsn
+    live = {cid: cap for cid, cap in latest.items()
+            if getattr(cap, "active", True) and cap.lsn > dead.get(cid, 0)}
+    removed = _remove([cid for cid in latest.keys() | dead.keys() if cid in id_map])
+    for cid in dead:
+        id_map.pop(cid, None)
+    vecs, ids = [], []
+    for cid, cap in live.items():
         vecs.append(cap.mu.astype(np.float32))
-        ids.append(cap.id_int)
-        id_map[cap.id_int] = (cap.chunk, cap.meta, cap.mu.astype(np.float32))
+        ids.append(cid)
+        id_map[cid] = (cap.chunk, cap.meta, cap.mu.astype(np.float32))
     if vecs:
-        xb = np.stack(vecs)
-        index.add_with_ids(faiss.vector_to_array(xb).reshape(-1, DIM), np.array(ids))
-    log.info("Indexed %d vectors", len(vecs))
+        index.add_with_ids(np.stack(vecs).reshape(-1, DIM), np.array(ids, np.int64))
+    _hwm = hwm
+    rebuild_stats.update(
+        duration_s=time.perf_counter() - t0,
+        delta=len(latest) + len(dead),
+        added=len(ids),
+        removed=removed,
+        lsn=hwm,
+        ntotal=int(index.ntotal),
+    )
+    rebuild_stats["rebuilds"] += 1
+    log.info("Indexed %d vectors, removed %d (lsn %d, %.3fs)",
+             len(ids), removed, hwm, rebuild_stats["duration_s"])
 
 async def _rebuild_periodic():
     while True:
@@ -173,6 +270,7 @@ async def insert(request: Request):
         graph.add(cap)
         hvlog.append_cap(SHARD_KEY, cap.id_int, cap.mu, cap.meta)
         index.add_with_ids(xb, np.array([cap.id_int], np.int64))
+        id_map[cap.id_int] = (getattr(cap, "chunk", "mem"), cap.meta, cap.mu)
 
     child = maybe_branch(graph, cap, vec, reward)
     self_cap = graph.get_or_create("SELF", SelfCapsule)
@@ -260,33 +260,55 @@ def inject():
         sys.modules["IPython.core.magic"] = ipy.core.magic
         sys.modules["IPython.display"] = ipy.display
 
-    # hvlogfs stub used by agent tests
-    if importlib.util.find_spec("herg.hvlogfs") is None:
+    # in-memory hvlogfs for agent tests when the disk-backed one cannot run
+    # (its chunks need real numpy); herg.hvlogfs is the real store otherwise
+    np_mod = sys.modules.get("numpy")
+    if "herg.hvlogfs" not in sys.modules and np_mod is not None and np_mod.__spec__ is None:
         hv = ModuleType("herg.hvlogfs")
 
         class Capsule:
-            def __init__(self, cap_id, mu, meta):
+            def __init__(self, cap_id, mu, meta, lsn=0):
                 self.id_int = int(cap_id)
                 self.mu = mu
                 self.meta = meta
                 self.chunk = "mem"
                 self.active = True
+                self.lsn = lsn
 
         class HVLogFS:
             def __init__(self, path: str):
                 self.path = path
+                self.lsn = 0
                 self._caps = []
+                self._tombs = []
 
             def append_cap(self, prefix: str, cap_id: int, mu, meta=None) -> None:
-                self._caps.append(Capsule(cap_id, mu, meta or {}))
+                self.lsn += 1
+                self._caps.append(Capsule(cap_id, mu, meta or {}, self.lsn))
 
-            def iter_capsules(self, prefix: str = None):
+            def tombstone(self, cap_id: int) -> None:
+                self.lsn += 1
+                self._tombs.append((self.lsn, int(cap_id)))
                 for c in self._caps:
-                    yield c
+                    if c.id_int == cap_id:
+                        c.active = False
+
+            def iter_capsules(self, prefix: str = None, since: int = 0):
+                for c in self._caps:
+                    if c.lsn > since:
+                        yield c
+
+            def iter_tombstones(self, since: int = 0):
+                for t in self._tombs:
+                    if t[0] > since:
+                        yield t
 
             def chunks(self):
                 return []
 
+            def refresh(self):
+                return []
+
         hv.HVLogFS = HVLogFS
         hv.Capsule = Capsule
         sys.modules["herg.hvlogfs"] = hv
@@ -23,6 +23,12 @@ class Config:
     lane_split: tuple[int, int, int] = (4096, 2048, 2048)
     kernel_alpha: float | list[float] = 1.0
     kernel_mode: str = 'separable'
+    index_type: str = 'ivf_pq'      # flat | ivf_flat | ivf_pq | hnsw
+    nlist: int = 4096
+    pq_m: int = 64
+    nprobe: int = 16
+    hnsw_m: int = 32
+    hnsw_ef_search: int = 64
 
     def apply(self, delta: dict) -> None:
         for k, v in delta.items():
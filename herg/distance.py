@@ -43,3 +43,67 @@ def hybrid_hamming(a: np.ndarray, b: np.ndarray, lane_split=(4096, 2048, 2048))
         dist += int(_NIBBLE_DIFF[a[idx:idx+b3], b[idx:idx+b3]].sum())
 
     return dist
+
+
+# Lane distances depend only on a ^ b.  Folding each 2-bit / 4-bit field of the
+# XOR byte onto its low bit turns the quaternary and nibble lanes into plain
+# popcounts (fold(x) has popcount _QUAD_DIFF[0, x] / _NIBBLE_DIFF[0, x]), so a
+# whole matrix reduces to XOR + fold + popcount.
+_BITCOUNT = getattr(np, "bitwise_count", None)   # NumPy >= 2.0
+
+_BLOCK_BYTES = 1 << 19      # keep the (queries, rows, bytes) XOR temporary cache-sized
+_MIN_ROWS = 64              # database rows per tile, however many queries there are
+
+
+def _lane_bytes(lane_split):
+    d1, d2, d3 = lane_split
+    return d1 // 8, (2 * d2) // 8, (4 * d3) // 8
+
+
+def _fold_lanes(x: np.ndarray, lane_split) -> np.ndarray:
+    """In-place fold of XORed bytes so that popcount == hybrid distance."""
+    b1, b2, b3 = _lane_bytes(lane_split)
+    q = x[..., b1:b1 + b2]
+    q |= q >> 1
+    q &= 0x55
+    n = x[..., b1 + b2:b1 + b2 + b3]
+    n |= n >> 1
+    n |= n >> 2
+    n &= 0x11
+    x[..., b1 + b2 + b3:] = 0
+    return x
+
+
+def _popcount_rows(x: np.ndarray) -> np.ndarray:
+    if _BITCOUNT is None:
+        return np.take(_POPCNT, x).sum(axis=-1, dtype=np.int64)
+    if x.shape[-1] % 8 == 0:
+        x = x.view(np.uint64)
+    return _BITCOUNT(x).sum(axis=-1, dtype=np.int64)
+
+
+def hybrid_hamming_cross(Q: np.ndarray, X: np.ndarray,
+                         lane_split=(4096, 2048, 2048)) -> np.ndarray:
+    """Return (nq, N) hybrid Hamming distances between rows of Q and rows of X."""
+    Q = np.atleast_2d(np.asarray(Q, dtype=np.uint8))
+    X = np.atleast_2d(np.asarray(X, dtype=np.uint8))
+    nq, n = Q.shape[0], X.shape[0]
+    out = np.zeros((nq, n), dtype=np.int64)
+    if nq == 0 or n == 0:
+        return out
+    width = max(Q.shape[1], 1)
+    qstep = max(1, min(nq, _BLOCK_BYTES // (_MIN_ROWS * width)))
+    step = max(1, _BLOCK_BYTES // (qstep * width))
+    for qlo in range(0, nq, qstep):
+        qs = Q[qlo:qlo + qstep, None, :]
+        for lo in range(0, n, step):
+            x = np.bitwise_xor(qs, X[None, lo:lo + step, :])
+            out[qlo:qlo + qstep, lo:lo + step] = _popcount_rows(_fold_lanes(x, lane_split))
+    return out
+
+
+def hybrid_hamming_many(query: np.ndarray, matrix: np.ndarray,
+                        lane_split=(4096, 2048, 2048)) -> np.ndarray:
+    """Return hybrid Hamming distances from one packed vector to every row of matrix."""
+    query = np.asarray(query, dtype=np.uint8).reshape(1, -1)
+    return hybrid_hamming_cross(query, matrix, lane_split)[0]
@@ -12,11 +12,67 @@ DIM_DEFAULT = 2048          # can be overridden per-call
 _LCG_A = 1103515245
 _LCG_C = 12345
 _LCG_M = 2 ** 31
+_BATCH_MIN = 32          # below this the scalar chain is faster
 
 
-def _lcg(value):
-    """One step of a 31-bit LCG (same constants as glibc rand)."""
-    return (_LCG_A * value + _LCG_C) % _LCG_M
+def _digest(seed: bytes) -> bytes:
+    return seed if len(seed) == 32 else hashlib.sha256(seed).digest()
+
+
+def _lcg_states(starts: np.ndarray, dim: int) -> np.ndarray:
+    """Run the LCG chain for every start value at once → (N, dim) uint32."""
+    n = starts.shape[0]
+    out = np.empty((dim, n), dtype=np.uint32)
+    if n < _BATCH_MIN:
+        # per-ufunc overhead beats the Python loop for a handful of seeds
+        for j, x in enumerate(starts.tolist()):
+            col = out[:, j]
+            for i in range(dim):
+                x = (_LCG_A * (x ^ i) + _LCG_C) % _LCG_M
+                col[i] = x
+        return out.T
+    x = starts.astype(np.uint64)
+    a = np.uint64(_LCG_A)
+    c = np.uint64(_LCG_C)
+    m = np.uint64(_LCG_M - 1)
+    for i in range(dim):
+        np.bitwise_xor(x, np.uint64(i), out=x)
+        np.multiply(x, a, out=x)
+        np.add(x, c, out=x)
+        np.bitwise_and(x, m, out=x)
+        out[i] = x
+    return out.T
+
+
+def seed_to_hyper_batch(seeds,
+                        dim: int = DIM_DEFAULT,
+                        ternary: bool = False,
+                        device: str | None = None,
+                        alpha: float = 0.0):
+    """
+    Vectorised `seed_to_hyper` for many seeds → (N, dim) int8 matrix.
+
+    Row j is bit-identical to `seed_to_hyper(seeds[j], ...)`; the LCG chain
+    is stepped for all seeds together as NumPy uint64 lanes.
+    """
+    digests = [_digest(s) for s in seeds]
+    n = len(digests)
+    starts = np.fromiter(
+        (int.from_bytes(d, "big") & (_LCG_M - 1) for d in digests),
+        dtype=np.uint64, count=n,
+    )
+    states = _lcg_states(starts, dim)
+    hv = np.where((states >> 15) & 1, 1, -1).astype(np.float32)
+
+    if ternary:
+        hv[:, np.arange(dim) % 3 != 0] = 0
+
+    if dim % 6 == 0 and n:
+        coords = np.stack([flavor_coords(d) for d in digests]) / 255.0 * np.pi * 2 - np.pi
+        weights = np.sinc((alpha * coords) / np.pi).reshape(n, 6, 1)
+        hv = (hv.reshape(n, 6, dim // 6) * weights).reshape(n, dim)
+    hv = np.sign(hv).astype(np.int8)
+    return B.tensor(hv, dtype=np.int8, device=device)
 
 
 def seed_to_hyper(seed: bytes,
@@ -34,29 +90,7 @@ def seed_to_hyper(seed: bytes,
                      val = +1 if bit else −1
     4. If ternary: zero indices where i % 3 != 0  (~33 % density)
     """
-    if len(seed) != 32:
-        seed = hashlib.sha256(seed).digest()
-    S = int.from_bytes(seed, "big")
-
-    vals = []
-    x = S & (_LCG_M - 1)
-    for i in range(dim):
-        x = _lcg(x ^ i)
-        vals.append(1 if (x >> 15) & 1 else -1)
-
-    if ternary:
-        for i in range(dim):
-            if i % 3:
-                vals[i] = 0
-
-    hv = np.asarray(vals, dtype=np.float32)
-    if dim % 6 == 0:
-        coords = flavor_coords(seed) / 255.0 * np.pi * 2 - np.pi
-        weights = np.sinc((alpha * coords) / np.pi).reshape(6, 1)
-        hv = hv.reshape(6, dim // 6) * weights
-        hv = hv.reshape(dim)
-    hv = np.sign(hv).astype(np.int8)
-    return B.tensor(hv, dtype=np.int8, device=device)
+    return seed_to_hyper_batch([seed], dim, ternary, device, alpha)[0]
 
 
 # convenience wrapper used by CapsuleStore
@@ -64,4 +98,11 @@ def sha_vector_of_token(token: str,
                         dim: int = DIM_DEFAULT,
                         ternary: bool = False,
                         device: str | None = None):
-    return seed_to_hyper(token.encode(), dim, ternary, device)
+    return seed_to_hyper_batch([token.encode()], dim, ternary, device)[0]
+
+
+def sha_vectors_of_tokens(tokens,
+                          dim: int = DIM_DEFAULT,
+                          ternary: bool = False,
+                          device: str | None = None):
+    return seed_to_hyper_batch([t.encode() for t in tokens], dim, ternary, device)
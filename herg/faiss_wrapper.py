@@ -2,46 +2,310 @@ try:
     import faiss
 except ModuleNotFoundError:  # optional for simple demos
     faiss = None
+import logging
 import numpy as np
 import os
-from .distance import hybrid_hamming
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from .config import Config
+from .distance import hybrid_hamming_cross, hybrid_hamming_many
+
+log = logging.getLogger(__name__)
+
+
+_EMPTY_DIST = np.finfo(np.float32).max    # faiss pads missing hits with FLT_MAX / -1
 
 
 class HybridIndex:
-    """Simple in-memory index using hybrid Hamming distance."""
+    """In-memory hybrid Hamming index with a faiss.IndexIDMap-style API.
+
+    Vectors live in one growable contiguous ``(capacity, bytes)`` uint8 matrix
+    (capacity doubles on overflow) next to a parallel int64 id column.
+    ``add`` assigns sequential ids like ``faiss.IndexFlat``; ``add_with_ids``
+    and ``remove_ids`` mirror ``faiss.IndexIDMap``.
+    """
 
     def __init__(self, lane_split=(4096, 2048, 2048)):
         self.lane_split = lane_split
-        self.vecs = []
+        self._data = np.empty((0, 0), dtype=np.uint8)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._n = 0
 
     @property
     def ntotal(self) -> int:
-        return len(self.vecs)
+        return self._n
+
+    @property
+    def vecs(self) -> np.ndarray:
+        """View of the stored vectors, one row per entry."""
+        return self._data[:self._n]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._n]
+
+    def _reserve(self, extra: int, width: int) -> None:
+        if self._data.shape[1] != width:
+            if self._n:
+                raise ValueError(f"vector width {width} != index width {self._data.shape[1]}")
+            self._data = np.empty((0, width), dtype=np.uint8)
+        need = self._n + extra
+        cap = self._data.shape[0]
+        if need <= cap:
+            return
+        cap = max(need, 2 * cap, 16)
+        data = np.empty((cap, width), dtype=np.uint8)
+        data[:self._n] = self._data[:self._n]
+        ids = np.empty(cap, dtype=np.int64)
+        ids[:self._n] = self._ids[:self._n]
+        self._data, self._ids = data, ids
 
     def add(self, vecs: np.ndarray):
-        arr = np.asarray(vecs, dtype=np.uint8)
-        if arr.ndim == 1:
-            self.vecs.append(arr.copy())
+        arr = np.atleast_2d(np.asarray(vecs, dtype=np.uint8))
+        self.add_with_ids(arr, np.arange(self._n, self._n + arr.shape[0], dtype=np.int64))
+
+    def add_with_ids(self, vecs: np.ndarray, ids) -> None:
+        arr = np.atleast_2d(np.asarray(vecs, dtype=np.uint8))
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if ids.shape[0] != arr.shape[0]:
+            raise ValueError("ids and vectors differ in length")
+        self._reserve(arr.shape[0], arr.shape[1])
+        self._data[self._n:self._n + arr.shape[0]] = arr
+        self._ids[self._n:self._n + arr.shape[0]] = ids
+        self._n += arr.shape[0]
+
+    def remove_ids(self, ids) -> int:
+        """Drop every entry whose id is in ``ids``; return the number removed."""
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        keep = ~np.isin(self._ids[:self._n], ids)
+        n_keep = int(keep.sum())
+        removed = self._n - n_keep
+        if removed:
+            self._data[:n_keep] = self._data[:self._n][keep]
+            self._ids[:n_keep] = self._ids[:self._n][keep]
+            self._n = n_keep
+        return removed
+
+    def reset(self) -> None:
+        self._n = 0
+
+    def search(self, vecs: np.ndarray, k: int):
+        """Return ``(D, I)`` of shape ``(nq, k)``; missing hits are ``-1``."""
+        Q = np.atleast_2d(np.asarray(vecs, dtype=np.uint8))
+        nq = Q.shape[0]
+        D = np.full((nq, k), _EMPTY_DIST, dtype=np.float32)
+        I = np.full((nq, k), -1, dtype=np.int64)
+        kk = min(k, self._n)
+        if kk == 0:
+            return D, I
+        dists = hybrid_hamming_cross(Q, self.vecs, self.lane_split)
+        if kk < self._n:
+            part = np.argpartition(dists, kk - 1, axis=1)[:, :kk]
         else:
-            for v in arr:
-                self.vecs.append(np.array(v, dtype=np.uint8))
-
-    def search(self, vec: np.ndarray, k: int):
-        if self.ntotal == 0:
-            return np.empty((1, 0), dtype="float32"), np.empty((1, 0), dtype="int64")
-        vec = np.asarray(vec, dtype=np.uint8)
-        dists = [hybrid_hamming(vec, v, self.lane_split) for v in self.vecs]
-        idx = np.argsort(dists)[:k]
-        D = np.array(dists, dtype=np.float32)[idx][None, :]
-        I = np.array(idx, dtype=np.int64)[None, :]
+            part = np.broadcast_to(np.arange(self._n), (nq, self._n))
+        top = np.take_along_axis(dists, part, axis=1)
+        order = np.argsort(top, axis=1, kind="stable")
+        rows = np.take_along_axis(part, order, axis=1)
+        D[:, :kk] = np.take_along_axis(top, order, axis=1)
+        I[:, :kk] = self._ids[rows]
         return D, I
 
 
-def make_index(dim: int):
-    """Return FAISS index if available; else raise ImportError."""
+_MIH_TAIL = 4096       # unsorted rows tolerated before the tables are re-sorted
+_MIH_PROBE_COST = 8    # table probes that cost about as much as verifying one row
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(bits: int, radius: int) -> np.ndarray:
+    """All ``bits``-wide masks with exactly ``radius`` bits set."""
+    masks = [sum(1 << i for i in c) for c in combinations(range(bits), radius)]
+    return np.asarray(masks, dtype=np.uint32)
+
+
+def _gather_ranges(col: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Concatenate ``col[lo[i]:hi[i]]`` for every i without a Python loop."""
+    lengths = hi - lo
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=col.dtype)
+    offsets = np.cumsum(lengths) - lengths
+    idx = np.arange(total) - np.repeat(offsets, lengths) + np.repeat(lo, lengths)
+    return col[idx]
+
+
+class MIHIndex(HybridIndex):
+    """Exact k-NN over hybrid vectors via multi-index hashing on the binary lane.
+
+    The first ``m * sub_bits`` bits of the binary lane are cut into ``m``
+    disjoint substrings, each kept in a sorted key table.  A vector none of
+    whose substrings lies within ``s`` bits of the query's has binary – and
+    hence hybrid – distance of at least ``m * (s + 1)``, so probing radii
+    ``s = 0, 1, ...`` stops once the k-th verified hybrid distance is within
+    that bound.  Queries whose probe count would exceed a flat scan fall back
+    to one, so results always match ``HybridIndex``.
+    """
+
+    def __init__(self, lane_split=(4096, 2048, 2048), m: int = 64, sub_bits: int = 16):
+        super().__init__(lane_split)
+        if sub_bits % 8 or not 8 <= sub_bits <= 32:
+            raise ValueError("sub_bits must be 8, 16, 24 or 32")
+        self.sub_bits = sub_bits
+        self.sub_bytes = sub_bits // 8
+        self.m = min(m, (lane_split[0] // 8) // self.sub_bytes)
+        if self.m < 1:
+            raise ValueError("binary lane too short for multi-index hashing")
+        self._keys = np.empty((0, self.m), dtype=np.uint32)
+        self._rows = np.empty((0, self.m), dtype=np.int32)
+        self._sorted = 0          # rows [0, _sorted) live in the sorted tables
+        self.last_candidates = 0  # rows verified by the most recent search
+
+    def _substrings(self, X: np.ndarray) -> np.ndarray:
+        """(n, m) uint32 substring keys of each row's binary lane."""
+        b = X[:, :self.m * self.sub_bytes].reshape(X.shape[0], self.m, self.sub_bytes)
+        keys = np.zeros((X.shape[0], self.m), dtype=np.uint32)
+        for i in range(self.sub_bytes):
+            keys |= b[:, :, i].astype(np.uint32) << np.uint32(8 * i)
+        return keys
+
+    def _merge(self) -> None:
+        keys = self._substrings(self.vecs)
+        order = np.argsort(keys, axis=0, kind="stable")
+        self._keys = np.take_along_axis(keys, order, axis=0)
+        self._rows = order.astype(np.int32)
+        self._sorted = self._n
+
+    def add_with_ids(self, vecs: np.ndarray, ids) -> None:
+        super().add_with_ids(vecs, ids)
+        if self._n - self._sorted > max(_MIH_TAIL, self._sorted // 8):
+            self._merge()
+
+    def remove_ids(self, ids) -> int:
+        removed = super().remove_ids(ids)
+        if removed:
+            self._sorted = 0      # rows shifted; re-sort on next add/search
+            self._keys = self._keys[:0]
+            self._rows = self._rows[:0]
+        return removed
+
+    def reset(self) -> None:
+        super().reset()
+        self._sorted = 0
+        self._keys = self._keys[:0]
+        self._rows = self._rows[:0]
+
+    def search(self, vecs: np.ndarray, k: int):
+        """Exact top-k by hybrid distance; same ``(nq, k)`` layout as ``HybridIndex``."""
+        Q = np.atleast_2d(np.asarray(vecs, dtype=np.uint8))
+        D = np.full((Q.shape[0], k), _EMPTY_DIST, dtype=np.float32)
+        I = np.full((Q.shape[0], k), -1, dtype=np.int64)
+        kk = min(k, self._n)
+        self.last_candidates = 0
+        if kk == 0:
+            return D, I
+        if self._n - self._sorted > max(_MIH_TAIL, self._sorted // 8):
+            self._merge()
+        tail_keys = self._substrings(self.vecs[self._sorted:])
+        scan = []
+        for qi, q in enumerate(Q):
+            hit = self._search_one(q, kk, tail_keys)
+            if hit is None:
+                scan.append(qi)
+                continue
+            D[qi, :kk], I[qi, :kk] = hit[0], self._ids[hit[1]]
+        if scan:
+            self.last_candidates += self._n * len(scan)
+            D[scan], I[scan] = super().search(Q[scan], k)
+        return D, I
+
+    def _search_one(self, q: np.ndarray, k: int, tail_keys: np.ndarray):
+        """Probe-and-verify one query; ``None`` means a flat scan is cheaper."""
+        qkeys = self._substrings(q[None, :])[0]
+        seen = np.zeros(self._n, dtype=bool)
+        rows = np.empty(0, dtype=np.int64)
+        dists = np.empty(0, dtype=np.int64)
+        for radius in range(self.sub_bits + 1):
+            if self.m * comb(self.sub_bits, radius) * _MIH_PROBE_COST > self._n - rows.size:
+                break             # probing now costs more than scanning the rest
+            masks = _flip_masks(self.sub_bits, radius)
+            found = []
+            for j in range(self.m):
+                probes = qkeys[j] ^ masks
+                col = self._keys[:, j]
+                lo = np.searchsorted(col, probes, side="left")
+                hi = np.searchsorted(col, probes, side="right")
+                found.append(_gather_ranges(self._rows[:, j], lo, hi))
+                if tail_keys.shape[0]:
+                    hit = np.isin(tail_keys[:, j], probes)
+                    found.append(self._sorted + np.flatnonzero(hit))
+            new = np.unique(np.concatenate(found).astype(np.int64))
+            new = new[~seen[new]]
+            if new.size:
+                seen[new] = True
+                rows = np.concatenate([rows, new])
+                dists = np.concatenate([dists, hybrid_hamming_many(q, self._data[new], self.lane_split)])
+            if rows.size >= k and np.partition(dists, k - 1)[k - 1] <= self.m * (radius + 1):
+                self.last_candidates += int(rows.size)
+                order = np.lexsort((rows, dists))[:k]
+                return dists[order], rows[order]
+        return None
+
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+TRAIN_PER_LIST = 64         # training rows sampled per centroid / PQ code
+
+
+def min_train_size(cfg: Config) -> int:
+    """Training rows needed before ``cfg.index_type`` beats a flat index."""
+    if cfg.index_type == "ivf_pq":
+        return 39 * max(cfg.nlist, 256)      # 39 pts/centroid, 256 PQ codes
+    if cfg.index_type == "ivf_flat":
+        return 39 * cfg.nlist
+    return 0
+
+
+def train_sample_size(cfg: Config) -> int:
+    """Rows worth sampling to train ``cfg.index_type``: ~64 per centroid."""
+    if cfg.index_type == "ivf_pq":
+        return TRAIN_PER_LIST * max(cfg.nlist, 256)
+    if cfg.index_type == "ivf_flat":
+        return TRAIN_PER_LIST * cfg.nlist
+    return 0
+
+
+def make_index(dim: int, cfg: Config | None = None, train: np.ndarray | None = None):
+    """Return a FAISS index of type ``cfg.index_type`` (flat when cfg is None).
+
+    IVF indexes are trained on ``train``; with fewer than
+    ``min_train_size(cfg)`` rows, or ``USE_FLAT=1``, a flat L2 index is
+    returned instead.  Raises ImportError if faiss is missing and
+    ValueError if ``dim`` is not a multiple of ``cfg.pq_m`` for IVF-PQ.
+    """
     if faiss is None:
         raise ImportError("faiss library not installed")
-    if os.getenv("USE_FLAT", "") == "1":
+    kind = cfg.index_type if cfg is not None else "flat"
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"unknown index_type '{kind}'")
+    if kind == "ivf_pq" and (cfg.pq_m <= 0 or dim % cfg.pq_m):
+        raise ValueError(f"pq_m={cfg.pq_m} must divide dim={dim}")
+    if os.getenv("USE_FLAT", "") == "1" or kind == "flat":
         return faiss.IndexFlatL2(dim)
-    return faiss.IndexFlatL2(dim)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, cfg.hnsw_m)
+        index.hnsw.efSearch = cfg.hnsw_ef_search
+        return index
 
+    n_train = 0 if train is None else len(train)
+    if n_train < min_train_size(cfg):
+        log.info("%d training vectors < %d for %s; using flat index",
+                 n_train, min_train_size(cfg), kind)
+        return faiss.IndexFlatL2(dim)
+    xb = np.ascontiguousarray(train, dtype=np.float32).reshape(-1, dim)
+    quantizer = faiss.IndexFlatL2(dim)
+    if kind == "ivf_pq":
+        index = faiss.IndexIVFPQ(quantizer, dim, cfg.nlist, cfg.pq_m, 8)
+    else:
+        index = faiss.IndexIVFFlat(quantizer, dim, cfg.nlist)
+    index.train(xb)
+    index.nprobe = cfg.nprobe
+    return index
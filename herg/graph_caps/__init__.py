@@ -1,33 +1,119 @@
 import numpy as np
 from .capsule import Capsule
+from .table import CapsuleTable
 
 EdgeId = int
 Weight = int  # int16
 
+MERGE_MIN = 1024    # buffered edges tolerated before merging into the CSR
+
 
 class EdgeCOO:
-    """Ultra-thin sparse COO table (src, dst, w16)."""
+    """Sparse COO edge table (src, dst, w16) with a CSR index over src.
+
+    Edges live in src-sorted NumPy columns plus per-source offsets, so
+    ``neighbors`` is a binary search and an O(degree) slice.  ``add_edge``
+    goes to an append buffer (itself indexed by src) that is merged into the
+    CSR once it outgrows ``max(MERGE_MIN, E / 8)``.  ``src``/``dst``/``wts``
+    still read and assign as plain lists for snapshots.
+    """
 
     def __init__(self):
-        self.src = []      # list[int]
-        self.dst = []      # list[int]
-        self.wts = []      # list[int16]
+        self._src = np.empty(0, dtype=np.uint64)
+        self._dst = np.empty(0, dtype=np.uint64)
+        self._w = np.empty(0, dtype=np.int16)
+        self._keys = np.empty(0, dtype=np.uint64)     # unique sources
+        self._offsets = np.zeros(1, dtype=np.int64)   # CSR row pointers
+        self._dirty = False
+        self._bsrc = []      # list[int]
+        self._bdst = []      # list[int]
+        self._bw = []        # list[int16]
+        self._bidx = {}      # src -> buffer positions
 
     # ------------------------------------------------------------------ #
     def add_edge(self, src: int, dst: int, w: int):
-        self.src.append(src)
-        self.dst.append(dst)
-        self.wts.append(int(np.clip(w, -32767, 32767)))
+        self._bidx.setdefault(src, []).append(len(self._bsrc))
+        self._bsrc.append(src)
+        self._bdst.append(dst)
+        self._bw.append(int(np.clip(w, -32767, 32767)))
+        if len(self._bsrc) > max(MERGE_MIN, self._src.size // 8):
+            self._merge()
 
     def neighbors(self, node_id: int):
-        idx = [i for i, s in enumerate(self.src) if s == node_id]
-        n_ids = [self.dst[i] for i in idx]
-        n_wts = [self.wts[i] for i in idx]
+        self._reindex()
+        lo, hi = self._row(node_id)
+        n_ids = self._dst[lo:hi].tolist()
+        n_wts = self._w[lo:hi].tolist()
+        for i in self._bidx.get(node_id, ()):
+            n_ids.append(self._bdst[i])
+            n_wts.append(self._bw[i])
         return n_ids, n_wts
 
     def prune_edges(self, threshold: int):
-        keep = [abs(w) >= threshold for w in self.wts]
-        self.src = [s for s, k in zip(self.src, keep) if k]
-        self.dst = [d for d, k in zip(self.dst, keep) if k]
-        self.wts = [w for w, k in zip(self.wts, keep) if k]
+        self._merge()
+        keep = np.abs(self._w.astype(np.int32)) >= threshold
+        self._src, self._dst, self._w = self._src[keep], self._dst[keep], self._w[keep]
+        self._build_offsets()
+
+    def csr(self):
+        """Return merged ``(keys, offsets, dst, w)`` arrays (read-only use)."""
+        self._merge()
+        return self._keys, self._offsets, self._dst, self._w
+
+    def __len__(self) -> int:
+        return self._src.size + len(self._bsrc)
+
+    # ------------------------------------------------------------------ #
+    def _row(self, node_id: int):
+        if node_id < 0 or not self._keys.size:
+            return 0, 0
+        i = int(np.searchsorted(self._keys, np.uint64(node_id)))
+        if i == self._keys.size or int(self._keys[i]) != node_id:
+            return 0, 0
+        return int(self._offsets[i]), int(self._offsets[i + 1])
+
+    def _merge(self) -> None:
+        self._reindex()
+        if not self._bsrc:
+            return
+        self._src = np.concatenate([self._src, np.asarray(self._bsrc, dtype=np.uint64)])
+        self._dst = np.concatenate([self._dst, np.asarray(self._bdst, dtype=np.uint64)])
+        self._w = np.concatenate([self._w, np.asarray(self._bw, dtype=np.int16)])
+        self._bsrc, self._bdst, self._bw, self._bidx = [], [], [], {}
+        self._sort()
+
+    def _reindex(self) -> None:
+        if not self._dirty:
+            return
+        if not (self._src.size == self._dst.size == self._w.size):
+            raise ValueError("src/dst/wts lengths differ")
+        self._dirty = False
+        self._sort()
+
+    def _sort(self) -> None:
+        order = np.argsort(self._src, kind="stable")   # keeps per-source insertion order
+        self._src, self._dst, self._w = self._src[order], self._dst[order], self._w[order]
+        self._build_offsets()
+
+    def _build_offsets(self) -> None:
+        self._keys, counts = np.unique(self._src, return_counts=True)
+        self._offsets = np.zeros(self._keys.size + 1, dtype=np.int64)
+        np.cumsum(counts, out=self._offsets[1:])
+
+    # --- list views kept for snapshots -------------------------------- #
+    def _column(name, dtype):
+        def fget(self):
+            self._merge()
+            return getattr(self, name).tolist()
+
+        def fset(self, values):
+            if self._bsrc:
+                self._merge()
+            setattr(self, name, np.asarray(values, dtype=dtype).reshape(-1))
+            self._dirty = True
+        return property(fget, fset)
 
+    src = _column("_src", np.uint64)
+    dst = _column("_dst", np.uint64)
+    wts = _column("_w", np.int16)
+    del _column
@@ -1,17 +1,86 @@
-from dataclasses import dataclass, field
 from typing import Any, List
+import numpy as np
 from herg import backend as B
 
 
-@dataclass(slots=True)
 class Capsule:
-    """Light-weight capsule node with fast and slow state."""
-    id: int
-    fast: Any  # int8 tensor shape (D,)
-    mu: Any    # float32 tensor shape (D,)
-    L: Any     # low-rank perturbation (r, D)
-    edges: List[int] = field(default_factory=list)
-    energy: float = 1.0
+    """Light-weight capsule node with fast and slow state.
+
+    A free-standing capsule owns its arrays.  Once inserted into a
+    ``CapsuleTable`` it becomes a view of one table row: ``fast``/``mu``/``L``
+    read as read-only NumPy views into the table slabs and assignments write
+    the row in place.  Views stay valid until the table grows or drops a row; the
+    capsule takes private copies back when it leaves the table.  A resident
+    capsule moved to a device with ``to``/``promote`` reads its row through
+    to that device, so table-wide passes and the capsule never disagree.
+    """
+    __slots__ = ("id", "edges", "_fast", "_mu", "_L", "_energy", "_table", "_device")
+
+    def __init__(self, id: int, fast: Any, mu: Any, L: Any,
+                 edges: List[int] | None = None, energy: float = 1.0):
+        self.id = id
+        self._fast = fast      # int8 tensor shape (D,)
+        self._mu = mu          # float32 tensor shape (D,)
+        self._L = L            # low-rank perturbation (r, D)
+        self.edges = [] if edges is None else edges
+        self._energy = energy
+        self._table = None
+        self._device = None    # device a resident capsule's rows are read onto
+
+    def _column(name):
+        def fget(self):
+            t = self._table
+            if t is None:
+                return getattr(self, name)
+            view = getattr(t, name)[t._row[self.id]]
+            if self._device is not None and name != "_energy":
+                view = B.tensor(view, dtype=view.dtype, device=self._device or None)
+            if isinstance(view, np.ndarray):
+                view.flags.writeable = False      # write through assignment
+            return view
+
+        def fset(self, value):
+            t = self._table
+            if t is None:
+                setattr(self, name, value)
+            else:
+                t._set_row(name, t._row[self.id], value)
+        return property(fget, fset)
+
+    fast = _column("_fast")
+    mu = _column("_mu")
+    L = _column("_L")
+    energy = _column("_energy")
+    del _column
+
+    def detach(self) -> None:
+        """Copy the table row into private arrays and stop viewing the table."""
+        t = self._table
+        if t is None:
+            return
+        row = t._row[self.id]
+        self._fast, self._mu = t._fast[row].copy(), t._mu[row].copy()
+        self._L, self._energy = t._L[row].copy(), float(t._energy[row])
+        if self._device is not None:
+            self._fast, self._mu, self._L = (B.tensor(a, dtype=a.dtype, device=self._device or None)
+                                             for a in (self._fast, self._mu, self._L))
+        self._table, self._device = None, None
+
+    def __getstate__(self):
+        return (self.id, B.as_numpy(self.fast).copy(), B.as_numpy(self.mu).copy(),
+                B.as_numpy(self.L).copy(), list(self.edges), float(self.energy))
+
+    def __setstate__(self, state):
+        if len(state) == 2 and isinstance(state[1], dict):
+            # blobs spilled by the old @dataclass(slots=True) Capsule: (None, slots)
+            slots = state[1]
+            state = (slots["id"], slots["fast"], slots["mu"], slots["L"],
+                     slots.get("edges"), slots.get("energy", 1.0))
+        self.__init__(*state)
+
+    def __repr__(self) -> str:
+        where = "table" if self._table is not None else "detached"
+        return f"Capsule(id={self.id}, {where}, energy={float(self.energy):.3f})"
 
     # legacy aliases
     @property
@@ -32,15 +101,33 @@ class Capsule:
 
     # --------------------------------------------------------------
     def to(self, device: str | None = None) -> None:
+        if self._table is not None:
+            self._device = None if device == "cpu" else (device or "")   # "" = backend default
+            return
         self.fast = B.tensor(B.as_numpy(self.fast), dtype=B.as_numpy(self.fast).dtype, device=device)
         self.mu = B.tensor(B.as_numpy(self.mu), dtype=B.as_numpy(self.mu).dtype, device=device)
         self.L = B.tensor(B.as_numpy(self.L), dtype=B.as_numpy(self.L).dtype, device=device)
 
-    def promote(self, dim: int = 6000) -> None:
+    def promote(self, dim: int | None = None) -> None:
+        """Re-encode ``fast`` with the GPU encoder at ``dim`` (default: current width).
+
+        A resident capsule cannot change width: its table row is fixed, so a
+        ``dim`` other than the table's raises ValueError; ``detach`` first.
+        """
         if B.device_of(self.fast) != "cpu":
             return
+        t = self._table
+        dim = dim or (t.dim if t is not None else B.as_numpy(self.fast).shape[-1])
+        if t is not None and dim != t.dim:
+            raise ValueError(f"capsule {self.id} is a row of a dim-{t.dim} table; "
+                             f"detach it before promoting to dim {dim}")
         from herg.cupy_encoder import seed_to_cupy
         self.fast = seed_to_cupy(self.id.to_bytes(32, "big"), dim=dim)
+        if t is not None:
+            self.to("cuda")
 
     def demote(self) -> None:
+        if self._table is not None:
+            self._device = None
+            return
         self.fast = B.tensor(B.as_numpy(self.fast), dtype=B.as_numpy(self.fast).dtype, device="cpu")
@@ -9,47 +9,218 @@ def _rand_W(dim: int, device=None, seed: int = 0xFEED):
 
 _W_CACHE = {}
 
-# cache vectorized erf for NumPy path
+# W operator modes: dense dim×dim int8, rank-r factors, or block-circulant (FFT)
+W_MODES = ("dense", "lowrank", "circulant")
+W_MODE = "dense"
+LOWRANK_R = 16
+CIRC_BLOCK = None      # circulant block size; None = one dim×dim circulant
+_DENSE_ROWS = 512      # W rows widened to float64 per matmul block
+
+
+class DenseW:
+    """The original dense int8 W, applied in row blocks."""
+
+    def __init__(self, dim: int, seed: int = 0xFEED, device=None):
+        self.dim = dim
+        self.W = _rand_W(dim, device=device, seed=seed)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dim * self.dim
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        W = B.as_numpy(self.W)
+        out = np.empty((X.shape[0], self.dim), dtype=np.float64)
+        for lo in range(0, self.dim, _DENSE_ROWS):
+            out[:, lo:lo + _DENSE_ROWS] = X @ W[lo:lo + _DENSE_ROWS].T.astype(np.float64)
+        return out
+
+
+class LowRankW:
+    """W ≈ U·Vᵀ with seeded Gaussian (dim, r) factors scaled to the dense entry variance."""
+
+    def __init__(self, dim: int, rank: int = LOWRANK_R, seed: int = 0xFEED):
+        rng = np.random.default_rng(seed)
+        scale = np.sqrt(2.0 / np.sqrt(rank))      # Var((U·Vᵀ)_ij) = 4, as for int8 in [-3, 3]
+        self.dim = dim
+        self.U = (scale * rng.standard_normal((dim, rank))).astype(np.float32)
+        self.V = (scale * rng.standard_normal((dim, rank))).astype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.U.nbytes + self.V.nbytes
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        return (X @ self.V.astype(np.float64)) @ self.U.T.astype(np.float64)
+
+
+class CirculantW:
+    """Block-circulant W: (p × p) circulant blocks of size b, applied with real FFTs.
+
+    Each block is a circular convolution with a seeded int vector in [-3, 3];
+    only the p²·(b/2 + 1) spectra are kept.  ``dim`` is zero-padded to p·b.
+    """
+
+    def __init__(self, dim: int, block: int | None = CIRC_BLOCK, seed: int = 0xFEED):
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.b = min(block or dim, dim)
+        self.p = -(-dim // self.b)
+        c = rng.integers(-3, 4, size=(self.p, self.p, self.b)).astype(np.float64)
+        self.C = np.fft.rfft(c, axis=-1)
+
+    @property
+    def nbytes(self) -> int:
+        return self.C.nbytes
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        n = X.shape[0]
+        Xp = np.zeros((n, self.p * self.b), dtype=np.float64)
+        Xp[:, :self.dim] = X
+        Xf = np.fft.rfft(Xp.reshape(n, self.p, self.b), axis=-1)
+        Yf = np.einsum("ijf,njf->nif", self.C, Xf)
+        Y = np.fft.irfft(Yf, n=self.b, axis=-1)
+        return Y.reshape(n, -1)[:, :self.dim]
+
+
+def gnn_weight(dim: int, mode: str | None = None, device=None):
+    """Cached W operator for ``dim``; ``mode`` defaults to ``W_MODE``."""
+    mode = mode or W_MODE
+    if mode not in W_MODES:
+        raise ValueError(f"unknown GNN weight mode {mode!r}")
+    key = (dim, device if mode == "dense" else None, mode)
+    op = _W_CACHE.get(key)
+    if op is None:
+        if mode == "dense":
+            op = DenseW(dim, device=device)
+        elif mode == "lowrank":
+            op = LowRankW(dim)
+        else:
+            op = CirculantW(dim)
+        _W_CACHE[key] = op
+    return op
+
+
 import math as _math
-_ERF = np.vectorize(_math.erf)
+_SQRT_PI = _math.sqrt(_math.pi)
+GELU_APPROX = "none"   # "none" = exact erf GELU, "tanh" = tanh approximation
+
+
+_ERF_STEP = 256        # Taylor table nodes per unit of |x|
+_ERF_ORDER = 5         # Taylor degree; with |dx| ≤ 1/512 the remainder is < 1e-17
+_ERF_MAX = 6.0         # erf(|x| ≥ 6) is 1 in double precision
+
+
+def _erf_table():
+    """Taylor coefficients of erf at nodes k/_ERF_STEP, one array per degree.
+
+    erf⁽ᵏ⁾(x) = 2/√π·(-1)ᵏ⁻¹·H_{k-1}(x)·e^(-x²) with physicists' Hermite H.
+    """
+    g = np.arange(int(_ERF_MAX * _ERF_STEP) + 1) / _ERF_STEP
+    herm = [np.ones_like(g), 2 * g]
+    for n in range(1, _ERF_ORDER):
+        herm.append(2 * g * herm[n] - 2 * n * herm[n - 1])
+    dens = (2 / _SQRT_PI) * np.exp(-g * g)
+    coef = [np.array([_math.erf(v) for v in g])]
+    for k in range(1, _ERF_ORDER + 1):
+        coef.append((-1) ** (k - 1) * herm[k - 1] * dens / _math.factorial(k))
+    return coef
+
+_ERF_COEF = _erf_table()
+
 
+def erf(x) -> np.ndarray:
+    """Vectorized float64 erf (|error| ≈ 1e-16 vs ``math.erf``).
 
-def gelu(x):
-    if hasattr(x, "device"):
+    Degree-5 Taylor expansion around the nearest node of a 1/256 grid on
+    [0, 6]; a table gather and five multiply-adds per element.
+    """
+    shape = np.shape(x)
+    x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+    s = np.fmin(np.abs(x), _ERF_MAX) * _ERF_STEP      # fmin maps NaN to the edge
+    idx = np.rint(s).astype(np.intp)
+    dx = (s - idx) / _ERF_STEP
+    out = np.take(_ERF_COEF[_ERF_ORDER], idx)
+    for k in range(_ERF_ORDER - 1, -1, -1):
+        out *= dx
+        out += np.take(_ERF_COEF[k], idx)
+    np.copysign(out, x, out=out)
+    out[np.isnan(x)] = np.nan
+    return out.reshape(shape)
+
+
+def gelu(x, approximate: str | None = None):
+    """GELU; ``approximate='tanh'`` uses the tanh form, otherwise exact erf."""
+    approximate = approximate or GELU_APPROX
+    if approximate not in ("none", "tanh"):
+        raise ValueError(f"unknown GELU approximation {approximate!r}")
+    if hasattr(x, "device") and not isinstance(x, np.ndarray):    # ndarray has .device in NumPy 2
         import torch
+        if approximate == "tanh":
+            return 0.5 * x * (1.0 + torch.tanh(_math.sqrt(2 / _math.pi) * (x + 0.044715 * x ** 3)))
         return 0.5 * x * (1.0 + torch.erf(x / _math.sqrt(2)))
-    else:
-        return 0.5 * x * (1.0 + _ERF(x / _math.sqrt(2)))
+    x = np.asarray(x)
+    if approximate == "tanh":
+        inner = np.sqrt(2 / np.pi) * (x + 0.044715 * x * x * x)
+        return 0.5 * x * (1.0 + np.tanh(inner))
+    return 0.5 * x * (1.0 + erf(x / _math.sqrt(2)))
 
 
-def gnn_step(center_vec, neigh_vecs, weights):
+def gnn_step(center_vec, neigh_vecs, weights, mode: str | None = None,
+             approximate: str | None = None):
     """
     Very tiny GNN:   out = center + GELU(W · mean(neigh_vecs * weights))
-    where W is a fixed random int8→int8 matrix.
+    where W is a fixed random operator (see ``W_MODES``).
     """
     if not neigh_vecs:
         return center_vec
     dim = B.as_numpy(center_vec).shape[0]
     dev = B.device_of(center_vec)
-    key = (dim, dev)
-    W = _W_CACHE.get(key)
-    if W is None:
-        W = _rand_W(dim, device=dev)
-        _W_CACHE[key] = W
 
     stack = B.stack(neigh_vecs, axis=0)
-    if hasattr(stack, "to"):
+    if hasattr(stack, "to") and (mode or W_MODE) == "dense":
         import torch
+        W = gnn_weight(dim, "dense", device=dev).W
         stack = stack.to(torch.int16)
         w_arr = torch.tensor(weights, dtype=torch.int16, device=stack.device).view(-1, 1)
         mean_vec = (stack * w_arr).mean(dim=0)
         lin = (W.to(torch.int16) @ mean_vec)
-        result = torch.as_tensor(center_vec, dtype=torch.int16) + gelu(lin).to(torch.int16)
+        result = torch.as_tensor(center_vec, dtype=torch.int16) + gelu(lin, approximate).to(torch.int16)
         return result.to(torch.int8)
     else:
-        stack = np.asarray(stack, dtype=np.int16)
-        w_arr = np.asarray(weights, dtype=np.int16).reshape(-1, 1)
-        mean_vec = (stack * w_arr).mean(axis=0)
-        lin = np.matmul(B.as_numpy(W).astype(np.int16), mean_vec)
-        result = B.as_numpy(center_vec).astype(np.int16) + gelu(lin).astype(np.int16)
-        return B.tensor(result, dtype=np.int8, device=dev)
+        out = gnn_step_batch(B.as_numpy(center_vec)[None], B.as_numpy(stack)[None],
+                             np.asarray(weights)[None], mode=mode, approximate=approximate)
+        return B.tensor(out[0], dtype=np.int8, device=dev)
+
+
+def gnn_step_batch(centers, neigh, weights, offsets=None, mode: str | None = None,
+                   approximate: str | None = None) -> np.ndarray:
+    """``gnn_step`` for N centers at once; returns (N, dim) int8.
+
+    Neighbours are either dense ``(N, K, dim)`` with ``(N, K)`` weights, or
+    ragged: ``(M, dim)`` rows with ``(M,)`` weights and ``offsets`` (N + 1
+    CSR pointers).  Centers with no neighbours come back unchanged.
+    """
+    C = B.as_numpy(centers)
+    V = B.as_numpy(neigh)
+    w = np.asarray(weights, dtype=np.int16)
+    n, dim = C.shape
+    if offsets is None:
+        counts = np.full(n, V.shape[1], dtype=np.int64)
+        sums = np.einsum("nkd,nk->nd", V.astype(np.int16), w, dtype=np.float64)
+    else:
+        offsets = np.asarray(offsets, dtype=np.int64)
+        counts = np.diff(offsets)
+        sums = np.zeros((n, dim), dtype=np.float64)
+        prod = V.astype(np.int16) * w[:, None]
+        has = np.flatnonzero(counts)
+        if has.size:
+            sums[has] = np.add.reduceat(prod, offsets[has], axis=0, dtype=np.float64)
+    out = C.astype(np.int8, copy=True)
+    has = np.flatnonzero(counts)
+    if has.size:
+        mean = sums[has] / counts[has, None]
+        lin = gnn_weight(dim, mode)(mean)
+        res = C[has].astype(np.int16) + gelu(lin, approximate).astype(np.int16)
+        out[has] = res.astype(np.int8)
+    return out
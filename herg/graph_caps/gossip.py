@@ -1,14 +1,73 @@
 import numpy as np
 from herg import backend as B
 
+GOSSIP_BLOCK = 4096    # rows of the mu slab (or spilled capsules) per step
 
-def gap_junction_gossip(store, ε: float = 0.1) -> None:
-    """Share slow state across all capsules via mean-field."""
-    if not store.caps:
+
+def _cluster_means(mu: np.ndarray, inv: np.ndarray, k: int, block: int) -> np.ndarray:
+    """Per-cluster mean of ``mu`` rows, streamed in row blocks."""
+    sums = np.zeros((k, mu.shape[1]), dtype=np.float64)
+    for lo in range(0, mu.shape[0], block):
+        lab = inv[lo:lo + block]
+        order = np.argsort(lab, kind="stable")
+        lab = lab[order]
+        starts = np.flatnonzero(np.r_[True, lab[1:] != lab[:-1]])
+        sums[lab[starts]] += np.add.reduceat(mu[lo:lo + block][order], starts, axis=0,
+                                             dtype=np.float64)
+    counts = np.bincount(inv, minlength=k)
+    return (sums / np.maximum(counts, 1)[:, None]).astype(np.float32)
+
+
+def gap_junction_gossip(store, ε: float = 0.1, labels=None, include_spilled: bool = False,
+                        block: int = GOSSIP_BLOCK) -> None:
+    """Share slow state across all capsules via mean-field.
+
+    Every resident mu row moves towards its cluster mean, mu ← (1-ε)·mu + ε·m,
+    in place over the table's mu slab, one block of rows at a time, and
+    fast is re-signed from it.  With no ``labels`` the cluster is the whole
+    population and m is the table's running mean; ``labels`` (one per row of
+    ``store.caps.ids``) gossips within each cluster instead.  Gossip leaves
+    every cluster sum unchanged, so the running mean stays current.
+    ``include_spilled`` also streams evicted capsules through SQLite, folding
+    them into the global mean and updating them.
+    """
+    table = store.caps
+    n = len(table)
+    if not n and not include_spilled:
         return
-    mus = [B.as_numpy(c.mu).astype(np.float32) for c in store.caps.values()]
-    cluster_mu = np.mean(mus, axis=0)
-    for cap in store.caps.values():
-        mu = (1 - ε) * B.as_numpy(cap.mu).astype(np.float32) + ε * cluster_mu
-        cap.mu = B.tensor(mu, dtype=np.float32, device=B.device_of(cap.fast))
-        cap.fast = B.tensor(np.sign(mu).astype(np.int8), dtype=np.int8, device=B.device_of(cap.fast))
+    if labels is not None and include_spilled:
+        raise ValueError("per-cluster gossip covers resident capsules only")
+    if labels is None:
+        total = table._mu_sum.copy()
+        count = n
+        if include_spilled:
+            for caps in store.iter_spilled(block):
+                total += np.sum([B.as_numpy(c.mu) for c in caps], axis=0, dtype=np.float64)
+                count += len(caps)
+        if not count:
+            return
+        means = (total / count).astype(np.float32)[None]
+        inv = None
+    else:
+        labels = np.asarray(labels)
+        if labels.shape[0] != n:
+            raise ValueError(f"expected {n} labels, got {labels.shape[0]}")
+        _, inv = np.unique(labels, return_inverse=True)
+        inv = inv.ravel()
+        means = _cluster_means(table.mu, inv, int(inv.max()) + 1, block)
+
+    mu, fast = table.mu, table.fast
+    for lo in range(0, n, block):
+        m = mu[lo:lo + block]
+        m *= 1 - ε
+        m += ε * (means[0] if inv is None else means[inv[lo:lo + block]])
+        fast[lo:lo + block] = np.sign(m)
+    if include_spilled:
+        for caps in store.iter_spilled(block):
+            for c in caps:
+                c.mu = (1 - ε) * B.as_numpy(c.mu).astype(np.float32) + ε * means[0]
+                c.fast = np.sign(c.mu).astype(np.int8)
+            store.write_spilled(caps)
+    if inv is None:
+        # Σ mu ← (1-ε)·Σ mu + ε·n·m; unchanged unless spilled capsules shifted m
+        table._mu_sum = (1 - ε) * table._mu_sum + ε * n * (total / count)
@@ -1,6 +1,6 @@
 from typing import Iterator, Tuple
 import numpy as np
-from ..storage.hvlogfs import HyperChunk, ENTRY_SIZE
+from ..storage.hvlogfs import HyperChunk, ChecksumError
 
 
 class HVLogLoader:
@@ -8,6 +8,9 @@ class HVLogLoader:
         self.chunk = HyperChunk(chunk_path)
 
     def __iter__(self) -> Iterator[Tuple[bytes, np.ndarray]]:
-        for i in range(self.chunk.count):
-            off = 64 + i * ENTRY_SIZE
-            yield b'', np.frombuffer(self.chunk.read(off), dtype=np.int8)
+        """Yield int8 row views over the chunk map, CRC-checked up front."""
+        bad = self.chunk.verify()
+        if bad.size:
+            raise ChecksumError(f'vector crc mismatch at rows {bad.tolist()}')
+        for row in self.chunk.as_matrix().view(np.int8):
+            yield b'', row
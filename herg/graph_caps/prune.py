@@ -1,30 +1,124 @@
 import numpy as np
-from herg import backend as B
-from .capsule import Capsule
-
-
-def sticky_pool_prune(store) -> None:
-    """Prune capsules with depleted energy and merge similar ones."""
-    to_remove = []
-    caps = list(store.caps.values())
-    for cap in caps:
-        if cap.energy < 0:
-            to_remove.append(cap.id)
-    # merge based on mu cosine similarity
-    ids = list(store.caps.keys())
-    for i, cid in enumerate(ids):
-        if cid not in store.caps:
+
+MERGE_COS = 0.98       # cosine above which two capsules merge
+BLOCK_ROWS = 1024      # rows of the normalized mu matrix per product block
+LSH_BITS = 16          # hyperplane bits per LSH table
+LSH_TABLES = 8         # recall ≈ 1 - (1 - 0.936**16)**8 ≈ 0.97 at cos 0.98
+
+
+def _normalized(mu: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(mu, axis=1, keepdims=True)
+    return mu / np.maximum(norm, 1e-8)
+
+
+def _exact_rows(U: np.ndarray, thr: float, block: int, skip: np.ndarray):
+    """Yield ``(i, js)``: later rows ``j`` with U_i·U_j > thr, one row at a time.
+
+    Products are taken a block of rows at a time against the rows not yet
+    in ``skip``; the caller may set ``skip`` while iterating, and absorbed
+    rows drop out of every later block.
+    """
+    n = U.shape[0]
+    for lo in range(0, n, block):
+        hi = min(n, lo + block)
+        live = lo + np.flatnonzero(~skip[lo:])
+        if not live.size or live[0] >= hi:
+            continue
+        S = U[lo:hi] @ U[live].T > thr
+        for i in range(lo, hi):
+            if not skip[i]:
+                js = live[S[i - lo]]
+                yield i, js[js > i]
+
+
+def _lsh_rows(U: np.ndarray, thr: float, bits: int, tables: int, seed: int, skip: np.ndarray):
+    """Like ``_exact_rows`` but only rows sharing a random-hyperplane LSH
+    bucket with ``i`` in some table are checked, so pairs may be missed."""
+    if not 0 < bits <= 64:
+        raise ValueError("lsh_bits must be in 1..64")
+    rng = np.random.default_rng(seed)
+    R = rng.standard_normal((U.shape[1], bits * tables)).astype(np.float32)
+    sig = (U @ R > 0).reshape(U.shape[0], tables, bits).astype(np.uint64)
+    keys = (sig << np.arange(bits, dtype=np.uint64)).sum(axis=2, dtype=np.uint64)
+    order = np.argsort(keys, axis=0, kind="stable")          # (n, tables)
+    sorted_keys = np.take_along_axis(keys, order, axis=0)
+    lo = [np.searchsorted(sorted_keys[:, t], keys[:, t], "left") for t in range(tables)]
+    hi = [np.searchsorted(sorted_keys[:, t], keys[:, t], "right") for t in range(tables)]
+    for i in range(U.shape[0]):
+        if skip[i]:
             continue
-        cap_i = store.caps[cid]
-        for j in range(i + 1, len(ids)):
-            cj = ids[j]
-            if cj not in store.caps:
-                continue
-            cap_j = store.caps[cj]
-            if B.cosine(cap_i.mu, cap_j.mu) > 0.98:
-                cap_i.mu = (B.as_numpy(cap_i.mu) + B.as_numpy(cap_j.mu)) / 2
-                cap_i.fast = B.tensor(np.sign(B.as_numpy(cap_i.mu)), dtype=np.int8)
-                cap_i.energy += cap_j.energy
-                to_remove.append(cj)
+        cand = np.unique(np.concatenate([order[lo[t][i]:hi[t][i], t] for t in range(tables)]))
+        cand = cand[(cand > i) & ~skip[cand]]
+        if cand.size:
+            yield i, cand[U[cand] @ U[i] > thr]
+
+
+def _rows(mu: np.ndarray, thr: float, mode: str, skip: np.ndarray, block: int,
+          lsh_bits: int, lsh_tables: int, seed: int):
+    if mode not in ("exact", "approx"):
+        raise ValueError(f"unknown prune mode {mode!r}")
+    U = _normalized(np.asarray(mu, dtype=np.float32))
+    if mode == "exact":
+        return _exact_rows(U, thr, block, skip)
+    return _lsh_rows(U, thr, lsh_bits, lsh_tables, seed, skip)
+
+
+def merge_candidates(mu: np.ndarray, thr: float = MERGE_COS, mode: str = "exact",
+                     block: int = BLOCK_ROWS, lsh_bits: int = LSH_BITS,
+                     lsh_tables: int = LSH_TABLES, seed: int = 0):
+    """Every pair (i, j), i < j, whose mu cosine exceeds ``thr``, sorted by (i, j).
+
+    ``mode='exact'`` uses blocked matrix products; ``'approx'`` uses seeded
+    random-hyperplane LSH and may miss pairs.  The result can hold O(N²)
+    pairs; ``sticky_pool_prune`` merges without building it.
+    """
+    skip = np.zeros(len(mu), dtype=bool)
+    parts = [(np.full(js.size, i), js)
+             for i, js in _rows(mu, thr, mode, skip, block, lsh_bits, lsh_tables, seed) if js.size]
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    i = np.concatenate([p[0] for p in parts]).astype(np.int64)
+    j = np.concatenate([p[1] for p in parts]).astype(np.int64)
+    return i, j
+
+
+def sticky_pool_prune(store, thr: float = MERGE_COS, mode: str = "exact",
+                      block: int = BLOCK_ROWS, lsh_bits: int = LSH_BITS,
+                      lsh_tables: int = LSH_TABLES, seed: int = 0) -> None:
+    """Prune capsules with depleted energy and merge similar ones.
+
+    Capsules are visited in store (LRU) order; each absorbs every later,
+    not yet absorbed capsule whose mu is still within ``thr`` of its running
+    mean.  A capsule is absorbed at most once, and absorbed capsules drop
+    out of the remaining similarity blocks.  ``mode='approx'`` opts into
+    LSH candidates (see ``merge_candidates``).
+    """
+    table = store.caps
+    if not len(table):
+        return
+    cids = list(table)
+    rows = table.rows_of(cids)
+    mu = table.mu[rows]
+    energy = table.energy[rows]
+    to_remove = [cids[r] for r in np.flatnonzero(energy < 0)]
+
+    absorbed = np.zeros(len(cids), dtype=bool)
+    merged = {}     # rank -> (running mu, absorbed energy)
+    for i, js in _rows(mu, thr, mode, absorbed, block, lsh_bits, lsh_tables, seed):
+        cur, e = mu[i], 0.0
+        for j in js[~absorbed[js]].tolist():
+            if i in merged:     # running mean moved; re-check against it
+                cos = float(cur @ mu[j]) / (float(np.linalg.norm(cur) * np.linalg.norm(mu[j])) + 1e-8)
+                if cos <= thr:
+                    continue
+            cur, e = (cur + mu[j]) / 2, e + float(energy[j])
+            merged[i] = (cur, e)
+            absorbed[j] = True
+            to_remove.append(cids[j])
+    for i, (cur, e) in merged.items():
+        r = rows[i]
+        table.set_mu(r, cur)
+        table.fast[r] = np.sign(cur)
+        table.energy[r] += e
     for cid in to_remove:
-        store.caps.pop(cid, None)
+        table.pop(cid, None)
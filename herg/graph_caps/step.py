@@ -1,4 +1,5 @@
 from collections import deque
+from math import lcm
 import numpy as np
 from herg import backend as B
 from .capsule import Capsule
@@ -23,8 +24,148 @@ def adf_update(capsule: Capsule, incoming_fast, sign: float, eta: float) -> None
     capsule.energy -= float(np.linalg.norm(delta)) * eta
 
 
+ADF_BLOCK = 4096     # capsules per vectorized adf step
+
+
+def adf_update_batch(store, ids, incoming, signs=1.0, eta: float = 0.05) -> None:
+    """``adf_update`` for many resident capsules at once, written in place.
+
+    ``incoming`` is one (D,) vector for all ids or an (N, D) stack aligned
+    with ``ids``; ``signs`` is a scalar or one per id.  Rows are updated in
+    blocks straight in the table slabs.  Repeated ids are applied in order,
+    exactly as sequential ``adf_update`` calls would.
+    """
+    table = store.caps
+    rows = table.rows_of(ids)
+    if not rows.size:
+        return
+    X = B.as_numpy(incoming)
+    S = np.broadcast_to(np.asarray(signs, dtype=np.float32), rows.shape)
+    order = np.argsort(rows, kind="stable")
+    first = np.r_[True, rows[order][1:] != rows[order][:-1]]
+    run = np.arange(rows.size) - np.maximum.accumulate(np.where(first, np.arange(rows.size), 0))
+    rank = np.empty_like(run)
+    rank[order] = run                       # occurrence number of each id
+    for r in range(int(rank.max()) + 1):
+        sel = np.flatnonzero(rank == r)
+        sel = sel[np.argsort(rows[sel], kind="stable")]
+        for lo in range(0, sel.size, ADF_BLOCK):
+            idx = sel[lo:lo + ADF_BLOCK]
+            rw = rows[idx]
+            if rw[-1] - rw[0] + 1 == rw.size:        # contiguous rows: slice views
+                rw = slice(int(rw[0]), int(rw[-1]) + 1)
+            x = (X if X.ndim == 1 else X[idx]).astype(np.float32)
+            step = (eta * S[idx])[:, None]
+            delta = x - table.mu[rw]
+            energy = np.linalg.norm(delta, axis=1) * eta
+            delta *= step
+            table.add_mu(rw, delta)
+            table.L[rw] += delta[:, None, :]
+            table.fast[rw] = np.sign(table.mu[rw])
+            table.energy[rw] -= energy
+
+
+_ROWS_PER_BLOCK = 1 << 24    # accumulator bytes per block of capsules
+
+
+def _hop_layers(indptr: np.ndarray, nbrs: np.ndarray, roots: np.ndarray, radius: int):
+    """Multi-source BFS: yield ``(h, src, node)`` for nodes exactly h hops from roots[src].
+
+    Each level is one sparse frontier × adjacency product on (src, node)
+    pairs, de-duplicated against everything already visited – the same
+    first-discovery rule as a per-root BFS.  Pairs come out sorted by src.
+    """
+    V = indptr.size - 1
+    src = np.arange(roots.size, dtype=np.int64)
+    node = roots.astype(np.int64)
+    visited = src * V + node
+    for h in range(1, radius + 1):
+        deg = indptr[node + 1] - indptr[node]
+        total = int(deg.sum())
+        if total == 0:
+            return
+        first = np.repeat(indptr[node] - (np.cumsum(deg) - deg), deg)
+        nxt = nbrs[first + np.arange(total)]
+        keys = np.unique(np.repeat(src, deg) * V + nxt)
+        keys = keys[~np.isin(keys, visited, assume_unique=True)]
+        if keys.size == 0:
+            return
+        visited = np.union1d(visited, keys)
+        src, node = keys // V, keys % V
+        yield h, src, node
+
+
+def _segment_sum(F: np.ndarray, seg: np.ndarray, rows: np.ndarray, out: np.ndarray) -> None:
+    """out[seg[i]] += F[rows[i]] for sorted seg.
+
+    Segments are laid out ELLPACK-style, longest first, and summed one
+    position at a time: step p adds row p of every segment still that long,
+    so each step is a contiguous prefix gather instead of a per-segment loop.
+    """
+    starts = np.flatnonzero(np.r_[True, seg[1:] != seg[:-1]])
+    lens = np.diff(np.r_[starts, seg.size])
+    order = np.argsort(-lens, kind="stable")
+    starts, lens = starts[order], lens[order]
+    acc = np.zeros((starts.size, F.shape[1]), dtype=out.dtype)
+    active = starts.size
+    for p in range(int(lens[0])):
+        while lens[active - 1] <= p:
+            active -= 1
+        acc[:active] += F[rows[starts[:active] + p]]
+    out[seg[starts]] += acc
+
+
 def k_radius_pass(store, radius: int) -> None:
-    """Propagate fast state across k-hop neighborhood."""
+    """Propagate fast state across k-hop neighborhood, whole graph at once.
+
+    Each capsule within ``radius`` hops contributes once, at its shortest
+    distance h, rotated by block h and weighted 1/h (integer weights
+    lcm(1..radius)/h keep the sum exact).  Unlike ``k_radius_pass_bfs`` every
+    capsule reads the fast states from the start of the pass rather than
+    ones already rewritten earlier in the same sweep.
+    """
+    table = store.caps
+    n = len(table)
+    if not n or radius < 1:
+        return
+    keys, offsets, dst, _ = store.edges.csr()
+    if not dst.size:
+        return
+    cap_ids = table.ids
+    nodes = np.unique(np.concatenate([cap_ids, keys, dst]))
+    deg = np.zeros(nodes.size, dtype=np.int64)
+    deg[np.searchsorted(nodes, keys)] = np.diff(offsets)
+    indptr = np.zeros(nodes.size + 1, dtype=np.int64)
+    np.cumsum(deg, out=indptr[1:])
+    nbrs = np.searchsorted(nodes, dst)
+    roots = np.searchsorted(nodes, cap_ids)
+    row_of = np.full(nodes.size, -1, dtype=np.int64)
+    row_of[roots] = np.arange(n)
+
+    F = table.fast.copy()          # start-of-pass snapshot; results go to the slab
+    dim = F.shape[1]
+    n_blocks = dim // BLOCK_SIZE
+    scale = lcm(*range(1, radius + 1))
+    chunk = max(1, _ROWS_PER_BLOCK // (8 * dim))
+    for lo in range(0, n, chunk):
+        hi = min(n, lo + chunk)
+        acc = np.zeros((hi - lo, dim), dtype=np.int64)
+        touched = np.zeros(hi - lo, dtype=bool)
+        for h, src, node in _hop_layers(indptr, nbrs, roots[lo:hi], radius):
+            rows = row_of[node]
+            hit = rows >= 0
+            if not hit.any():
+                continue
+            layer = np.zeros((hi - lo, dim), dtype=np.int32)
+            _segment_sum(F, src[hit], rows[hit], layer)
+            touched[src[hit]] = True
+            acc += (scale // h) * np.roll(layer, (h % n_blocks) * BLOCK_SIZE, axis=1)
+        hit = np.flatnonzero(touched)
+        table.fast[lo + hit] = np.sign(acc[hit])
+
+
+def k_radius_pass_bfs(store, radius: int) -> None:
+    """Reference per-capsule BFS pass; updates capsules in place as it sweeps."""
     for cid, cap in list(store.caps.items()):
         agg = []
         wts = []
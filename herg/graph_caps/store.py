@@ -1,13 +1,14 @@
 """
 CapsuleStore – LRU + “sticky” pool of Capsule objects.
+Resident capsules live in a columnar CapsuleTable (``store.caps``).
 Persistently swaps evicted capsules to SQLite (pickle BLOB).
 """
 
 import os, sqlite3, pickle, time, hashlib
 import numpy as np
-from collections import OrderedDict
 from herg.graph_caps import Capsule, EdgeCOO
-from herg.encoder import seed_to_hyper
+from herg.graph_caps.table import CapsuleTable
+from herg.encoder import seed_to_hyper_batch
 from herg import backend as B
 
 VRAM_BUDGET = 100_000      # max capsules resident
@@ -17,7 +18,7 @@ STICKY_TTL  = 600          # seconds capsule is immune after sticky mark
 class CapsuleStore:
     def __init__(self, dim=2048, db_path="capsules.sqlite"):
         self.dim = dim
-        self.caps: OrderedDict[int, Capsule] = OrderedDict()
+        self.caps = CapsuleTable(dim)
         self.edges = EdgeCOO()
         self.conn = sqlite3.connect(db_path)
         self.conn.execute(
@@ -34,21 +35,36 @@ class CapsuleStore:
 
     # ------------------------------------------------------------ #
     def spawn(self, seed: bytes, ts=None) -> Capsule:
-        digest = seed if len(seed) == 32 else hashlib.sha256(seed).digest()
-        cid = int.from_bytes(digest, "big", signed=False) & ((1<<64)-1)
-        cap = self.caps.get(cid)
-        if cap is None:
-            fast = seed_to_hyper(digest, dim=self.dim, device="cpu")
-            mu = B.as_numpy(fast).astype(np.float32)
-            L = np.zeros((1, self.dim), dtype=np.float32)
-            cap = Capsule(cid, fast, mu, L)
-            self.caps[cid] = cap
+        return self.spawn_many([seed], ts)[0]
+
+    def spawn_many(self, seeds, ts=None) -> list[Capsule]:
+        """Spawn (or touch) one capsule per seed, encoding new ones in a single batch."""
+        digests = [s if len(s) == 32 else hashlib.sha256(s).digest() for s in seeds]
+        cids = [int.from_bytes(d, "big", signed=False) & ((1<<64)-1) for d in digests]
+        fresh = {}
+        for cid, digest in zip(cids, digests):
+            if cid not in self.caps and cid not in fresh:
+                fresh[cid] = digest
+        if fresh:
+            fast = B.as_numpy(seed_to_hyper_batch(list(fresh.values()), dim=self.dim, device="cpu"))
+            self.caps.add_many(list(fresh), fast, fast)
             self._evict_if_needed()
-        self.caps.move_to_end(cid, last=True)
-        return cap
+        out = []
+        for cid in cids:
+            cap = self.caps.get(cid)
+            if cap is None:            # evicted within this batch
+                cap = self.read(cid)
+            self.caps.move_to_end(cid, last=True)
+            out.append(cap)
+        return out
 
     # ------------------------------------------------------------ #
-    def read(self, cid: int):
+    def read(self, cid: int, evict: bool = True):
+        """Return capsule ``cid``, loading it from SQLite if spilled.
+
+        With ``evict=False`` the store may exceed ``VRAM_BUDGET`` until the
+        caller runs ``_evict_if_needed`` (used to pin a batch while it loads).
+        """
         cap = self.caps.get(cid)
         if cap is None:
             cur = self.conn.execute("SELECT blob FROM caps WHERE id=?", (cid,))
@@ -56,17 +72,58 @@ class CapsuleStore:
             if row:
                 cap = pickle.loads(row[0])
                 self.caps[cid] = cap
-                self._evict_if_needed()
+                if evict:
+                    self._evict_if_needed()
         return cap
 
     # ------------------------------------------------------------ #
-    def update(self, cid: int, delta_vec, sign: float = 1.0, eta: float = 0.05):
-        cap = self.read(cid)
-        if cap is None:
+    def iter_spilled(self, block: int = 4096):
+        """Yield evicted (non-resident) capsules from SQLite in id-ordered blocks."""
+        last = None
+        while True:
+            if last is None:
+                cur = self.conn.execute("SELECT id, blob FROM caps ORDER BY id LIMIT ?", (block,))
+            else:
+                cur = self.conn.execute(
+                    "SELECT id, blob FROM caps WHERE id > ? ORDER BY id LIMIT ?", (last, block))
+            rows = cur.fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            caps = [pickle.loads(blob) for cid, blob in rows if cid not in self.caps]
+            if caps:
+                yield caps
+
+    def write_spilled(self, caps) -> None:
+        self.conn.executemany("REPLACE INTO caps VALUES (?,?)",
+                              [(c.id, pickle.dumps(c, protocol=4)) for c in caps])
+        self.conn.commit()
+
+    # ------------------------------------------------------------ #
+    def update(self, cid, delta_vec, sign=1.0, eta: float = 0.05):
+        """ADF-update one capsule, or a batch when ``cid`` is a sequence of ids.
+
+        For a batch, ``delta_vec``/``sign`` may be shared or given per id;
+        ids that are neither resident nor spilled are skipped.
+        """
+        from .step import adf_update_batch
+        if np.ndim(cid) == 0:
+            cid, delta_vec = [cid], B.as_numpy(delta_vec)[None]
+        ids = [int(c) for c in cid]
+        keep = [i for i, c in enumerate(ids) if self.read(c, evict=False) is not None]
+        if not keep:
+            self._evict_if_needed()
             return
-        from .step import adf_update
-        adf_update(cap, delta_vec, sign, eta)
-        self.caps.move_to_end(cid, last=True)
+        X = B.as_numpy(delta_vec)
+        if X.ndim == 2:
+            X = X[keep]
+        if np.ndim(sign):
+            sign = np.asarray(sign)[keep]
+        ids = [ids[i] for i in keep]
+        adf_update_batch(self, ids, X, sign, eta)
+        for c in ids:
+            self.caps.move_to_end(c, last=True)
+        self._evict_if_needed()               # batch is most recent: evicted last
 
     # ------------------------------------------------------------ #
     def prune(self) -> None:
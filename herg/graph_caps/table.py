@@ -0,0 +1,238 @@
+"""
+CapsuleTable – columnar (structure-of-arrays) capsule storage.
+
+All resident capsules share preallocated ``(capacity, dim)`` slabs; live
+rows are always ``[0, len)`` so ``table.fast`` / ``table.mu`` / ``table.L``
+/ ``table.energy`` / ``table.ids`` are plain views that whole-population
+passes can use as single matrix operations.  The table is also the ordered
+id → ``Capsule`` mapping (LRU order) the store has always exposed as
+``store.caps``; each Capsule is a view of its row.
+
+The table keeps a running float64 sum of ``mu`` so the population mean is
+available without a pass over the slab.  Row setters, insertions, removals
+and ``set_mu`` keep it current; code that writes ``table.mu`` in place
+must either preserve the column sum or call ``refresh_mu_sum``.
+"""
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import numpy as np
+from herg import backend as B
+from .capsule import Capsule
+
+MIN_CAPACITY = 64
+
+
+class CapsuleTable(MutableMapping):
+    def __init__(self, dim: int, rank: int = 1, capacity: int = MIN_CAPACITY):
+        self.dim = dim
+        self.rank = rank
+        self._n = 0
+        self._caps: OrderedDict[int, Capsule] = OrderedDict()
+        self._row: dict[int, int] = {}
+        self._mu_sum = np.zeros(dim, dtype=np.float64)
+        self._alloc(max(capacity, 1))
+
+    # ------------------------------------------------------------------ #
+    # slabs – views over live rows, in row order (see ``ids``)
+    @property
+    def fast(self) -> np.ndarray:
+        return self._fast[:self._n]
+
+    @property
+    def mu(self) -> np.ndarray:
+        return self._mu[:self._n]
+
+    @property
+    def L(self) -> np.ndarray:
+        return self._L[:self._n]
+
+    @property
+    def energy(self) -> np.ndarray:
+        return self._energy[:self._n]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._n]
+
+    @property
+    def capacity(self) -> int:
+        return self._ids.size
+
+    @property
+    def mu_mean(self) -> np.ndarray:
+        """Running population mean of ``mu`` (float64)."""
+        return self._mu_sum / max(self._n, 1)
+
+    def set_mu(self, rows, values) -> None:
+        """Write ``mu`` rows and keep the running sum current."""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        values = np.asarray(B.as_numpy(values), dtype=np.float32).reshape(rows.size, self.dim)
+        self._mu_sum -= self._mu[rows].sum(axis=0, dtype=np.float64)
+        self._mu[rows] = values
+        self._mu_sum += values.sum(axis=0, dtype=np.float64)
+
+    def add_mu(self, rows, dmu) -> None:
+        """``mu[rows] += dmu`` in place (rows: index array or slice), tracking the sum."""
+        dmu = np.asarray(dmu, dtype=np.float32)
+        self._mu[:self._n][rows] += dmu
+        self._mu_sum += dmu.reshape(-1, self.dim).sum(axis=0, dtype=np.float64)
+
+    def refresh_mu_sum(self) -> None:
+        self._mu_sum = self.mu.sum(axis=0, dtype=np.float64)
+
+    def row_of(self, cid: int) -> int:
+        return self._row[cid]
+
+    def rows_of(self, cids) -> np.ndarray:
+        return np.fromiter((self._row[c] for c in cids), dtype=np.int64)
+
+    # ------------------------------------------------------------------ #
+    # mapping protocol (LRU order)
+    def __getitem__(self, cid: int) -> Capsule:
+        return self._caps[cid]
+
+    def __setitem__(self, cid: int, cap: Capsule) -> None:
+        if cap.id != cid:
+            raise KeyError(f"capsule {cap.id} stored under id {cid}")
+        old = self._caps.get(cid)
+        if old is cap:
+            return
+        values = (cap.fast, cap.mu, self._low_rank(cap.L), cap.energy)
+        if old is None:
+            self._reserve(self._n + 1)
+            row = self._n
+            self._n += 1
+            self._row[cid] = row
+            self._ids[row] = cid
+        else:
+            old.detach()
+            row = self._row[cid]
+            self._mu_sum -= self._mu[row]
+        self._write(row, *values)
+        self._mu_sum += self._mu[row]
+        if cap._table is not None and cap._table is not self:
+            cap._table.pop(cap.id, None)
+        cap._table = self
+        self._caps[cid] = cap
+
+    def __delitem__(self, cid: int) -> None:
+        cap = self._caps.pop(cid)
+        cap.detach()
+        row = self._row.pop(cid)
+        self._mu_sum -= self._mu[row]
+        last = self._n - 1
+        if row != last:                       # swap-remove keeps rows dense
+            moved = int(self._ids[last])
+            self._fast[row] = self._fast[last]
+            self._mu[row] = self._mu[last]
+            self._L[row] = self._L[last]
+            self._energy[row] = self._energy[last]
+            self._ids[row] = moved
+            self._row[moved] = row
+        self._n = last
+
+    def __iter__(self):
+        return iter(self._caps)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __contains__(self, cid) -> bool:
+        return cid in self._caps
+
+    def move_to_end(self, cid: int, last: bool = True) -> None:
+        self._caps.move_to_end(cid, last=last)
+
+    def popitem(self, last: bool = True):
+        cid = next(reversed(self._caps)) if last else next(iter(self._caps))
+        cap = self._caps[cid]
+        del self[cid]
+        return cid, cap
+
+    def clear(self) -> None:
+        for cap in self._caps.values():
+            cap.detach()
+        self._caps.clear()
+        self._row.clear()
+        self._mu_sum[:] = 0.0
+        self._n = 0
+
+    # ------------------------------------------------------------------ #
+    def add_many(self, cids, fast, mu, L=None, energy=1.0) -> list[Capsule]:
+        """Append new capsules from stacked rows in one slab write."""
+        cids = [int(c) for c in cids]
+        if len(set(cids)) != len(cids) or any(c in self._caps for c in cids):
+            raise KeyError("add_many needs new, distinct ids")
+        n = len(cids)
+        self._reserve(self._n + n)
+        lo, hi = self._n, self._n + n
+        self._fast[lo:hi] = B.as_numpy(fast)
+        self._mu[lo:hi] = B.as_numpy(mu)
+        self._mu_sum += self._mu[lo:hi].sum(axis=0, dtype=np.float64)
+        self._L[lo:hi] = 0.0 if L is None else B.as_numpy(L).reshape(n, self.rank, self.dim)
+        self._energy[lo:hi] = energy
+        self._ids[lo:hi] = cids
+        self._n = hi
+        out = []
+        for row, cid in enumerate(cids, start=lo):
+            self._row[cid] = row
+            cap = Capsule(cid, None, None, None)
+            cap._table = self
+            self._caps[cid] = cap
+            out.append(cap)
+        return out
+
+    # ------------------------------------------------------------------ #
+    def _set_row(self, name: str, row: int, value) -> None:
+        if name == "_mu":
+            self.set_mu(row, value)
+        elif name == "_L":
+            L = self._low_rank(value)
+            self._L[row] = 0.0
+            self._L[row, :len(L)] = L
+        elif name == "_fast":
+            self._fast[row] = self._bipolar(value)
+        else:
+            getattr(self, name)[row] = B.as_numpy(value)
+
+    @staticmethod
+    def _bipolar(fast) -> np.ndarray:
+        """``fast`` for an int8 row: float encodings (e.g. ``seed_to_cupy``) keep their signs."""
+        fast = B.as_numpy(fast)
+        return np.sign(fast) if fast.dtype.kind == "f" else fast
+
+    def _low_rank(self, L) -> np.ndarray:
+        """``L`` as (r, dim) rows with r <= rank; raises ValueError otherwise."""
+        if L is None:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        L = B.as_numpy(L)
+        if L.size == 0:
+            return L.reshape(0, self.dim)
+        if L.shape[-1] != self.dim or L.size // self.dim > self.rank:
+            raise ValueError(f"L of shape {L.shape} does not fit rank-{self.rank} "
+                             f"table rows of dim {self.dim}")
+        return L.reshape(-1, self.dim)
+
+    def _write(self, row: int, fast, mu, L, energy) -> None:
+        self._fast[row] = self._bipolar(fast)
+        self._mu[row] = self._fast[row] if mu is None else B.as_numpy(mu)
+        self._L[row] = 0.0
+        self._L[row, :len(L)] = L
+        self._energy[row] = energy
+
+    def _alloc(self, capacity: int) -> None:
+        n = self._n
+        fast = np.zeros((capacity, self.dim), dtype=np.int8)
+        mu = np.zeros((capacity, self.dim), dtype=np.float32)
+        L = np.zeros((capacity, self.rank, self.dim), dtype=np.float32)
+        energy = np.zeros(capacity, dtype=np.float64)
+        ids = np.zeros(capacity, dtype=np.uint64)
+        if n:
+            fast[:n], mu[:n], L[:n] = self._fast[:n], self._mu[:n], self._L[:n]
+            energy[:n], ids[:n] = self._energy[:n], self._ids[:n]
+        self._fast, self._mu, self._L, self._energy, self._ids = fast, mu, L, energy, ids
+
+    def _reserve(self, n: int) -> None:
+        if n > self.capacity:
+            self._alloc(max(n, 2 * self.capacity))
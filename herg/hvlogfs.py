@@ -0,0 +1,10 @@
+"""Capsule log used by the agent (node, sweeper, compaction).
+
+Re-exports the disk-backed ``herg.storage.hvlogfs.log.HVLogFS``; sandboxed
+CI without numpy gets the in-memory stand-in from ``herg._ci_stubs``.
+"""
+
+from herg.storage.hvlogfs.log import HVLogFS, LogChunk
+from herg.storage.hvlogfs.mem import Capsule
+
+__all__ = ["HVLogFS", "LogChunk", "Capsule"]
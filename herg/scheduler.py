@@ -1,5 +1,5 @@
 from herg.graph_caps.store import CapsuleStore
-from herg.graph_caps.step import k_radius_pass, adf_update
+from herg.graph_caps.step import k_radius_pass, adf_update_batch
 from herg.graph_caps.gossip import gap_junction_gossip
 from herg.graph_caps.prune import sticky_pool_prune
 from herg.encoder import seed_to_hyper
@@ -12,8 +12,7 @@ def dual_clock_loop(ticks: int, radius: int, gossip_every: int = 8) -> CapsuleSt
         cap = store.spawn(seed)
         k_radius_pass(store, radius)
         if tick % gossip_every == 0:
-            for c in list(store.caps.values()):
-                adf_update(c, c.fast, 1.0, 0.1)
+            adf_update_batch(store, store.caps.ids, store.caps.fast, 1.0, 0.1)
             gap_junction_gossip(store)
             sticky_pool_prune(store)
     return store
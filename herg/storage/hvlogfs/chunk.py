@@ -2,7 +2,9 @@ import os
 import mmap
 import struct
 import zlib
-from typing import List
+from typing import List, Sequence
+
+import numpy as np
 
 VECTOR_SIZE = 1024  # bytes per vector (8192 bits)
 ENTRY_SIZE = VECTOR_SIZE + 4  # extra CRC32 per vector
@@ -15,47 +17,80 @@ class ChecksumError(Exception):
     pass
 
 
+def crc_rows(rows: np.ndarray) -> np.ndarray:
+    """crc32 of each row of a (n, L) uint8 array whose rows are contiguous."""
+    return np.fromiter((zlib.crc32(r) for r in rows), dtype=np.uint32, count=len(rows))
+
+
 class HyperChunk:
-    """Simple hypervector chunk reader/writer with CRC checks."""
+    """Simple hypervector chunk reader/writer with CRC checks.
 
-    def __init__(self, path: str, mode: str = 'r+b') -> None:
+    The chunk CRC is kept as a running ``crc32`` over the used region and
+    extended on every append.  ``flush_every`` sets when the header is
+    written and the map flushed: every append (1), every N appends, or only
+    on ``flush()``/``close()`` (None).  ``mode='rb'`` maps an existing
+    chunk read-only; such a chunk never rewrites its header.
+    """
+
+    def __init__(self, path: str, mode: str = 'r+b', flush_every: int | None = 1) -> None:
         self.path = path
-        exists = os.path.exists(path)
-        self.fd = os.open(path, os.O_RDWR | os.O_CREAT)
-        if not exists:
-            os.ftruncate(self.fd, CHUNK_SIZE)
-        self.mm = mmap.mmap(self.fd, CHUNK_SIZE)
+        self.flush_every = flush_every
+        self.readonly = mode == 'rb'
+        self._pending = 0
+        if self.readonly:
+            exists = True
+            self.fd = os.open(path, os.O_RDONLY)
+            self.mm = mmap.mmap(self.fd, CHUNK_SIZE, access=mmap.ACCESS_READ)
+        else:
+            exists = os.path.exists(path)
+            self.fd = os.open(path, os.O_RDWR | os.O_CREAT)
+            if not exists:
+                os.ftruncate(self.fd, CHUNK_SIZE)
+            self.mm = mmap.mmap(self.fd, CHUNK_SIZE)
         if not exists:
             header = struct.pack(HEADER_FMT, MAGIC, 0, VECTOR_SIZE, 0, b'')
             self.mm[:64] = header
         else:
-            magic, self.count, vsize, crc, _ = struct.unpack(HEADER_FMT, self.mm[:64])
-            if magic != MAGIC:
-                raise ValueError('Bad chunk magic')
-            if vsize != VECTOR_SIZE:
-                raise ValueError('Vector size mismatch')
-            if crc and zlib.crc32(self.mm[64:64 + self.count * ENTRY_SIZE]) != crc:
-                raise ChecksumError('Chunk CRC mismatch')
+            try:
+                self._check_header()
+            except Exception:
+                self.mm.close()
+                os.close(self.fd)
+                raise
         if not exists:
             self.count = 0
+            self._crc = 0
+
+    def _check_header(self) -> None:
+        magic, self.count, vsize, crc, _ = struct.unpack(HEADER_FMT, self.mm[:64])
+        if magic != MAGIC:
+            raise ValueError('Bad chunk magic')
+        if vsize != VECTOR_SIZE:
+            raise ValueError('Vector size mismatch')
+        self._crc = zlib.crc32(self.mm[64:64 + self.count * ENTRY_SIZE])
+        if crc and self._crc != crc:
+            raise ChecksumError('Chunk CRC mismatch')
 
     # ------------------------------------------------------------
     def append(self, vectors: List[bytes]) -> List[int]:
         """Append vectors, returning offsets."""
-        offsets = []
-        for vec in vectors:
+        if 64 + (self.count + len(vectors)) * ENTRY_SIZE > CHUNK_SIZE:
+            raise IOError('chunk full')
+        buf = bytearray(len(vectors) * ENTRY_SIZE)
+        for i, vec in enumerate(vectors):
             if len(vec) != VECTOR_SIZE:
                 raise ValueError('Vector must be 1024 bytes')
-            if 64 + (self.count + 1) * ENTRY_SIZE > CHUNK_SIZE:
-                raise IOError('chunk full')
-            off = 64 + self.count * ENTRY_SIZE
-            crc = zlib.crc32(vec)
-            self.mm[off:off + VECTOR_SIZE] = vec
-            self.mm[off + VECTOR_SIZE: off + ENTRY_SIZE] = struct.pack('<I', crc)
-            offsets.append(off)
-            self.count += 1
-        self._write_header()
-        return offsets
+            pos = i * ENTRY_SIZE
+            buf[pos:pos + VECTOR_SIZE] = vec
+            struct.pack_into('<I', buf, pos + VECTOR_SIZE, zlib.crc32(vec))
+        start = 64 + self.count * ENTRY_SIZE
+        self.mm[start:start + len(buf)] = buf
+        self._crc = zlib.crc32(buf, self._crc)
+        self.count += len(vectors)
+        self._pending += 1
+        if self.flush_every and self._pending >= self.flush_every:
+            self.flush()
+        return list(range(start, start + len(buf), ENTRY_SIZE))
 
     # ------------------------------------------------------------
     def read(self, offset: int) -> bytes:
@@ -66,15 +101,66 @@ class HyperChunk:
             raise ChecksumError('vector crc mismatch')
         return data
 
+    # --- zero-copy access ------------------------------------------
+    # Views share the map; drop them before close() (mmap refuses to close
+    # while buffer exports are alive).
+    def read_view(self, offset: int, verify: bool = True) -> memoryview:
+        """Vector at ``offset`` as a read-only memoryview over the map."""
+        view = memoryview(self.mm)[offset:offset + VECTOR_SIZE].toreadonly()
+        if verify:
+            stored = struct.unpack_from('<I', self.mm, offset + VECTOR_SIZE)[0]
+            if zlib.crc32(view) != stored:
+                raise ChecksumError('vector crc mismatch')
+        return view
+
+    def read_many(self, offsets: Sequence[int], verify: bool = True) -> List[np.ndarray]:
+        """Vectors at ``offsets`` as uint8 row views of ``as_matrix``."""
+        rows = (np.asarray(offsets, dtype=np.int64) - 64) // ENTRY_SIZE
+        M = self.as_matrix()
+        if verify and rows.size:
+            bad = rows[crc_rows(M[rows]) != self.stored_crcs()[rows]]
+            if bad.size:
+                raise ChecksumError(f'vector crc mismatch at rows {bad.tolist()}')
+        return [M[r] for r in rows.tolist()]
+
+    def as_matrix(self) -> np.ndarray:
+        """All entries as a read-only strided (count, VECTOR_SIZE) uint8 view."""
+        M = np.ndarray((self.count, VECTOR_SIZE), dtype=np.uint8, buffer=self.mm,
+                       offset=64, strides=(ENTRY_SIZE, 1))
+        M.flags.writeable = False
+        return M
+
+    def stored_crcs(self) -> np.ndarray:
+        """Per-vector CRCs as stored, a strided (count,) uint32 view."""
+        C = np.ndarray((self.count,), dtype='<u4', buffer=self.mm,
+                       offset=64 + VECTOR_SIZE, strides=(ENTRY_SIZE,))
+        C.flags.writeable = False
+        return C
+
+    def verify(self) -> np.ndarray:
+        """Indices of entries whose vector CRC does not match."""
+        return np.flatnonzero(crc_rows(self.as_matrix()) != self.stored_crcs())
+
+    def truncate(self, count: int) -> None:
+        """Drop entries from ``count`` on; the running CRC is recomputed."""
+        if count > self.count:
+            raise ValueError('cannot truncate past the last entry')
+        self.count = count
+        self._crc = zlib.crc32(self.mm[64:64 + count * ENTRY_SIZE])
+
     # ------------------------------------------------------------
+    def flush(self) -> None:
+        """Write the header (count + running CRC) and flush the map."""
+        self._write_header()
+        self._pending = 0
+
     def _write_header(self) -> None:
-        chunk_crc = zlib.crc32(self.mm[64:64 + self.count * ENTRY_SIZE])
-        header = struct.pack(HEADER_FMT, MAGIC, self.count, VECTOR_SIZE, chunk_crc, b'')
+        header = struct.pack(HEADER_FMT, MAGIC, self.count, VECTOR_SIZE, self._crc, b'')
         self.mm[:64] = header
         self.mm.flush()
 
     def close(self) -> None:
-        self._write_header()
+        if not self.readonly:
+            self._write_header()
         self.mm.close()
         os.close(self.fd)
-
@@ -0,0 +1,241 @@
+import mmap
+import os
+import zlib
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+POLY = 0x11d           # GF(256) reduction polynomial x^8 + x^4 + x^3 + x^2 + 1
+WINDOW = 1 << 20       # bytes per streamed window
+
+
+def _tables():
+    exp = np.zeros(512, dtype=np.uint8)
+    log = np.zeros(256, dtype=np.int64)
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= POLY
+    exp[255:510] = exp[:255]
+    mul = exp[log[:, None] + log[None, :]]
+    mul[0, :] = 0
+    mul[:, 0] = 0
+    return exp, log, mul
+
+
+EXP, LOG, MUL = _tables()       # MUL[a] is the 256-byte lookup table for "times a"
+_PAIRS = np.arange(1 << 16)
+
+
+@lru_cache(maxsize=None)
+def _pair_table(c: int) -> np.ndarray:
+    """``MUL[c]`` applied to both bytes of a uint16: half the gathers per byte."""
+    t = MUL[c].astype(np.uint16)
+    return t[_PAIRS & 0xff] | (t[_PAIRS >> 8] << 8)
+
+
+def gf_mul(a: int, b: int) -> int:
+    return int(MUL[a, b])
+
+
+def gf_inv(a: int) -> int:
+    if a == 0:
+        raise ZeroDivisionError('0 has no inverse in GF(256)')
+    return int(EXP[255 - LOG[a]])
+
+
+def _invert(rows: List[List[int]]) -> List[List[int]]:
+    """Gauss-Jordan inverse of a square GF(256) matrix."""
+    n = len(rows)
+    a = [list(r) + [int(i == j) for j in range(n)] for i, r in enumerate(rows)]
+    for col in range(n):
+        piv = next((r for r in range(col, n) if a[r][col]), None)
+        if piv is None:
+            raise ValueError('singular matrix')
+        a[col], a[piv] = a[piv], a[col]
+        inv = gf_inv(a[col][col])
+        a[col] = [gf_mul(v, inv) for v in a[col]]
+        for r in range(n):
+            f = a[r][col]
+            if r != col and f:
+                a[r] = [v ^ gf_mul(f, w) for v, w in zip(a[r], a[col])]
+    return [row[n:] for row in a]
+
+
+def _combine(coefs: Sequence[int], shards: Sequence[np.ndarray], out: np.ndarray,
+             tmp: np.ndarray) -> np.ndarray:
+    """``out = sum(c * s)`` over GF(256): one table gather and XOR per shard."""
+    out[:] = 0
+    even = len(out) & ~1
+    for c, s in zip(coefs, shards):
+        if c == 1:
+            np.bitwise_xor(out, s, out=out)
+        elif c:
+            np.take(_pair_table(c), s[:even].view(np.uint16), out=tmp[:even].view(np.uint16))
+            tmp[even:] = MUL[c][s[even:]]
+            np.bitwise_xor(out, tmp, out=out)
+    return out
+
+
+class ReedSolomon:
+    """Systematic k+m Reed-Solomon code over GF(256).
+
+    The ``m`` parity shards are a Cauchy matrix times the ``k`` data shards,
+    so any ``k`` of the ``k + m`` shards recover the rest.  Columns are
+    scaled so the first parity row is all ones: parity shard 0 is the plain
+    XOR of the data, identical to ``parity.xor_chunks``.
+    """
+
+    def __init__(self, k: int, m: int):
+        if k < 1 or m < 1 or k + m > 256:
+            raise ValueError('need k >= 1, m >= 1 and k + m <= 256')
+        self.k, self.m = k, m
+        cauchy = [[gf_inv((k + i) ^ j) for j in range(k)] for i in range(m)]
+        scale = [gf_inv(c) for c in cauchy[0]]
+        self.matrix = [[gf_mul(c, s) for c, s in zip(row, scale)] for row in cauchy]
+
+    def row(self, i: int) -> List[int]:
+        """Generator row of shard ``i`` (data shards first, then parity)."""
+        if i < self.k:
+            return [int(i == j) for j in range(self.k)]
+        return self.matrix[i - self.k]
+
+    def recovery(self, present: Sequence[int], lost: Sequence[int]):
+        """Pick ``k`` of the ``present`` shards and the coefficients that
+        rebuild each ``lost`` shard from them; returns ``(used, rows)``."""
+        if len(present) < self.k:
+            raise ValueError(f'{len(lost)} shards lost, at most {self.m} are recoverable')
+        used = sorted(present)[:self.k]
+        inv = _invert([self.row(i) for i in used])
+        rows = []
+        for i in lost:
+            g = self.row(i)
+            coefs = []
+            for c in range(self.k):
+                v = 0
+                for j in range(self.k):
+                    v ^= gf_mul(g[j], inv[j][c])
+                coefs.append(v)
+            rows.append(coefs)
+        return used, rows
+
+    def encode(self, data: Sequence[bytes]) -> List[bytes]:
+        """Return the ``m`` parity shards of ``k`` data shards.
+
+        Shorter shards count as zero-padded to the longest.
+        """
+        if len(data) != self.k:
+            raise ValueError(f'expected {self.k} data shards')
+        arrs = _pad(data)
+        out = []
+        for coefs in self.matrix:
+            out.append(_combine(coefs, arrs, np.empty_like(arrs[0]), np.empty_like(arrs[0])).tobytes())
+        return out
+
+    def decode(self, shards: Sequence[Optional[bytes]]) -> List[bytes]:
+        """Fill in the missing (None) entries of ``k + m`` shards."""
+        if len(shards) != self.k + self.m:
+            raise ValueError(f'expected {self.k + self.m} shards')
+        present = [i for i, s in enumerate(shards) if s is not None]
+        lost = [i for i, s in enumerate(shards) if s is None]
+        used, rows = self.recovery(present, lost)
+        arrs = _pad([shards[i] for i in used])
+        out = list(shards)
+        for i, coefs in zip(lost, rows):
+            out[i] = _combine(coefs, arrs, np.empty_like(arrs[0]), np.empty_like(arrs[0])).tobytes()
+        return out
+
+
+def _pad(bufs: Sequence[bytes]) -> List[np.ndarray]:
+    size = max(len(b) for b in bufs)
+    arrs = []
+    for b in bufs:
+        a = np.zeros(size, dtype=np.uint8)
+        a[:len(b)] = np.frombuffer(b, dtype=np.uint8)
+        arrs.append(a)
+    return arrs
+
+
+def _stream(sources: Sequence[str], rows: Sequence[Sequence[int]], outs: Sequence[str],
+            window: int = WINDOW) -> List[int]:
+    """Write ``outs[i] = rows[i] · sources`` through mmap windows.
+
+    Shorter sources count as zero-padded; outputs are as long as the
+    longest source and are written aside, fsynced and renamed into place.
+    Returns the crc32 of each output.
+    """
+    crcs = [0] * len(outs)
+    maps, files, dsts, views = [], [], [], []
+    try:
+        for path in sources:
+            f = open(path, 'rb')
+            files.append(f)
+            size = os.fstat(f.fileno()).st_size
+            maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b'')
+        size = max((len(m) for m in maps), default=0)
+        src = [np.empty(window, dtype=np.uint8) for _ in maps]
+        acc = np.empty(window, dtype=np.uint8)
+        tmp = np.empty(window, dtype=np.uint8)
+        dsts = [open(out + '.tmp', 'wb') for out in outs]
+        for lo in range(0, size, window):
+            n = min(window, size - lo)
+            views = []
+            for m, buf in zip(maps, src):
+                have = max(0, min(n, len(m) - lo))
+                if have == n:
+                    views.append(np.frombuffer(m, dtype=np.uint8, count=n, offset=lo))
+                else:
+                    buf[:have] = np.frombuffer(m, dtype=np.uint8, count=have, offset=lo) if have else 0
+                    buf[have:n] = 0
+                    views.append(buf[:n])
+            for j, (coefs, dst) in enumerate(zip(rows, dsts)):
+                out = memoryview(_combine(coefs, views, acc[:n], tmp[:n]))
+                crcs[j] = zlib.crc32(out, crcs[j])
+                dst.write(out)
+        for dst in dsts:
+            dst.flush()
+            os.fsync(dst.fileno())
+            dst.close()
+        for out in outs:
+            os.replace(out + '.tmp', out)
+        return crcs
+    finally:
+        views = None                  # release mmap exports before closing
+        for dst in dsts:
+            dst.close()
+        for m in maps:
+            if m:
+                m.close()
+        for f in files:
+            f.close()
+
+
+def encode_files(rs: ReedSolomon, sources: Sequence[str], outs: Sequence[str],
+                 window: int = WINDOW) -> List[int]:
+    """Stream the ``m`` parity files of ``k`` data files; returns their crc32s."""
+    if len(sources) != rs.k or len(outs) != rs.m:
+        raise ValueError(f'expected {rs.k} sources and {rs.m} outputs')
+    return _stream(sources, rs.matrix, outs, window)
+
+
+def decode_files(rs: ReedSolomon, shards: Sequence[str], lost: Sequence[int],
+                 targets: Optional[Sequence[int]] = None, window: int = WINDOW) -> List[int]:
+    """Rebuild ``shards[i]`` from the other shard files for each ``i`` in
+    ``targets`` (default: all of ``lost``); returns their crc32s.
+
+    ``shards`` lists the ``k`` data then ``m`` parity file paths of a group;
+    shards in ``lost`` are never read.
+    """
+    if len(shards) != rs.k + rs.m:
+        raise ValueError(f'expected {rs.k + rs.m} shards')
+    lost = sorted(set(lost))
+    targets = lost if targets is None else sorted(set(targets))
+    if not set(targets) <= set(lost):
+        raise ValueError('targets must be lost shards')
+    present = [i for i in range(len(shards)) if i not in lost]
+    used, rows = rs.recovery(present, targets)
+    return _stream([shards[i] for i in used], rows, [shards[i] for i in targets], window)
@@ -1,23 +1,242 @@
+import mmap
 import os
 import pickle
-from typing import Tuple, Optional
+import struct
+import zlib
+from typing import Iterable, Iterator, Tuple, Optional
 
+import numpy as np
 
-class MetaIndex:
-    """Very small meta index mapping seed hash to (chunk_path, offset)."""
+COMPACT_EVERY = 1 << 16        # log records before the snapshot is rewritten
+SNAP_MAGIC = b'HVMIDX01'
+_HEAD = struct.Struct('<8sQ')  # magic, record count
+_TAIL = struct.Struct('<Q')    # offset of the record offset table
+_FRAME = struct.Struct('<II')  # payload length, crc32
+_REC = struct.Struct('<HHQ')   # key length, path length, chunk offset
+
+Location = Tuple[str, int]
+
+
+def _encode(key: bytes, loc: Location) -> bytes:
+    path = loc[0].encode()
+    return _REC.pack(len(key), len(path), loc[1]) + key + path
+
+
+def _decode(buf, pos: int = 0):
+    if pos + _REC.size > len(buf):
+        raise ValueError('truncated MetaIndex record')
+    klen, plen, off = _REC.unpack_from(buf, pos)
+    pos += _REC.size
+    if pos + klen + plen > len(buf):
+        raise ValueError('truncated MetaIndex record')
+    key = bytes(buf[pos:pos + klen])
+    path = bytes(buf[pos + klen:pos + klen + plen]).decode()
+    return key, (path, off)
+
+
+class _NotSnapshot(ValueError):
+    pass
+
+
+class _Snapshot:
+    """Read side of a sorted snapshot: binary search over an mmap."""
 
     def __init__(self, path: str):
+        self.n = 0
+        self.mm = None
+        if not os.path.exists(path) or not os.path.getsize(path):
+            return
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self.mm)
+        if size < _HEAD.size or self.mm[:len(SNAP_MAGIC)] != SNAP_MAGIC:
+            self.close()
+            raise _NotSnapshot('not a MetaIndex snapshot')
+        _, self.n = _HEAD.unpack_from(self.mm, 0)
+        table = _TAIL.unpack_from(self.mm, size - _TAIL.size)[0] if size >= _HEAD.size + _TAIL.size else 0
+        if table < _HEAD.size or table + 8 * self.n + _TAIL.size != size:
+            self.close()
+            raise ValueError('truncated MetaIndex snapshot')
+        self.offsets = np.frombuffer(self.mm, dtype='<u8', count=self.n, offset=table)
+        if self.n and (self.offsets.min() < _HEAD.size or self.offsets.max() + _REC.size > table):
+            self.close()
+            raise ValueError('corrupt MetaIndex snapshot offsets')
+
+    def _key(self, i: int) -> bytes:
+        pos = int(self.offsets[i])
+        klen = struct.unpack_from('<H', self.mm, pos)[0]
+        return self.mm[pos + _REC.size:pos + _REC.size + klen]
+
+    def get(self, key: bytes) -> Optional[Location]:
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n and self._key(lo) == key:
+            return _decode(self.mm, int(self.offsets[lo]))[1]
+        return None
+
+    def items(self) -> Iterator[Tuple[bytes, Location]]:
+        for i in range(self.n):
+            yield _decode(self.mm, int(self.offsets[i]))
+
+    def close(self) -> None:
+        if self.mm is not None:
+            self.offsets = None
+            self.mm.close()
+            self.mm = None
+
+
+def _merge(old: Iterable, new: Iterable) -> Iterator[Tuple[bytes, Location]]:
+    """Merge two key-sorted item streams; ``new`` wins on equal keys."""
+    old, new = iter(old), iter(new)
+    a, b = next(old, None), next(new, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield a
+            a = next(old, None)
+        else:
+            if a is not None and a[0] == b[0]:
+                a = next(old, None)
+            yield b
+            b = next(new, None)
+
+
+class MetaIndex:
+    """Meta index mapping seed hash to (chunk_path, offset).
+
+    Puts are appended to ``<path>.log`` as length + CRC32 framed records;
+    every ``compact_every`` records the log is folded into a key-sorted
+    snapshot at ``path`` (written aside, then renamed) and truncated.
+    Reopening loads the snapshot and replays the log up to its first torn
+    or corrupt frame.
+
+    With ``resident=False`` only records logged since the last snapshot
+    are kept in memory; other lookups binary-search the mmapped snapshot.
+    """
+
+    def __init__(self, path: str, resident: bool = True, compact_every: int = COMPACT_EVERY,
+                 sync: bool = False):
         self.path = path
+        self.log_path = path + '.log'
+        self.resident = resident
+        self.compact_every = compact_every
+        self.sync = sync
+        self._index = {}             # resident: everything; else: since the snapshot
+        self._logged = 0             # records in the log
+        self._snap = self._open_snapshot()
+        if resident:
+            self._index.update(self._snap.items())
+        self._replay()
+        self._log = open(self.log_path, 'ab')
+
+    def put(self, seed_hash: bytes, location: Location) -> None:
+        self.put_many([(seed_hash, location)])
+
+    def put_many(self, items: Iterable[Tuple[bytes, Location]]) -> None:
+        """Log several entries with one write (and one fsync with ``sync``)."""
+        frames = []
+        for key, loc in items:
+            key, loc = bytes(key), (str(loc[0]), int(loc[1]))
+            payload = _encode(key, loc)
+            frames.append(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._index[key] = loc
+        if not frames:
+            return
+        self._log.write(b''.join(frames))
+        self._log.flush()
+        if self.sync:
+            os.fsync(self._log.fileno())
+        self._logged += len(frames)
+        if self._logged >= self.compact_every:
+            self.compact()
+
+    def get(self, seed_hash: bytes) -> Optional[Location]:
+        loc = self._index.get(seed_hash)
+        if loc is None and not self.resident:
+            loc = self._snap.get(bytes(seed_hash))
+        return loc
+
+    def flush(self) -> None:
+        """Make every logged put durable."""
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def compact(self) -> None:
+        """Fold the log into a new snapshot and truncate it."""
+        if self.resident:
+            items = sorted(self._index.items())
+        else:
+            items = _merge(self._snap.items(), sorted(self._index.items()))
+        self._write_snapshot(items)
+        self._snap.close()
+        self._snap = _Snapshot(self.path)
+        if not self.resident:
+            self._index.clear()
+        self._log.truncate(0)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._logged = 0
+
+    def close(self) -> None:
+        self._log.close()
+        self._snap.close()
+
+    # ------------------------------------------------------------
+    def _open_snapshot(self) -> _Snapshot:
         try:
-            with open(self.path, 'rb') as f:
-                self._index = pickle.load(f)
-        except Exception:
-            self._index = {}
-
-    def put(self, seed_hash: bytes, location: Tuple[str, int]) -> None:
-        self._index[seed_hash] = location
-        with open(self.path, 'wb') as f:
-            pickle.dump(self._index, f)
-
-    def get(self, seed_hash: bytes) -> Optional[Tuple[str, int]]:
-        return self._index.get(seed_hash)
+            return _Snapshot(self.path)
+        except _NotSnapshot:
+            pass
+        with open(self.path, 'rb') as f:     # legacy whole-dict pickle
+            try:
+                legacy = pickle.load(f)
+            except (pickle.UnpicklingError, EOFError) as e:
+                raise ValueError(f'corrupt legacy MetaIndex pickle: {e}') from None
+        items = sorted((bytes(k), (str(v[0]), int(v[1]))) for k, v in legacy.items())
+        self._write_snapshot(items)
+        return _Snapshot(self.path)
+
+    def _write_snapshot(self, items: Iterable[Tuple[bytes, Location]]) -> None:
+        tmp = self.path + '.tmp'
+        offsets = []
+        with open(tmp, 'wb') as f:
+            f.write(_HEAD.pack(SNAP_MAGIC, 0))
+            pos = _HEAD.size
+            for key, loc in items:
+                rec = _encode(key, loc)
+                offsets.append(pos)
+                f.write(rec)
+                pos += len(rec)
+            f.write(np.asarray(offsets, dtype='<u8').tobytes())
+            f.write(_TAIL.pack(pos))
+            f.seek(0)
+            f.write(_HEAD.pack(SNAP_MAGIC, len(offsets)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb') as f:
+            data = f.read()
+        pos = 0
+        while pos + _FRAME.size <= len(data):
+            length, crc = _FRAME.unpack_from(data, pos)
+            payload = data[pos + _FRAME.size:pos + _FRAME.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            try:
+                key, loc = _decode(payload)
+            except ValueError:
+                break
+            self._index[key] = loc
+            self._logged += 1
+            pos += _FRAME.size + length
+        if pos < len(data):
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(pos)
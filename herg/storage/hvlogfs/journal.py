@@ -1,17 +1,171 @@
+import logging
 import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from typing import Iterator, Tuple
+
+log = logging.getLogger(__name__)
+
+MAX_DELAY = 0.0          # seconds the committer waits for a batch to fill
+MAX_BATCH = 1 << 20      # bytes of framed records per group commit
+ASIDE = '.unframed'      # suffix for a file that does not start with a valid frame
+_FRAME = struct.Struct('<II')    # payload length, crc32
+
+
+def frame(data: bytes) -> bytes:
+    return _FRAME.pack(len(data), zlib.crc32(data)) + data
+
+
+def iter_records(path: str, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, payload)`` for each intact record from ``start``.
+
+    Stops at the first torn or corrupt frame.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        f.seek(start)
+        pos = start
+        while True:
+            head = f.read(_FRAME.size)
+            if len(head) < _FRAME.size:
+                return
+            length, crc = _FRAME.unpack(head)
+            data = f.read(length)
+            if len(data) != length or zlib.crc32(data) != crc:
+                return
+            yield pos, data
+            pos += _FRAME.size + length
+
+
+def valid_end(path: str, start: int = 0) -> int:
+    """Offset just past the last intact record."""
+    end = start
+    for pos, data in iter_records(path, start):
+        end = pos + _FRAME.size + len(data)
+    return end
 
 
 class WriteAheadJournal:
-    """Append-only journal for durability."""
+    """Append-only journal for durability, with group commit.
+
+    Appenders enqueue length + CRC32 framed records; a committer thread
+    writes everything queued (up to ``max_batch`` bytes) with one write and
+    one fsync, waiting up to ``max_delay`` seconds for more records first.
+    With the default delay of 0 batches form from the records that arrive
+    while the previous fsync is in flight.  ``submit`` returns a future
+    that resolves to the record's journal offset once it is durable;
+    ``append`` blocks on it.  A torn tail left by a crash is truncated on
+    open.  Any exception in the committer (a failed write or fsync, say)
+    fails its batch and every later record: the journal must be reopened
+    (which re-checks the tail) to continue.
 
-    def __init__(self, path: str):
+    A non-empty file without a valid first frame (such as a journal from
+    before framing, which wrote newline-terminated records) is not
+    truncated but renamed to ``<path>.unframed`` and a new journal started;
+    if that name is taken, opening raises ValueError.
+    """
+
+    def __init__(self, path: str, max_delay: float = MAX_DELAY, max_batch: int = MAX_BATCH):
         self.path = path
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        end = valid_end(path)
+        if end == 0 and os.path.exists(path) and os.path.getsize(path):
+            self._set_aside()
         self.f = open(path, 'ab')
+        if end < self.f.tell():
+            log.warning('%s: truncating torn journal tail at %d', path, end)
+            self.f.truncate(end)
+            self.f.seek(end)
+        self.size = end              # bytes durable or queued
+        self.records = 0             # records committed by this instance
+        self.commits = 0             # fsyncs issued
+        self._queue = []             # (frame, future, offset)
+        self._queued = 0             # bytes in _queue
+        self._closed = False
+        self._error = None
+        self._cv = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='wal-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, data: bytes) -> Future:
+        """Queue a record; the future resolves to its offset when durable."""
+        fut = Future()
+        rec = frame(data)
+        with self._cv:
+            if self._closed:
+                raise ValueError('journal is closed')
+            if self._error is not None:
+                raise self._error
+            self._queue.append((rec, fut, self.size))
+            self._queued += len(rec)
+            self.size += len(rec)
+            self._cv.notify()
+        return fut
 
     def append(self, data: bytes) -> None:
-        self.f.write(data + b"\n")
-        self.f.flush()
-        os.fsync(self.f.fileno())
+        self.submit(data).result()
 
     def close(self) -> None:
+        """Commit everything queued, stop the committer and close the file."""
+        with self._cv:
+            if self._closed:
+                return
+            self._closed = True
+            self._cv.notify()
+        self._thread.join()
         self.f.close()
+
+    # ------------------------------------------------------------
+    def _set_aside(self) -> None:
+        aside = self.path + ASIDE
+        if os.path.exists(aside):
+            raise ValueError(f'{self.path} has no valid framed record and {aside} exists')
+        os.replace(self.path, aside)
+        log.warning('%s: no valid framed record at the start; moved to %s', self.path, aside)
+
+    def _take(self):
+        with self._cv:
+            while not self._queue and not self._closed:
+                self._cv.wait()
+            if self.max_delay and not self._closed:
+                deadline = time.monotonic() + self.max_delay
+                while self._queued < self.max_batch and not self._closed:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    self._cv.wait(left)
+            n, size = 0, 0
+            while n < len(self._queue) and (n == 0 or size + len(self._queue[n][0]) <= self.max_batch):
+                size += len(self._queue[n][0])
+                n += 1
+            batch, self._queue = self._queue[:n], self._queue[n:]
+            self._queued -= size
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take()
+            if not batch:
+                return               # closed and drained
+            try:
+                self.f.write(b''.join(rec for rec, _, _ in batch))
+                self.f.flush()
+                os.fsync(self.f.fileno())
+            except BaseException as e:       # any escape would strand the waiters
+                log.error('%s: journal commit failed: %r', self.path, e)
+                with self._cv:
+                    self._error = e
+                    batch += self._queue
+                    self._queue, self._queued = [], 0
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            self.commits += 1
+            self.records += len(batch)
+            for _, fut, off in batch:
+                fut.set_result(off)
@@ -0,0 +1,474 @@
+import heapq
+import json
+import logging
+import os
+import re
+import time
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+
+from .chunk import HyperChunk, ChecksumError, VECTOR_SIZE, ENTRY_SIZE, CHUNK_SIZE
+from .mem import Capsule
+
+log = logging.getLogger(__name__)
+
+CAPACITY = (CHUNK_SIZE - 64) // ENTRY_SIZE      # entries per chunk file
+DATA_OPEN, DATA_CLOSED = ".chk", ".closed"
+META_OPEN, META_CLOSED = ".meta", ".meta.closed"
+DEFAULT_STEM = "chunk"                           # file prefix of the "" stream
+QUARANTINE = "quarantine"                        # subdirectory for unreadable segments
+_STEM = re.compile(r"([\w-]+)-(\d{8})(?:-w([0-9a-f]{8}))?$")   # untagged stems predate writer tags
+_PREFIX = re.compile(r"[\w-]*")
+_WRITER = re.compile(r"[0-9a-f]{8}")
+
+
+def _json_default(o):
+    if hasattr(o, "tolist"):        # numpy scalars / arrays in meta
+        return o.tolist()
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+
+def _parse(line: bytes):
+    """Sidecar record, or None for a torn / garbled line."""
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _stem_prefix(stem: str) -> str:
+    p = _STEM.match(stem)[1]
+    return "" if p == DEFAULT_STEM else p
+
+
+def _closed_exists(dir: Path, stem: str) -> bool:
+    return (dir / (stem + DATA_CLOSED)).exists() or (dir / (stem + META_CLOSED)).exists()
+
+
+class _Segment:
+    """A chunk file plus its sidecar log; only the LSN range stays resident."""
+
+    __slots__ = ("dir", "stem", "closed", "lo", "hi", "caps")
+
+    def __init__(self, dir: Path, stem: str, closed: bool = False):
+        self.dir = dir
+        self.stem = stem
+        self.closed = closed
+        self.lo = 0          # first / last LSN logged in this segment
+        self.hi = 0
+        self.caps = 0        # capsule records (tombstones excluded)
+
+    @property
+    def data(self) -> Path:
+        return self.dir / (self.stem + (DATA_CLOSED if self.closed else DATA_OPEN))
+
+    @property
+    def meta(self) -> Path:
+        return self.dir / (self.stem + (META_CLOSED if self.closed else META_OPEN))
+
+    def note(self, lsn: int, is_cap: bool) -> None:
+        self.lo = self.lo or lsn
+        self.hi = lsn
+        self.caps += is_cap
+
+
+class _Stream:
+    """The segments of one shard prefix; the last one may be open for append."""
+
+    def __init__(self, dir: Path, prefix: str, writer: str):
+        self.dir = dir
+        self.prefix = prefix
+        self.writer = writer
+        self.segs: list[_Segment] = []
+        self.chunk = None            # HyperChunk of the open segment
+        self.side = None             # its sidecar file
+
+    def next_stem(self) -> str:
+        """``<prefix>-<seq>-w<writer>`` one past the highest seq known here."""
+        seq = max((int(_STEM.match(g.stem)[2]) + 1 for g in self.segs), default=0)
+        return f"{self.prefix or DEFAULT_STEM}-{seq:08d}-w{self.writer}"
+
+    def new_segment(self) -> _Segment:
+        seg = _Segment(self.dir, self.next_stem())
+        self.segs.append(seg)
+        return seg
+
+    def add_closed(self, seg: _Segment) -> None:
+        """Insert a closed segment in sequence order, keeping the open one last."""
+        open_ = [self.segs.pop()] if self.segs and not self.segs[-1].closed else []
+        self.segs.append(seg)
+        self.segs.sort(key=lambda g: g.stem)
+        self.segs += open_
+
+    def close(self) -> None:
+        if self.chunk is None:
+            return
+        self.chunk.close()
+        self.side.close()
+        self.chunk = self.side = None
+
+
+class LogChunk:
+    """Chunk handle for maintenance jobs (sweeper, compaction)."""
+
+    def __init__(self, fs: "HVLogFS", seg: _Segment):
+        self._fs = fs
+        self._seg = seg
+
+    @property
+    def path(self) -> Path:
+        return self._seg.data
+
+    @property
+    def prefix(self) -> str:
+        return _stem_prefix(self._seg.stem)
+
+    def capsules(self):
+        return self._fs._read(self._seg, 0, self._fs.lsn)
+
+    def tombstone(self, cap_id: int):
+        self._fs.tombstone(cap_id, self.prefix)
+
+    def flush(self):
+        self._fs.flush()
+
+    def is_closed(self):
+        return self._seg.closed
+
+
+class HVLogFS:
+    """Log-structured capsule store over rotating HyperChunk files.
+
+    A capsule's ``mu`` is stored as raw bytes over one or more chunk entries
+    (the last zero-padded); a JSON line in the chunk's sidecar ``.meta`` log
+    records its LSN, prefix, id, entry range, dtype, shape and meta.
+    Tombstones are sidecar-only records.
+
+    Each shard prefix has its own segment stream, ``<prefix>-<seq>-w<writer>.chk``
+    (``chunk-...`` for the empty prefix), so the files a shard owns are
+    exactly those ``replicator.hydrate_prefix`` lists and
+    ``iter_capsules(prefix)`` opens nothing else.  ``writer`` (8 hex digits,
+    random per instance by default) keeps segments written by different
+    nodes from sharing a name.  When a record no longer fits, the open chunk
+    and its sidecar are closed and renamed to ``<stem>.closed`` /
+    ``<stem>.meta.closed`` for the replicator; sealing never replaces an
+    existing closed file: the open segment is renamed to a fresh stem
+    first.  LSNs are global across prefixes.
+
+    Only per-chunk LSN ranges and the tombstone list stay in memory;
+    ``iter_capsules`` maps one chunk per prefix at a time.  Reopening a
+    directory resumes each prefix's open chunk, dropping sidecar records
+    that were torn or point past the chunk's flushed entries; an open chunk
+    that fails its header or CRC check is moved with its sidecar to
+    ``quarantine/`` and the prefix continues in a new segment.  A closed
+    chunk is checked when it is first read and quarantined the same way;
+    readers skip it and go on with the other segments.  There is
+    no write-ahead journal here: ``VectorStore`` is the journaled store.
+    """
+
+    def __init__(self, path: str, flush_every: int | None = 1, sync: bool = False,
+                 writer: str | None = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.sync = sync
+        self.writer = os.urandom(4).hex() if writer is None else writer
+        if not _WRITER.fullmatch(self.writer):
+            raise ValueError(f"writer must be 8 lowercase hex digits, got {self.writer!r}")
+        self.lsn = 0                 # sequence number of the last record
+        self._streams: dict[str, _Stream] = {}
+        self._tombs = []             # (lsn, cap_id), increasing
+        self._dead = {}              # cap_id -> LSN of its latest tombstone
+        self._recover()
+
+    # ------------------------------------------------------------------ #
+    def append_cap(self, prefix: str, cap_id: int, mu, meta: dict) -> None:
+        arr = np.ascontiguousarray(mu)
+        raw = arr.reshape(-1).view(np.uint8)
+        n = max(1, -(-raw.size // VECTOR_SIZE))
+        if n > CAPACITY:
+            raise ValueError(f"capsule of {raw.size} bytes exceeds a chunk")
+        buf = np.zeros((n, VECTOR_SIZE), dtype=np.uint8)
+        buf.reshape(-1)[:raw.size] = raw
+        stream = self._stream(prefix)
+        chunk = self._writer(stream, n)
+        lsn = self.lsn + 1
+        line = self._dumps({"lsn": lsn, "op": "cap", "prefix": prefix, "id": int(cap_id),
+                            "row": chunk.count, "n": n, "dtype": arr.dtype.str,
+                            "shape": list(arr.shape), "meta": meta or {}})
+        chunk.append([memoryview(r) for r in buf])
+        self._log(stream, line, lsn, True)
+
+    def tombstone(self, cap_id: int, prefix: str = "") -> None:
+        """Log a tombstone for cap_id in ``prefix``'s stream.
+
+        A tombstone applies whatever prefix it is logged under: earlier
+        records of cap_id read back inactive.
+        """
+        stream = self._stream(prefix)
+        self._writer(stream, 0)
+        lsn = self.lsn + 1
+        self._log(stream, self._dumps({"lsn": lsn, "op": "tomb", "id": int(cap_id)}), lsn, False)
+        self._tombs.append((lsn, int(cap_id)))
+        self._dead[int(cap_id)] = lsn
+
+    def iter_capsules(self, prefix: str = "", since: int = 0):
+        """Yield capsules in log order, skipping records with lsn <= since.
+
+        With a prefix only that prefix's segments are read; without one
+        the per-prefix streams are merged by LSN.  Records appended while
+        iterating are not included.
+        """
+        stop = self.lsn
+        if prefix:
+            stream = self._streams.get(prefix)
+            if stream is not None:
+                yield from self._iter_stream(stream, since, stop)
+            return
+        its = [self._iter_stream(s, since, stop) for s in list(self._streams.values())]
+        yield from heapq.merge(*its, key=lambda c: c.lsn)
+
+    def iter_tombstones(self, since: int = 0):
+        """Yield ``(lsn, cap_id)`` for tombstones logged after ``since``."""
+        start = bisect_right(self._tombs, (since, float("inf")))
+        yield from self._tombs[start:]
+
+    def refresh(self) -> list[LogChunk]:
+        """Pick up closed segments that appeared on disk since opening
+        (e.g. fetched by ``replicator.hydrate_prefix``); returns their handles.
+
+        A segment is taken once both its chunk and sidecar are present.  Its
+        records keep the LSNs they were logged with, which may lie below
+        ``lsn``, so a reader tracking a high-water mark should read the
+        returned chunks in full; ``lsn`` moves past them for new appends.
+        A closed segment that arrives under the name of a local open one
+        moves the open segment to a fresh stem rather than being ignored.
+        """
+        known = {g.stem: g for s in self._streams.values() for g in s.segs}
+        new = []
+        for p in sorted(self.path.glob("*" + DATA_CLOSED)):
+            stem = p.name[:-len(DATA_CLOSED)]
+            if p.name.endswith(META_CLOSED) or not _STEM.match(stem):
+                continue
+            seg = _Segment(self.path, stem, closed=True)
+            if not seg.meta.exists():
+                continue                 # sidecar still arriving
+            mine = known.get(stem)
+            if mine is not None:
+                if mine.closed:
+                    continue
+                self._rename_open(self._streams[_stem_prefix(stem)])
+            self._scan(seg)
+            self._stream(_stem_prefix(stem)).add_closed(seg)
+            new.append(seg)
+        if new:
+            self._tombs.sort()
+            log.info("%s: picked up %d new segments", self.path, len(new))
+        return [LogChunk(self, g) for g in new]
+
+    def prefixes(self) -> list[str]:
+        return sorted(self._streams)
+
+    def chunks(self, active_only: bool = True):
+        """Chunk handles in LSN order; ``active_only`` skips tombstone-only chunks."""
+        segs = [g for s in self._streams.values() for g in s.segs if g.caps or not active_only]
+        return [LogChunk(self, g) for g in sorted(segs, key=lambda g: g.lo)]
+
+    def flush(self) -> None:
+        for stream in self._streams.values():
+            if stream.chunk is None:
+                continue
+            stream.chunk.flush()
+            stream.side.flush()
+            if self.sync:
+                os.fsync(stream.side.fileno())
+
+    def close(self) -> None:
+        """Flush and release the open chunks; they stay open on disk for reuse."""
+        for stream in self._streams.values():
+            stream.close()
+
+    # ------------------------------------------------------------------ #
+    def _stream(self, prefix: str) -> _Stream:
+        stream = self._streams.get(prefix)
+        if stream is None:
+            if not _PREFIX.fullmatch(prefix) or prefix == DEFAULT_STEM:
+                raise ValueError(f"invalid shard prefix {prefix!r}")
+            stream = self._streams[prefix] = _Stream(self.path, prefix, self.writer)
+        return stream
+
+    def _dumps(self, rec: dict) -> bytes:
+        return json.dumps(rec, separators=(",", ":"), default=_json_default).encode() + b"\n"
+
+    def _log(self, stream: _Stream, line: bytes, lsn: int, is_cap: bool) -> None:
+        stream.side.write(line)
+        stream.side.flush()
+        if self.sync:
+            os.fsync(stream.side.fileno())
+        stream.segs[-1].note(lsn, is_cap)
+        self.lsn = lsn
+
+    def _writer(self, stream: _Stream, n: int) -> HyperChunk:
+        """The stream's open chunk, rotated first if ``n`` more entries do not fit."""
+        if stream.chunk is not None and stream.chunk.count + n > CAPACITY:
+            self._seal(stream)
+        if stream.chunk is None:
+            segs = stream.segs
+            seg = segs[-1] if segs and not segs[-1].closed else stream.new_segment()
+            stream.chunk = HyperChunk(str(seg.data), flush_every=self.flush_every)
+            stream.side = open(seg.meta, "ab")
+        return stream.chunk
+
+    def _seal(self, stream: _Stream) -> None:
+        """Close the open chunk and rename it and its sidecar to ``*.closed``."""
+        seg = stream.segs[-1]
+        if self.sync:
+            os.fsync(stream.side.fileno())
+        if _closed_exists(seg.dir, seg.stem):
+            self._rename_open(stream)    # never replace a segment fetched from elsewhere
+        stream.close()
+        os.replace(seg.meta, seg.dir / (seg.stem + META_CLOSED))
+        os.replace(seg.data, seg.dir / (seg.stem + DATA_CLOSED))
+        seg.closed = True
+
+    def _rename_open(self, stream: _Stream) -> None:
+        """Move the stream's open segment to a fresh stem of this writer."""
+        seg = stream.segs[-1]
+        stem = stream.next_stem()
+        if _closed_exists(seg.dir, stem) or (seg.dir / (stem + DATA_OPEN)).exists():
+            raise FileExistsError(f"{stem}: segment name already taken")
+        stream.close()
+        for old, new in ((seg.meta, stem + META_OPEN), (seg.data, stem + DATA_OPEN)):
+            if old.exists():
+                os.replace(old, seg.dir / new)
+        log.warning("%s: name taken by another segment; continuing as %s", seg.stem, stem)
+        seg.stem = stem
+
+    def _iter_stream(self, stream: _Stream, since: int, stop: int):
+        for seg in list(stream.segs):
+            if seg.hi <= since or not seg.caps:
+                continue
+            if seg.lo > stop:
+                continue
+            yield from self._read(seg, since, stop)
+
+    def _read(self, seg: _Segment, since: int, stop: int):
+        if not seg.closed:
+            self.flush()                 # header must cover every logged entry
+        try:
+            chunk = HyperChunk(str(seg.data), "rb")
+        except (ChecksumError, ValueError) as e:
+            if not seg.closed:
+                raise
+            self._quarantine(self._streams[_stem_prefix(seg.stem)], seg, e)
+            return
+        M = chunk.as_matrix()
+        rows = None
+        try:
+            with open(seg.meta, "rb") as f:
+                for line in f:
+                    rec = _parse(line)
+                    if rec is None or rec["lsn"] > stop:
+                        break
+                    if rec["op"] != "cap" or rec["lsn"] <= since:
+                        continue
+                    rows = M[rec["row"]:rec["row"] + rec["n"]]
+                    yield self._capsule(seg, rec, rows)
+        finally:
+            M = rows = None
+            chunk.close()
+
+    def _capsule(self, seg: _Segment, rec: dict, rows: np.ndarray) -> Capsule:
+        dtype = np.dtype(rec["dtype"])
+        shape = tuple(rec["shape"])
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        mu = np.array(rows).reshape(-1)[:nbytes].view(dtype).reshape(shape)   # copy off the map
+        cap = Capsule(rec["id"], mu, rec["meta"], rec["lsn"])
+        cap.chunk = seg.stem
+        cap.active = self._dead.get(cap.id_int, 0) < cap.lsn
+        return cap
+
+    # ------------------------------------------------------------------ #
+    def _recover(self) -> None:
+        opened, closed = set(), set()
+        for p in self.path.iterdir():
+            if p.name.endswith(DATA_OPEN):
+                opened.add(p.name[:-len(DATA_OPEN)])
+            elif p.name.endswith(DATA_CLOSED) and not p.name.endswith(META_CLOSED):
+                closed.add(p.name[:-len(DATA_CLOSED)])
+        # closed segments in stem order, then open ones: the last open one is live
+        stems = sorted((stem in opened and stem not in closed, stem)
+                       for stem in opened | closed if _STEM.match(stem))
+        for is_open, stem in stems:
+            self._stream(_stem_prefix(stem)).segs.append(_Segment(self.path, stem, not is_open))
+        for stem in sorted(opened & closed):
+            # an open segment whose name a fetched closed one took: keep both
+            stream = self._stream(_stem_prefix(stem))
+            stream.segs.append(_Segment(self.path, stem))
+            self._rename_open(stream)
+        for stream in self._streams.values():
+            self._recover_stream(stream)
+        self._tombs.sort()
+
+    def _recover_stream(self, stream: _Stream) -> None:
+        for i, seg in enumerate(stream.segs):
+            last = i == len(stream.segs) - 1
+            if not seg.closed and (not last or (seg.dir / (seg.stem + META_CLOSED)).exists()):
+                self._finish_seal(seg)     # crashed mid-rotation
+            if seg.closed:
+                self._scan(seg)
+                continue
+            try:
+                self._writer(stream, 0)
+            except (ChecksumError, ValueError) as e:
+                self._quarantine(stream, seg, e)
+                continue
+            good = self._scan(seg, stream.chunk.count)
+            if good < stream.side.tell():
+                log.warning("%s: dropping torn sidecar tail", seg.meta.name)
+                stream.side.truncate(good)
+                stream.side.seek(good)
+
+    def _quarantine(self, stream: _Stream, seg: _Segment, err: Exception) -> None:
+        """Move a segment whose chunk cannot be opened out of the log."""
+        qdir = self.path / QUARANTINE
+        qdir.mkdir(exist_ok=True)
+        tag = time.time_ns()
+        for p in (seg.data, seg.meta):
+            if p.exists():
+                os.replace(p, qdir / f"{p.name}.{tag}")
+        stream.segs.remove(seg)
+        log.error("%s: %s; moved to %s/", seg.data.name, err, QUARANTINE)
+
+    def _finish_seal(self, seg: _Segment) -> None:
+        for open_, closed in ((META_OPEN, META_CLOSED), (DATA_OPEN, DATA_CLOSED)):
+            src, dst = seg.dir / (seg.stem + open_), seg.dir / (seg.stem + closed)
+            if src.exists():
+                if open_ == DATA_OPEN and dst.exists():
+                    raise FileExistsError(f"{dst.name} already exists")
+                os.replace(src, dst)
+        seg.closed = True
+
+    def _scan(self, seg: _Segment, entries: int | None = None) -> int:
+        """Index a sidecar; return the byte length of its valid prefix."""
+        good = 0
+        if not seg.meta.exists():
+            return good
+        with open(seg.meta, "rb") as f:
+            for line in f:
+                rec = _parse(line)
+                if rec is None:
+                    break
+                if rec["op"] == "cap" and entries is not None and rec["row"] + rec["n"] > entries:
+                    break
+                if rec["op"] == "tomb":
+                    self._tombs.append((rec["lsn"], rec["id"]))
+                    self._dead[rec["id"]] = max(self._dead.get(rec["id"], 0), rec["lsn"])
+                seg.note(rec["lsn"], rec["op"] == "cap")
+                self.lsn = max(self.lsn, rec["lsn"])
+                good += len(line)
+        return good
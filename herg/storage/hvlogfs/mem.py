@@ -0,0 +1,81 @@
+from bisect import bisect_right
+
+
+class Capsule:
+    def __init__(self, cap_id, mu, meta, lsn: int = 0):
+        self.id_int = int(cap_id)
+        self.mu = mu
+        self.meta = meta
+        self.chunk = "mem"
+        self.active = True
+        self.lsn = lsn
+
+
+class MemChunk:
+    """In-memory chunk with minimal API for dev jobs."""
+
+    def __init__(self, caps, fs=None):
+        self._caps = caps
+        self._fs = fs
+        self.path = "mem"
+
+    def capsules(self):
+        return self._caps
+
+    def tombstone(self, cap_id: int):
+        if self._fs is not None:
+            self._fs.tombstone(cap_id)
+            return
+        for c in self._caps:
+            if c.id_int == cap_id:
+                c.active = False
+
+    def flush(self):
+        pass
+
+    def is_closed(self):
+        return True
+
+
+class MemHVLogFS:
+    """Minimal in-memory HVLogFS used for development and tests."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lsn = 0                 # sequence number of the last record
+        self._caps = []
+        self._lsns = []              # parallel to _caps, increasing
+        self._prefixes = []          # parallel to _caps, as appended
+        self._tombs = []             # (lsn, cap_id)
+        self._chunk = MemChunk(self._caps, self)
+        self._chunks = [self._chunk]
+
+    def append_cap(self, prefix: str, cap_id: int, mu, meta: dict) -> None:
+        self.lsn += 1
+        self._caps.append(Capsule(cap_id, mu, meta, self.lsn))
+        self._lsns.append(self.lsn)
+        self._prefixes.append(prefix)
+
+    def tombstone(self, cap_id: int, prefix: str = "") -> None:
+        """Log a tombstone for cap_id and deactivate its earlier records."""
+        self.lsn += 1
+        self._tombs.append((self.lsn, int(cap_id)))
+        for c in self._caps:
+            if c.id_int == cap_id:
+                c.active = False
+
+    def iter_capsules(self, prefix: str = "", since: int = 0):
+        """Yield capsules in log order, skipping records with lsn <= since."""
+        start = bisect_right(self._lsns, since)
+        for c, p in zip(self._caps[start:], self._prefixes[start:]):
+            if prefix and p != prefix:
+                continue
+            yield c
+
+    def iter_tombstones(self, since: int = 0):
+        """Yield ``(lsn, cap_id)`` for tombstones logged after ``since``."""
+        start = bisect_right(self._tombs, (since, float("inf")))
+        yield from self._tombs[start:]
+
+    def chunks(self, active_only: bool = True):
+        return self._chunks
@@ -1,13 +1,125 @@
-from typing import Iterable
+import mmap
+import os
+import zlib
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .erasure import ReedSolomon, encode_files
+
+GROUP = 3              # data chunks per XOR parity file
+WINDOW = 1 << 20       # bytes per streamed XOR window (a multiple of 8)
+
+
+def _xor_into(acc: np.ndarray, buf, offset: int = 0) -> None:
+    """``acc ^= buf[offset:offset + len(acc)]`` in uint64 words plus a byte tail."""
+    n = min(acc.size, len(buf) - offset)
+    if n <= 0:
+        return
+    src = np.frombuffer(buf, dtype=np.uint8, count=n, offset=offset)
+    w = n // 8 * 8
+    words = acc[:w].view(np.uint64)
+    np.bitwise_xor(words, src[:w].view(np.uint64), out=words)
+    acc[w:n] ^= src[w:]
 
 
 def xor_chunks(*chunks: Iterable[bytes]) -> bytes:
-    """Return XOR parity of given byte-like chunks."""
+    """Return XOR parity of given byte-like chunks (as long as the first)."""
     if not chunks:
         return b""
-    it = iter(chunks)
-    parity = bytearray(next(it))
-    for c in it:
-        for i, b in enumerate(c):
-            parity[i] ^= b
-    return bytes(parity)
+    acc = np.frombuffer(chunks[0], dtype=np.uint8).copy()
+    for c in chunks[1:]:
+        _xor_into(acc, c)
+    return acc.tobytes()
+
+
+def xor_files(sources: Sequence[str], out: str, window: int = WINDOW) -> int:
+    """Stream the XOR of ``sources`` into ``out`` through mmap windows.
+
+    Shorter sources count as zero-padded; ``out`` is as long as the
+    longest and is written aside, fsynced and renamed into place.
+    Returns the crc32 of ``out``.
+    """
+    maps, files, crc = [], [], 0
+    try:
+        for path in sources:
+            f = open(path, 'rb')
+            files.append(f)
+            if os.fstat(f.fileno()).st_size:
+                maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        size = max((len(m) for m in maps), default=0)
+        acc = np.empty(window, dtype=np.uint8)
+        tmp = out + '.tmp'
+        with open(tmp, 'wb') as dst:
+            for lo in range(0, size, window):
+                n = min(window, size - lo)
+                acc[:n] = 0
+                for m in maps:
+                    _xor_into(acc[:n], m, lo)
+                crc = zlib.crc32(memoryview(acc)[:n], crc)
+                dst.write(memoryview(acc)[:n])
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, out)
+        return crc
+    finally:
+        for m in maps:
+            m.close()
+        for f in files:
+            f.close()
+
+
+def parity_path(first: str, index: int = 0) -> str:
+    """Parity file ``index`` of the group starting at ``first``:
+    ``x.chk`` → ``xp.chk``, then ``xp1.chk``, ``xp2.chk`` ..."""
+    root, ext = os.path.splitext(first)
+    return root + 'p' + (str(index) if index else '') + ext
+
+
+def crc_path(parity: str) -> str:
+    """Sidecar holding the crc32 of a parity file (parity has no entry CRCs)."""
+    return parity + '.crc'
+
+
+def file_crc(path: str, window: int = WINDOW) -> int:
+    crc = 0
+    with open(path, 'rb') as f:
+        while block := f.read(window):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def parity_ok(parity: str) -> Optional[bool]:
+    """Whether ``parity`` matches its recorded crc32; None if none is recorded."""
+    try:
+        with open(crc_path(parity)) as f:
+            expect = int(f.read(), 16)
+    except FileNotFoundError:
+        return None if os.path.exists(parity) else False
+    except ValueError:
+        return False
+    return os.path.exists(parity) and file_crc(parity) == expect
+
+
+def _write_crc(parity: str, crc: int) -> None:
+    tmp = crc_path(parity) + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(f'{crc:08x}\n')
+    os.replace(tmp, crc_path(parity))
+
+
+def write_parity(group: Sequence[str], parities: int = 1) -> str:
+    """Write the parity of a closed chunk group; returns the first path.
+
+    One parity file is the XOR of the group; more use a
+    ``len(group)+parities`` Reed-Solomon code whose first shard is that
+    same XOR.  Each parity file's crc32 goes to its ``crc_path`` sidecar.
+    """
+    outs = [parity_path(group[0], i) for i in range(parities)]
+    if parities == 1:
+        crcs = [xor_files(group, outs[0])]
+    else:
+        crcs = encode_files(ReedSolomon(len(group), parities), group, outs)
+    for out, crc in zip(outs, crcs):
+        _write_crc(out, crc)
+    return outs[0]
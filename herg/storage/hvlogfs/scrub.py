@@ -1,42 +1,235 @@
+import json
+import logging
+import mmap
 import os
-from .chunk import HyperChunk, ENTRY_SIZE, ChecksumError
-from .parity import xor_chunks
-
-
-def scrub(path: str) -> None:
-    """Verify CRCs in all chunks at path and attempt repair using parity."""
-    chunks = [f for f in os.listdir(path) if f.endswith('.chk')]
-    chunks.sort()
-    data_chunks = [os.path.join(path, c) for c in chunks if not c.endswith('p.chk')]
-    parity_chunks = [os.path.join(path, c) for c in chunks if c.endswith('p.chk')]
-    if not parity_chunks:
-        return
-    for d0, d1, d2, p in zip(data_chunks[0::3], data_chunks[1::3], data_chunks[2::3], parity_chunks):
-        for fname in [d0, d1, d2]:
-            chunk = HyperChunk(fname)
-            for i in range(chunk.count):
-                off = 64 + i * ENTRY_SIZE
-                try:
-                    chunk.read(off)
-                except ChecksumError:
-                    rebuild(fname, d0, d1, d2, p)
-                    break
-            chunk.close()
+import re
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Optional
 
+import numpy as np
+
+from .chunk import HEADER_FMT, MAGIC, VECTOR_SIZE, ENTRY_SIZE, CHUNK_SIZE, crc_rows
+from .erasure import ReedSolomon, decode_files
+from .parity import parity_ok, parity_path, write_parity, xor_files
+from .store import parity_layout
+
+log = logging.getLogger(__name__)
+
+STATE_FILE = '.scrub-state.json'
+WINDOW_ROWS = 1024               # entries checked (and throttled) per step
+_PARITY = re.compile(r'p\d*\.chk$')
+REBUILD = '.rebuild'             # suffix a chunk is rebuilt under before it is verified
+
+
+@dataclass
+class ScrubReport:
+    checked: list = field(default_factory=list)       # chunk names verified this run
+    skipped: int = 0                                  # unchanged since their last clean pass
+    bytes_read: int = 0
+    repaired: dict = field(default_factory=dict)      # name -> bad rows (None = whole chunk)
+    unrepairable: dict = field(default_factory=dict)  # name -> bad rows (None = whole chunk)
+    parity_rebuilt: list = field(default_factory=list)  # parity files rewritten from clean chunks
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class _Throttle:
+    """Sleep so that consumption stays under ``rate`` bytes/s."""
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self.start = time.monotonic()
+        self.used = 0
+
+    def consume(self, n: int) -> None:
+        if not self.rate:
+            return
+        self.used += n
+        ahead = self.used / self.rate - (time.monotonic() - self.start)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def check_chunk(path: str, rate: Optional[float] = None):
+    """Verify one chunk file; returns ``(bad_rows | None, bytes_read)``.
+
+    ``bad_rows`` is a list of entries whose CRC fails (empty when clean);
+    None means the file is missing or its header is unusable.  The chunk
+    CRC in the header is checked in the same windowed pass.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) < CHUNK_SIZE:
+        return None, 0
+    throttle = _Throttle(rate)
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), CHUNK_SIZE, access=mmap.ACCESS_READ)
+    try:
+        magic, count, vsize, crc, _ = struct.unpack(HEADER_FMT, mm[:64])
+        if magic != MAGIC or vsize != VECTOR_SIZE or 64 + count * ENTRY_SIZE > CHUNK_SIZE:
+            return None, 64
+        M = np.ndarray((count, VECTOR_SIZE), dtype=np.uint8, buffer=mm,
+                       offset=64, strides=(ENTRY_SIZE, 1))
+        C = np.ndarray((count,), dtype='<u4', buffer=mm,
+                       offset=64 + VECTOR_SIZE, strides=(ENTRY_SIZE,))
+        bad, running = [], 0
+        for lo in range(0, count, WINDOW_ROWS):
+            hi = min(lo + WINDOW_ROWS, count)
+            throttle.consume((hi - lo) * ENTRY_SIZE)
+            bad.extend((np.flatnonzero(crc_rows(M[lo:hi]) != C[lo:hi]) + lo).tolist())
+            running = zlib.crc32(mm[64 + lo * ENTRY_SIZE:64 + hi * ENTRY_SIZE], running)
+        M = C = None
+        if crc and running != crc and not bad:
+            return None, 64 + count * ENTRY_SIZE          # header CRC itself is damaged
+        return bad, 64 + count * ENTRY_SIZE
+    finally:
+        mm.close()
+
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
 
-def rebuild(target: str, c0: str, c1: str, c2: str, parity: str) -> None:
-    """Rebuild missing chunk using XOR parity."""
-    with open(parity, 'rb') as f:
-        pbytes = f.read()
-    with open(c0, 'rb') as f:
-        b0 = f.read()
-    b1 = b''
-    if os.path.exists(c1):
-        with open(c1, 'rb') as f:
-            b1 = f.read()
-    with open(c2, 'rb') as f:
-        b2 = f.read()
-    missing = xor_chunks(pbytes, b0, b1, b2)
-    with open(target, 'wb') as f:
-        f.write(missing)
 
+def _current(prev: Optional[dict], stamp, now: float, max_age: Optional[float]) -> bool:
+    """Whether a clean result in ``prev`` still stands for a file stamped ``stamp``."""
+    fresh = prev and (max_age is None or now - prev['verified'] < max_age)
+    return bool(fresh and prev['ok'] and prev['stamp'] == stamp)
+
+
+def _load_state(path: str) -> dict:
+    try:
+        with open(os.path.join(path, STATE_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_state(path: str, state: dict) -> None:
+    tmp = os.path.join(path, STATE_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, os.path.join(path, STATE_FILE))
+
+
+def scrub(path: str, workers: Optional[int] = None, rate: Optional[float] = None,
+          max_age: Optional[float] = None, report_path: Optional[str] = None,
+          group: Optional[int] = None, parities: Optional[int] = None) -> ScrubReport:
+    """Verify chunk CRCs under ``path`` and repair what parity allows.
+
+    Data chunks (``*.chk`` other than ``*p.chk``, ``*p<i>.chk``) are taken
+    in sorted groups of ``group``, protected by ``parities`` files named by
+    ``parity_path`` of the group's first chunk (see ``write_parity``); both
+    default to the layout a ``VectorStore`` recorded in ``checkpoint.json``
+    (see ``parity_layout``).
+    Chunks are verified in a process pool of ``workers`` (None = CPU
+    count, 0 = in-process), sharing a read budget of ``rate`` bytes/s.
+    A chunk whose mtime and size are unchanged since its last clean pass,
+    and which was verified less than ``max_age`` seconds ago (None =
+    forever), is skipped; state lives in ``<path>/.scrub-state.json``.
+    Chunks recorded there that have disappeared count as missing (delete
+    the state file after removing chunks on purpose).  The parity files of
+    a sealed group are checked against their sidecars on the same
+    schedule, and always when one of the group's chunks is damaged.
+
+    Damaged or missing chunks are rebuilt when a group has lost no more
+    than ``parities`` files in all; a parity file counts as lost when it is
+    missing or fails the crc32 in its ``crc_path`` sidecar.  A chunk is
+    rebuilt as ``<name>.rebuild`` and only replaces the original once it
+    verifies clean.  Lost or corrupt parity files of a group whose chunks
+    are all clean are re-encoded from those chunks.  The report lists repaired and
+    unrepairable vectors and is also written as JSON to ``report_path``
+    if given.
+    """
+    group, parities = parity_layout(path, group, parities)
+    state = _load_state(path)
+    listed = {f for f in os.listdir(path) if f.endswith('.chk') and not _PARITY.search(f)}
+    remembered = {n for n in state if not _PARITY.search(n)}
+    names = sorted(listed | remembered)       # remembered chunks that vanished are missing
+    groups = [names[i:i + group] for i in range(0, len(names), group)]
+    report = ScrubReport()
+    now = time.time()
+
+    todo = []
+    for name in names:
+        if _current(state.get(name), _stamp(os.path.join(path, name)), now, max_age):
+            report.skipped += 1
+        else:
+            todo.append(name)
+
+    results = {}
+    paths = [os.path.join(path, n) for n in todo]
+    if workers == 0 or len(todo) <= 1:
+        for name, p in zip(todo, paths):
+            results[name] = check_chunk(p, rate)
+    else:
+        n = min(workers or os.cpu_count() or 1, len(todo))
+        share = rate / n if rate else None
+        with ProcessPoolExecutor(n) as pool:
+            for name, res in zip(todo, pool.map(check_chunk, paths, [share] * len(todo))):
+                results[name] = res
+
+    for name, (bad, nbytes) in results.items():
+        report.checked.append(name)
+        report.bytes_read += nbytes
+        state[name] = {'stamp': _stamp(os.path.join(path, name)), 'verified': now, 'ok': bad == []}
+
+    code = ReedSolomon(group, parities)
+    for members in groups:
+        damaged = [n for n in members if not state[n]['ok']]
+        shards = [os.path.join(path, n) for n in members]
+        pfiles = [parity_path(shards[0], i) for i in range(parities)]
+        sealed = len(members) == group and any(map(os.path.exists, pfiles))
+        bad_parity = []
+        for i, p in enumerate(pfiles if sealed else ()):
+            pname, stamp = os.path.basename(p), _stamp(p)
+            if damaged or not _current(state.get(pname), stamp, now, max_age):
+                ok = parity_ok(p) is not False
+                report.bytes_read += stamp[1] if stamp else 0
+                state[pname] = {'stamp': stamp, 'verified': now, 'ok': ok}
+                if not ok:
+                    bad_parity.append(i)
+        if not damaged and not bad_parity:
+            continue
+        if damaged and sealed and len(damaged) + len(bad_parity) <= parities:
+            targets = [members.index(n) for n in damaged]
+            aside = shards + pfiles
+            for i in targets:
+                aside[i] += REBUILD
+            decode_files(code, aside, targets + [group + i for i in bad_parity], targets)
+            for name in list(damaged):
+                target = os.path.join(path, name)
+                if check_chunk(target + REBUILD)[0] == []:
+                    os.replace(target + REBUILD, target)
+                    report.repaired[name] = results[name][0]
+                    state[name] = {'stamp': _stamp(target), 'verified': now, 'ok': True}
+                    damaged.remove(name)
+                    log.info('scrub: rebuilt %s from parity', name)
+                else:
+                    os.remove(target + REBUILD)
+        if bad_parity and not damaged:
+            write_parity(shards, parities)          # re-encoded from verified chunks
+            for p in pfiles:
+                state[os.path.basename(p)] = {'stamp': _stamp(p), 'verified': now, 'ok': True}
+            report.parity_rebuilt.extend(os.path.basename(pfiles[i]) for i in bad_parity)
+            log.info('scrub: rewrote parity of %s', members[0])
+        for name in damaged:
+            report.unrepairable[name] = results[name][0] if name in results else None
+            log.error('scrub: %s is damaged and cannot be rebuilt', name)
+
+    _save_state(path, state)
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report.to_dict(), f, indent=2)
+    return report
+
+
+def rebuild(target: str, c0: str, c1: str, c2: str, parity: str) -> None:
+    """Rebuild a missing or corrupt chunk from XOR parity and its two peers."""
+    xor_files([parity] + [c for c in (c0, c1, c2) if c != target], target)
@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import re
+import struct
+import threading
+from typing import Iterable, Optional, Tuple
+
+from .chunk import HyperChunk, ENTRY_SIZE, CHUNK_SIZE, VECTOR_SIZE
+from .index import MetaIndex
+from .journal import WriteAheadJournal, iter_records
+from .parity import GROUP, write_parity
+
+log = logging.getLogger(__name__)
+
+CAPACITY = (CHUNK_SIZE - 64) // ENTRY_SIZE
+CHECKPOINT_BYTES = 64 << 20    # journal bytes between automatic checkpoints
+_REC = struct.Struct('<IIH')   # chunk seq, row, key length; then key + vector
+_WAL = re.compile(r'wal-(\d{8})$')
+_CHUNK = 'vec-{:08d}.chk'
+CHECKPOINT = 'checkpoint.json'
+
+
+def _load_checkpoint(path: str) -> dict:
+    try:
+        with open(os.path.join(path, CHECKPOINT)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'gen': 0, 'chunk': 0}
+
+
+def parity_layout(path: str, group: Optional[int] = None,
+                  parities: Optional[int] = None) -> Tuple[int, int]:
+    """``(group, parities)`` of the store at ``path``.
+
+    Taken from its ``checkpoint.json`` when recorded there, else from the
+    arguments, else ``GROUP`` and 1.  Raises ValueError when an argument
+    contradicts the recorded layout.
+    """
+    ckpt = _load_checkpoint(path)
+    want = {'group': group, 'parities': parities}
+    for key, value in want.items():
+        if key in ckpt:
+            if value is not None and value != ckpt[key]:
+                raise ValueError(f'{path} was written with {key}={ckpt[key]}, not {value}')
+            want[key] = ckpt[key]
+    return (GROUP if want['group'] is None else want['group'],
+            1 if want['parities'] is None else want['parities'])
+
+
+class VectorStore:
+    """Seed-hash → vector store: HyperChunks + ``MetaIndex`` behind a journal.
+
+    ``put`` journals ``(chunk, row, key, vector)`` with group commit, then
+    writes the vector into the open chunk and, once the record is durable,
+    the key into the index (as a chunk file name and offset).  Chunk
+    headers and the index log are only made durable at checkpoints, so the
+    journal is the source of truth for everything after the last one.
+
+    A checkpoint flushes the open chunk and the index, records the next
+    journal generation in ``checkpoint.json`` (written aside, then renamed)
+    and starts a new ``wal-<gen>`` file, deleting the older ones.  One runs
+    every ``checkpoint_bytes`` of journal (None disables) and on ``close``.
+    Opening replays the journal generations from the checkpoint on;
+    records name their chunk row, so replay rewinds each chunk to the first
+    replayed row and re-appends, which is idempotent.
+
+    With ``parity`` on, closing the last chunk of each group of ``group``
+    writes the group's parity files for ``scrub``: one XOR file
+    (``vec-<first>p.chk``) by default, or ``parities`` Reed-Solomon shards
+    (``p.chk``, ``p1.chk`` ...), any ``parities`` lost chunks of the group
+    being recoverable.  The layout is recorded in ``checkpoint.json``;
+    reopening (or scrubbing) with ``group``/``parities`` left at None
+    reuses it, and contradicting it raises ValueError.
+    """
+
+    def __init__(self, path: str, checkpoint_bytes: int | None = CHECKPOINT_BYTES,
+                 resident: bool = True, max_delay: float = 0.0, parity: bool = True,
+                 group: Optional[int] = None, parities: Optional[int] = None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.checkpoint_bytes = checkpoint_bytes
+        self.parity = parity
+        self.group, self.parities = parity_layout(path, group, parities)
+        self.max_delay = max_delay
+        self.index = MetaIndex(os.path.join(path, 'meta.idx'), resident=resident)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._inflight = 0            # journaled records not yet in the index
+        self._readers = {}            # chunk name -> read-only HyperChunk
+        ckpt = _load_checkpoint(path)
+        self.gen = ckpt['gen']
+        self._open_chunk(ckpt['chunk'])
+        self.replayed = self._replay()
+        self.checkpoint()
+
+    # ------------------------------------------------------------
+    def put(self, seed_hash: bytes, vector: bytes) -> None:
+        self.put_many([(seed_hash, vector)])
+
+    def put_many(self, items: Iterable[Tuple[bytes, bytes]]) -> None:
+        """Journal and store vectors; returns once all of them are durable."""
+        items = [(bytes(key), vec) for key, vec in items]
+        if any(len(vec) != VECTOR_SIZE for _, vec in items):
+            raise ValueError('Vector must be 1024 bytes')
+        pending = []
+        try:
+            with self._lock:
+                for key, vec in items:
+                    if self.chunk.count == CAPACITY:
+                        self._open_chunk(self.seq + 1, fresh=True)
+                    rec = _REC.pack(self.seq, self.chunk.count, len(key)) + key + bytes(vec)
+                    fut = self.journal.submit(rec)
+                    [off] = self.chunk.append([vec])
+                    pending.append((fut, key, (_CHUNK.format(self.seq), off)))
+                    self._inflight += 1
+            for fut, _, _ in pending:
+                fut.result()
+        finally:
+            # release every record already submitted, even if a later submit raised
+            done = [(key, loc) for fut, key, loc in pending if fut.exception() is None]
+            with self._lock:
+                self.index.put_many(done)
+                self._inflight -= len(pending)
+                self._idle.notify_all()
+                if self.checkpoint_bytes and self.journal.size >= self.checkpoint_bytes:
+                    self._checkpoint()
+
+    def get(self, seed_hash: bytes) -> Optional[bytes]:
+        with self._lock:
+            loc = self.index.get(seed_hash)
+            if loc is None:
+                return None
+            name, off = loc
+            if name == _CHUNK.format(self.seq):
+                return self.chunk.read(off)
+            reader = self._readers.get(name)
+            if reader is None:
+                reader = self._readers[name] = HyperChunk(os.path.join(self.path, name), 'rb')
+            return reader.read(off)
+
+    def checkpoint(self) -> None:
+        with self._lock:
+            self._checkpoint()
+
+    def close(self) -> None:
+        self.checkpoint()
+        with self._lock:
+            self.journal.close()
+            self.chunk.close()
+            self.index.close()
+            for r in self._readers.values():
+                r.close()
+            self._readers.clear()
+
+    # ------------------------------------------------------------
+    def _chunk_path(self, seq: int) -> str:
+        return os.path.join(self.path, _CHUNK.format(seq))
+
+    def _wal_path(self, gen: int) -> str:
+        return os.path.join(self.path, f'wal-{gen:08d}')
+
+    def _open_chunk(self, seq: int, fresh: bool = False) -> None:
+        if getattr(self, 'chunk', None) is not None:
+            self.chunk.close()
+            if self.parity and seq == self.seq + 1 and seq % self.group == 0:
+                write_parity([self._chunk_path(s) for s in range(seq - self.group, seq)],
+                             self.parities)
+        path = self._chunk_path(seq)
+        if fresh and os.path.exists(path):
+            os.unlink(path)           # leftovers past the checkpoint; the journal rebuilds them
+        self.seq = seq
+        self.chunk = HyperChunk(path, flush_every=None)
+
+    def _replay(self) -> int:
+        gens = sorted(int(m[1]) for m in map(_WAL.match, os.listdir(self.path)) if m)
+        n, base = 0, self.seq
+        for gen in (g for g in gens if g >= self.gen):
+            batch = []
+            for _, data in iter_records(self._wal_path(gen)):
+                seq, row, klen = _REC.unpack_from(data)
+                key = data[_REC.size:_REC.size + klen]
+                vec = data[_REC.size + klen:]
+                if seq != self.seq:
+                    self._open_chunk(seq, fresh=seq > base)
+                if row != self.chunk.count:
+                    if row > self.chunk.count:
+                        raise ValueError(f'journal gap at {_CHUNK.format(seq)} row {row}')
+                    self.chunk.truncate(row)
+                [off] = self.chunk.append([vec])
+                batch.append((key, (_CHUNK.format(seq), off)))
+                n += 1
+            self.index.put_many(batch)
+        if n:
+            log.info('%s: replayed %d journal records', self.path, n)
+        return n
+
+    def _checkpoint(self) -> None:
+        """Flush chunk and index, then roll the journal to a new generation."""
+        while self._inflight:
+            self._idle.wait()
+        if getattr(self, 'journal', None) is not None:
+            self.journal.close()              # drains queued records
+        self.chunk.flush()
+        self.index.flush()
+        gen = self.gen + 1
+        tmp = os.path.join(self.path, CHECKPOINT + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'gen': gen, 'chunk': self.seq,
+                       'group': self.group, 'parities': self.parities}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, CHECKPOINT))
+        self.journal = WriteAheadJournal(self._wal_path(gen), max_delay=self.max_delay)
+        for name in os.listdir(self.path):
+            m = _WAL.match(name)
+            if m and int(m[1]) < gen:
+                os.unlink(os.path.join(self.path, name))
+        self.gen = gen
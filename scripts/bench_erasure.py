@@ -0,0 +1,57 @@
+import argparse
+import os
+import tempfile
+import time
+import pathlib
+import sys
+
+import numpy as np
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from herg.storage.hvlogfs import CHUNK_SIZE
+from herg.storage.hvlogfs.erasure import ReedSolomon, encode_files, decode_files
+
+
+def run_bench(k: int, m: int, window: int, repeat: int = 3) -> dict:
+    """MiB/s of data encoded / rebuilt for a group of ``k`` CHUNK_SIZE chunks."""
+    rs = ReedSolomon(k, m)
+    rng = np.random.default_rng(0)
+    bufs = [rng.integers(0, 256, CHUNK_SIZE, dtype=np.uint8).tobytes() for _ in range(k)]
+    mib = k * CHUNK_SIZE / (1 << 20)
+    out = {}
+    t = time.perf_counter()
+    for _ in range(repeat):
+        parity = rs.encode(bufs)
+    out['encode'] = repeat * mib / (time.perf_counter() - t)
+    shards = bufs + parity
+    lost = list(range(min(m, k)))                  # worst case: data shards lost
+    t = time.perf_counter()
+    for _ in range(repeat):
+        rs.decode([None if i in lost else s for i, s in enumerate(shards)])
+    out['decode'] = repeat * mib / (time.perf_counter() - t)
+    with tempfile.TemporaryDirectory() as d:
+        paths = [os.path.join(d, f'c{i}.chk') for i in range(k + m)]
+        for p, b in zip(paths, bufs):
+            with open(p, 'wb') as f:
+                f.write(b)
+        t = time.perf_counter()
+        for _ in range(repeat):
+            encode_files(rs, paths[:k], paths[k:], window)
+        out['encode_files'] = repeat * mib / (time.perf_counter() - t)
+        t = time.perf_counter()
+        for _ in range(repeat):
+            decode_files(rs, paths, lost, window)
+        out['decode_files'] = repeat * mib / (time.perf_counter() - t)
+    return out
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--k', type=int, default=4, help='data chunks per group')
+    p.add_argument('--m', type=int, default=2, help='parity chunks per group')
+    p.add_argument('--window', type=int, default=1 << 20, help='streamed window bytes')
+    args = p.parse_args()
+    print(f"k={args.k} m={args.m} overhead {(args.k + args.m) / args.k:.2f}x")
+    for impl, mbps in run_bench(args.k, args.m, args.window).items():
+        print(f"{impl} {mbps:.1f} MiB/s")
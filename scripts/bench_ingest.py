@@ -1,43 +1,48 @@
 import argparse
 import os
+import tempfile
 import time
 import pathlib
 import sys
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 
-from herg.storage.hvlogfs import HyperChunk
+from herg.storage.hvlogfs import HyperChunk, ENTRY_SIZE, CHUNK_SIZE
 
 
-def run_bench(n: int) -> None:
-    path = 'bench.chk'
-    if os.path.exists(path):
-        os.remove(path)
-    chunk = HyperChunk(path)
-    vec = bytes([0]) * 1024
-    from herg.storage.hvlogfs import ENTRY_SIZE, CHUNK_SIZE
+def run_bench(n: int, batch: int, flush_every: int | None = 1) -> float:
+    """Append n vectors in batches of `batch`, rolling chunks; return vectors/s."""
     capacity = (CHUNK_SIZE - 64) // ENTRY_SIZE
-    batch = [vec] * capacity
-    start = time.time()
-    i = 0
-    while i < n:
-        step = min(capacity, n - i)
-        try:
-            chunk.append(batch[:step])
-        except OSError:
-            idx = i // capacity
-            chunk.close()
-            chunk = HyperChunk(f'bench{idx}.chk')
-            chunk.append(batch[:step])
-        i += step
-    elapsed = time.time() - start
-    mbps = (n * 1024) / (1024 * 1024) / elapsed
-    vps = n / elapsed
-    print(f"{mbps:.1f} MB/s {vps:.0f} vectors/s")
+    vec = bytes([0]) * 1024
+    with tempfile.TemporaryDirectory() as d:
+        idx = 0
+        chunk = HyperChunk(os.path.join(d, f'bench{idx}.chk'), flush_every=flush_every)
+        start = time.time()
+        i = 0
+        while i < n:
+            if chunk.count == capacity:
+                chunk.close()
+                idx += 1
+                chunk = HyperChunk(os.path.join(d, f'bench{idx}.chk'), flush_every=flush_every)
+            step = min(batch, n - i, capacity - chunk.count)
+            chunk.append([vec] * step)
+            i += step
+        chunk.close()
+        elapsed = time.time() - start
+    return n / elapsed
 
 
 if __name__ == '__main__':
     p = argparse.ArgumentParser()
     p.add_argument('--n', type=int, default=1000000)
+    p.add_argument('--batches', default='1,16,256,4080',
+                   help='comma-separated append batch sizes')
+    p.add_argument('--flush-every', type=int, default=1,
+                   help='appends per header flush (0 = only on close)')
     args = p.parse_args()
-    run_bench(args.n)
+    for batch in [int(b) for b in args.batches.split(',')]:
+        # tiny batches are per-call bound; cap them so the sweep stays short
+        n = min(args.n, batch * 20000)
+        vps = run_bench(n, batch, args.flush_every or None)
+        mbps = vps * 1024 / (1024 * 1024)
+        print(f"batch={batch} {mbps:.1f} MB/s {vps:.0f} vectors/s")
@@ -0,0 +1,47 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from herg.storage.hvlogfs import WriteAheadJournal
+
+
+def run_bench(n: int, threads: int, size: int, max_delay: float) -> tuple[float, float]:
+    """Append n records of `size` bytes from `threads` writers; return (records/s, records/fsync)."""
+    rec = b'x' * size
+    per = n // threads
+    with tempfile.TemporaryDirectory() as d:
+        j = WriteAheadJournal(os.path.join(d, 'wal'), max_delay=max_delay)
+
+        def writer():
+            for _ in range(per):
+                j.append(rec)
+
+        ts = [threading.Thread(target=writer) for _ in range(threads)]
+        start = time.time()
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+        elapsed = time.time() - start
+        j.close()
+    return j.records / elapsed, j.records / max(j.commits, 1)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--n', type=int, default=20000)
+    p.add_argument('--threads', default='1,4,16,64',
+                   help='comma-separated appender counts')
+    p.add_argument('--size', type=int, default=256, help='record bytes')
+    p.add_argument('--max-delay', type=float, default=0.0,
+                   help='seconds the committer waits for a batch to fill')
+    args = p.parse_args()
+    for threads in [int(t) for t in args.threads.split(',')]:
+        rps, per_fsync = run_bench(args.n, threads, args.size, args.max_delay)
+        print(f"threads={threads} {rps:.0f} records/s {per_fsync:.1f} records/fsync")
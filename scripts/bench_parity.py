@@ -0,0 +1,57 @@
+import argparse
+import os
+import tempfile
+import time
+import pathlib
+import sys
+
+import numpy as np
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from herg.storage.hvlogfs import CHUNK_SIZE
+from herg.storage.hvlogfs.parity import xor_chunks, xor_files
+
+
+def _xor_bytewise(*chunks):
+    """The original per-byte Python loop, as a baseline."""
+    parity = bytearray(chunks[0])
+    for c in chunks[1:]:
+        for i, b in enumerate(c):
+            parity[i] ^= b
+    return bytes(parity)
+
+
+def run_bench(window: int, repeat: int = 5) -> dict:
+    """MiB/s of input XORed for a group of three CHUNK_SIZE chunks."""
+    rng = np.random.default_rng(0)
+    bufs = [rng.integers(0, 256, CHUNK_SIZE, dtype=np.uint8).tobytes() for _ in range(3)]
+    mib = 3 * CHUNK_SIZE / (1 << 20)
+    out = {}
+    sample = [b[:1 << 16] for b in bufs]           # the loop is too slow for full chunks
+    t = time.perf_counter()
+    _xor_bytewise(*sample)
+    out['bytewise'] = 3 * len(sample[0]) / (1 << 20) / (time.perf_counter() - t)
+    t = time.perf_counter()
+    for _ in range(repeat):
+        xor_chunks(*bufs)
+    out['xor_chunks'] = repeat * mib / (time.perf_counter() - t)
+    with tempfile.TemporaryDirectory() as d:
+        paths = []
+        for i, b in enumerate(bufs):
+            paths.append(os.path.join(d, f'c{i}.chk'))
+            with open(paths[-1], 'wb') as f:
+                f.write(b)
+        t = time.perf_counter()
+        for _ in range(repeat):
+            xor_files(paths, os.path.join(d, 'c0p.chk'), window)
+        out['xor_files'] = repeat * mib / (time.perf_counter() - t)
+    return out
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--window', type=int, default=1 << 20, help='xor_files window bytes')
+    args = p.parse_args()
+    for impl, mbps in run_bench(args.window).items():
+        print(f"{impl} {mbps:.1f} MiB/s")
@@ -0,0 +1,40 @@
+import argparse
+import tempfile
+import time
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from herg.storage.hvlogfs import VectorStore
+
+
+def run_bench(n: int, batch: int = 1024) -> tuple[float, float]:
+    """Journal n vectors with no checkpoint, drop the store, time reopening.
+
+    Returns (journal MiB, recovery seconds).
+    """
+    vec = bytes(1024)
+    with tempfile.TemporaryDirectory() as d:
+        s = VectorStore(d, checkpoint_bytes=None)
+        for lo in range(0, n, batch):
+            s.put_many((i.to_bytes(8, 'little'), vec) for i in range(lo, min(lo + batch, n)))
+        s.journal.close()                     # "crash": only the journal is durable
+        wal_mb = s.journal.size / (1 << 20)
+        start = time.time()
+        s2 = VectorStore(d)
+        elapsed = time.time() - start
+        assert s2.replayed == n
+        s2.close()
+    return wal_mb, elapsed
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--lengths', default='1000,10000,100000',
+                   help='comma-separated journal lengths (records)')
+    args = p.parse_args()
+    print('records,journal_mb,recovery_s')
+    for n in [int(x) for x in args.lengths.split(',')]:
+        mb, secs = run_bench(n)
+        print(f'{n},{mb:.1f},{secs:.3f}')
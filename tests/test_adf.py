@@ -9,3 +9,40 @@ def test_adf_update():
     adf_update(cap, incoming, 1.0, 0.5)
     assert np.all(cap.mu != 0)
     assert np.any(cap.L != 0)
+
+
+def test_adf_update_batch_matches_sequential(tmp_path):
+    from herg.graph_caps.store import CapsuleStore
+    from herg.graph_caps.step import adf_update_batch
+    store = CapsuleStore(dim=16, db_path=str(tmp_path / "db.sqlite"))
+    caps = store.spawn_many([b"a", b"b", b"c"])
+    ref = [Capsule(c.id, np.array(c.fast), np.array(c.mu), np.array(c.L)) for c in caps]
+    rng = np.random.default_rng(0)
+    ids = [caps[0].id, caps[2].id, caps[0].id]          # repeated id applies twice
+    X = rng.standard_normal((3, 16)).astype(np.float32)
+    signs = [1.0, -1.0, 0.5]
+    adf_update_batch(store, ids, X, signs, 0.1)
+    for k, i in enumerate([0, 2, 0]):
+        adf_update(ref[i], X[k], signs[k], 0.1)
+    for cap, r in zip(caps, ref):
+        assert np.allclose(cap.mu, r.mu, atol=1e-6)
+        assert np.allclose(cap.L, r.L, atol=1e-6)
+        assert np.array_equal(cap.fast, r.fast)
+        assert np.isclose(cap.energy, r.energy)
+    assert np.allclose(store.caps.mu_mean, store.caps.mu.mean(axis=0), atol=1e-6)
+    store.update([c.id for c in caps], np.ones(16, dtype=np.float32))
+    assert list(store.caps)[-1] == caps[2].id
+
+
+def test_batch_update_under_budget_reloads_spilled(tmp_path, monkeypatch):
+    import herg.graph_caps.store as store_mod
+    from herg.graph_caps.store import CapsuleStore
+    monkeypatch.setattr(store_mod, "VRAM_BUDGET", 2)
+    store = CapsuleStore(dim=16, db_path=str(tmp_path / "db.sqlite"))
+    for i in (1, 2, 3):
+        store.caps[i] = Capsule(i, np.ones(16, np.int8), np.zeros(16, np.float32), None)
+        store._evict_if_needed()
+    assert 1 not in store.caps
+    store.update([1, 2, 3], np.ones((3, 16), np.int8), eta=0.5)
+    assert len(store.caps) == 2
+    assert all(np.any(store.read(i).mu != 0) for i in (1, 2, 3))
@@ -16,6 +16,7 @@ def test_autotune_hillclimb():
 def test_integration_run(tmp_path, monkeypatch, capsys):
     home = tmp_path
     monkeypatch.setenv('HOME', str(home))
+    monkeypatch.chdir(tmp_path)                 # the CLI opens the default db
     argv = [
         'herg',
         'auto-run',
@@ -1,12 +1,13 @@
+from herg.graph_caps import Capsule
 from herg.graph_caps.store import CapsuleStore
-from herg.graph_caps.step import k_radius_pass
+from herg.graph_caps.step import k_radius_pass, k_radius_pass_bfs
 from herg.graph_caps.blocks import bind_block, BLOCK_SIZE
 from herg import backend as B
 import numpy as np
 
 
-def test_edge_blocks_isolation():
-    store = CapsuleStore(dim=BLOCK_SIZE * 4)
+def test_edge_blocks_isolation(tmp_path):
+    store = CapsuleStore(dim=BLOCK_SIZE * 4, db_path=str(tmp_path / "db.sqlite"))
     root = store.spawn(b'r')
     n1 = store.spawn(b'a')
     n2 = store.spawn(b'b')
@@ -20,3 +21,22 @@ def test_edge_blocks_isolation():
     k_radius_pass(store, radius=2)
     cap = store.caps[root.id]
     assert np.array_equal(B.as_numpy(cap.fast), expected)
+
+
+def test_k_radius_matches_bfs(tmp_path):
+    rng = np.random.default_rng(0)
+    store = CapsuleStore(dim=BLOCK_SIZE * 4, db_path=str(tmp_path / "db.sqlite"))
+    caps = store.spawn_many([bytes([i]) for i in range(30)])
+    for _ in range(60):
+        a, b = rng.integers(0, len(caps), size=2)
+        store.edges.add_edge(caps[a].id, caps[b].id, 1)
+    frozen = {cid: B.as_numpy(c.fast).copy() for cid, c in store.caps.items()}
+    k_radius_pass(store, radius=2)
+    for cid in frozen:
+        # BFS rewrites capsules as it sweeps; put cid first so it sees the snapshot
+        ref = CapsuleStore(dim=BLOCK_SIZE * 4, db_path=str(tmp_path / "ref.sqlite"))
+        ref.edges = store.edges
+        for other in [cid] + [o for o in frozen if o != cid]:
+            ref.caps[other] = Capsule(other, frozen[other], frozen[other], None)
+        k_radius_pass_bfs(ref, radius=2)
+        assert np.array_equal(B.as_numpy(store.caps[cid].fast), B.as_numpy(ref.caps[cid].fast))
@@ -0,0 +1,90 @@
+import pickle
+import numpy as np
+from herg.graph_caps import Capsule
+from herg.graph_caps.store import CapsuleStore
+from herg.graph_caps.table import CapsuleTable
+import herg.graph_caps.store as store_mod
+
+
+def test_capsules_are_row_views(tmp_path):
+    store = CapsuleStore(dim=16, db_path=str(tmp_path / "db.sqlite"))
+    caps = store.spawn_many([b"a", b"b", b"c"])
+    table = store.caps
+    assert table.fast.shape == (3, 16)
+    row = table.row_of(caps[1].id)
+    table.mu[row] += 1.0                      # whole-table write shows through
+    assert np.array_equal(caps[1].mu, table.mu[row])
+    caps[1].fast = np.ones(16, dtype=np.int8)  # row write lands in the slab
+    assert np.all(table.fast[row] == 1)
+    caps[1].energy -= 0.5
+    assert table.energy[row] == 0.5
+
+
+def test_remove_keeps_rows_dense():
+    table = CapsuleTable(dim=4, capacity=1)
+    caps = []
+    for i in range(5):
+        cap = Capsule(i, np.full(4, i, dtype=np.int8), np.full(4, i, dtype=np.float32), None)
+        table[i] = cap
+        caps.append(cap)
+    assert table.capacity >= 5
+    removed = table.pop(1)
+    assert removed is caps[1] and removed._table is None
+    assert np.all(removed.fast == 1)          # detached copy survives
+    assert len(table) == 4 and sorted(table.ids.tolist()) == [0, 2, 3, 4]
+    for i in (0, 2, 3, 4):
+        assert np.all(table[i].fast == i)
+        assert np.all(table[i].mu == i)
+
+
+def test_evicted_capsule_round_trips(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, "VRAM_BUDGET", 2)
+    store = CapsuleStore(dim=16, db_path=str(tmp_path / "db.sqlite"))
+    mus = np.random.default_rng(0).standard_normal((3, 16)).astype(np.float32)
+    for i, mu in enumerate(mus):
+        store.caps[i] = Capsule(i, np.sign(mu).astype(np.int8), mu, None)
+        store._evict_if_needed()
+    mu = mus[0]
+    assert 0 not in store.caps and len(store.caps) == 2
+    back = store.read(0)
+    assert np.array_equal(back.mu, mu)
+    assert back._table is store.caps
+    clone = pickle.loads(pickle.dumps(back))
+    assert clone._table is None and np.array_equal(clone.fast, back.fast)
+
+
+def test_baseline_dataclass_blob_loads(tmp_path, monkeypatch):
+    from dataclasses import dataclass, field
+    import herg.graph_caps.capsule as capsule_mod
+
+    @dataclass(slots=True)
+    class Capsule:                            # the pre-table class, as pickled
+        id: int
+        fast: object
+        mu: object
+        L: object
+        edges: list = field(default_factory=list)
+        energy: float = 1.0
+    Capsule.__module__, Capsule.__qualname__ = capsule_mod.__name__, "Capsule"
+    mu = np.linspace(-1, 1, 16, dtype=np.float32)
+    old = Capsule(7, np.sign(mu).astype(np.int8), mu, np.zeros((1, 16), np.float32), [3], 0.25)
+    with monkeypatch.context() as m:
+        m.setattr(capsule_mod, "Capsule", Capsule)
+        blob = pickle.dumps(old, protocol=4)
+    store = CapsuleStore(dim=16, db_path=str(tmp_path / "db.sqlite"))
+    store.conn.execute("REPLACE INTO caps VALUES (?,?)", (7, blob))
+    cap = store.read(7)
+    assert type(cap) is capsule_mod.Capsule and cap._table is store.caps
+    assert np.array_equal(cap.mu, mu) and cap.edges == [3] and cap.energy == 0.25
+
+
+def test_rank_mismatch_is_rejected():
+    table = CapsuleTable(dim=4)
+    cap = Capsule(1, np.zeros(4, np.int8), np.zeros(4, np.float32), np.ones((2, 4), np.float32))
+    try:
+        table[1] = cap
+    except ValueError as e:
+        assert "rank-1" in str(e)
+    else:
+        raise AssertionError("rank-2 L accepted")
+    assert len(table) == 0
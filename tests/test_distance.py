@@ -6,7 +6,9 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "herg-agent"))
 
 from agent.encoder_ext import expand_seed
-from herg.distance import hybrid_hamming
+import herg.distance as distance
+from herg.distance import hybrid_hamming, hybrid_hamming_many, hybrid_hamming_cross
+import pytest
 from herg.faiss_wrapper import HybridIndex
 from agent.utils import safe_search
 
@@ -52,6 +54,28 @@ def test_hybrid_distance_matches_brute():
     assert d1 == d2
 
 
+@pytest.mark.parametrize("bitcount", [True, False])
+def test_matrix_kernels_match_scalar(monkeypatch, bitcount):
+    if not bitcount:
+        monkeypatch.setattr(distance, "_BITCOUNT", None)
+    for lane in [(8, 4, 4), (64, 32, 32), (12, 6, 3)]:
+        X = np.vstack([expand_seed(bytes([i])*16, lane)[0] for i in range(20)])
+        Q = X[:3] ^ np.uint8(0x5A)
+        ref = np.array([[hybrid_hamming(q, x, lane) for x in X] for q in Q])
+        assert np.array_equal(hybrid_hamming_cross(Q, X, lane), ref)
+        assert np.array_equal(hybrid_hamming_many(Q[1], X, lane), ref[1])
+
+
+def test_cross_tiles_queries(monkeypatch):
+    monkeypatch.setattr(distance, "_BLOCK_BYTES", 256)    # 16-byte rows: 4 queries x 4 rows
+    monkeypatch.setattr(distance, "_MIN_ROWS", 4)
+    lane = (64, 32, 32)
+    X = np.vstack([expand_seed(bytes([i])*16, lane)[0] for i in range(23)])
+    Q = np.vstack([X ^ np.uint8(0x5A), X[:7]])
+    ref = np.array([[hybrid_hamming(q, x, lane) for x in X] for q in Q])
+    assert np.array_equal(hybrid_hamming_cross(Q, X, lane), ref)
+
+
 def test_safe_search_empty():
     idx = HybridIndex((8,4,4))
     q, _ = expand_seed(b"A"*32, (8,4,4))
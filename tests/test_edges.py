@@ -0,0 +1,36 @@
+import random
+import herg.graph_caps as gc
+from herg.graph_caps import EdgeCOO
+
+
+def _naive(edges, node):
+    return [d for s, d, _ in edges if s == node], [w for s, _, w in edges if s == node]
+
+
+def test_csr_matches_linear_scan(monkeypatch):
+    monkeypatch.setattr(gc, "MERGE_MIN", 8)   # force several merges
+    rng = random.Random(0)
+    e, ref = EdgeCOO(), []
+    for _ in range(500):
+        s, d, w = rng.randrange(20), rng.randrange(1 << 64), rng.randrange(-40000, 40000)
+        e.add_edge(s, d, w)
+        ref.append((s, d, max(-32767, min(32767, w))))
+    for node in range(25):
+        assert e.neighbors(node) == _naive(ref, node)
+    e.prune_edges(16000)
+    ref = [r for r in ref if abs(r[2]) >= 16000]
+    assert len(e) == len(ref)
+    for node in range(25):
+        assert e.neighbors(node) == _naive(ref, node)
+
+
+def test_list_columns_roundtrip():
+    e = EdgeCOO()
+    e.add_edge(3, 1, 5)
+    e.add_edge(1, 2, -7)
+    e.add_edge(3, 4, 9)
+    f = EdgeCOO()
+    f.src, f.dst, f.wts = e.src, e.dst, e.wts
+    assert f.neighbors(3) == ([1, 4], [5, 9])
+    assert f.neighbors(1) == ([2], [-7])
+    assert f.neighbors(2) == ([], [])
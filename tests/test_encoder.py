@@ -1,5 +1,7 @@
+import hashlib
 import numpy as np
-from herg.encoder import seed_to_hyper
+from herg.encoder import seed_to_hyper, seed_to_hyper_batch
+from herg.graph_caps.store import CapsuleStore
 from herg import backend as B
 
 def test_determinism():
@@ -20,3 +22,32 @@ def test_ternary_density():
     arr = B.as_numpy(v)
     density = np.count_nonzero(arr) / arr.size
     assert 0.31 <= density <= 0.35
+
+# sha256[:16] of the stacked (40, 240) int8 vectors from the original
+# per-element LCG implementation, keyed by (ternary, alpha)
+BASELINE = {
+    (False, 0.0): "355379e8c87050b4",
+    (False, 2.0): "c5754721bfe8c5e8",
+    (True, 0.0): "cc4560d9a7cf0eb9",
+    (True, 2.0): "51deb31392f4f0fa",
+}
+
+
+def _digest(M):
+    return hashlib.sha256(np.ascontiguousarray(M, dtype=np.int8).tobytes()).hexdigest()[:16]
+
+
+def test_batch_and_scalar_match_baseline():
+    seeds = [bytes([i]) * (i + 1) for i in range(40)]
+    for (ternary, alpha), want in BASELINE.items():
+        M = B.as_numpy(seed_to_hyper_batch(seeds, dim=240, ternary=ternary, alpha=alpha))
+        assert M.shape == (40, 240) and M.dtype == np.int8
+        assert _digest(M) == want
+        rows = [B.as_numpy(seed_to_hyper(s, dim=240, ternary=ternary, alpha=alpha)) for s in seeds]
+        assert _digest(np.stack(rows)) == want
+
+def test_spawn_many_matches_spawn(tmp_path):
+    store = CapsuleStore(dim=240, db_path=str(tmp_path / "db.sqlite"))
+    caps = store.spawn_many([b"a", b"b", b"a"])
+    assert caps[0] is caps[2] and len(store.caps) == 2
+    assert np.array_equal(B.as_numpy(caps[1].fast), B.as_numpy(seed_to_hyper(b"b", dim=240)))
@@ -5,7 +5,7 @@ import numpy as np
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "herg-agent"))
 
-from agent.encoder_ext import expand_seed
+from agent.encoder_ext import expand_seed, expand_seeds
 
 def test_expand_len():
     vec, _ = expand_seed(b'A'*32, (8,4,4))
@@ -28,3 +28,28 @@ def test_expand_collision_rate():
         else:
             seen.add(v.tobytes())
     assert collisions / 1000 < 0.05
+
+
+def _bitloop(seed, lane):
+    from agent.encoder_ext import _lanes
+    bins, quads, nibbles = _lanes(seed, lane)
+    vec = np.zeros((lane[0] + 2 * lane[1] + 4 * lane[2] + 7) // 8, np.uint8)
+    bit_idx = 0
+    for val, width in [(b, 1) for b in bins] + [(q, 2) for q in quads] + [(n, 4) for n in nibbles]:
+        for i in range(width):
+            vec[bit_idx >> 3] |= ((int(val) >> i) & 1) << (bit_idx & 7)
+            bit_idx += 1
+    return vec
+
+def test_expand_matches_bitloop():
+    for lane in [(8, 4, 4), (3, 5, 7), (64, 32, 32)]:
+        vec, _ = expand_seed(b'C'*32, lane)
+        assert vec.tobytes() == _bitloop(b'C'*32, lane).tobytes()
+
+def test_expand_seeds_batch():
+    seeds = [bytes([i])*16 for i in range(10)]
+    vecs, hashes = expand_seeds(seeds, (64, 32, 32))
+    assert vecs.shape == (10, 32)
+    for s, v, h in zip(seeds, vecs, hashes):
+        ref, ref_h = expand_seed(s, (64, 32, 32))
+        assert np.array_equal(v, ref) and h == ref_h
@@ -0,0 +1,71 @@
+import hashlib
+import math
+import numpy as np
+import pytest
+from herg.graph_caps.gnn import gnn_step, gnn_step_batch, gnn_weight, CirculantW
+
+
+def _signs(rng, *shape):
+    return rng.choice(np.array([-1, 1], dtype=np.int8), size=shape)
+
+
+def _inputs():
+    rng = np.random.default_rng(0)
+    C = _signs(rng, 4, 64)
+    V = _signs(rng, 4, 4, 64)                 # K = 4 keeps the dense means exact
+    w = rng.integers(1, 3, size=(4, 4))
+    return C, V, w
+
+
+def test_dense_matches_baseline():
+    # sha256[:16] of the original per-capsule gnn_step output on these inputs
+    C, V, w = _inputs()
+    want = "cd9fc64e7cfcd645"
+    single = np.stack([gnn_step(C[i], list(V[i]), list(w[i]), mode="dense") for i in range(4)])
+    for out in (single, gnn_step_batch(C, V, w, mode="dense")):
+        assert hashlib.sha256(np.ascontiguousarray(out, np.int8).tobytes()).hexdigest()[:16] == want
+
+
+@pytest.mark.parametrize("mode", ["dense", "lowrank", "circulant"])
+def test_batch_matches_reference(mode):
+    C, V, w = _inputs()
+    W = gnn_weight(64, mode)(np.eye(64)).T    # column j = W·e_j
+    mean = (V.astype(np.float64) * w[:, :, None]).mean(axis=1)
+    lin = mean @ W.T
+    act = 0.5 * lin * (1 + np.vectorize(math.erf)(lin / math.sqrt(2)))
+    ref = (C.astype(np.int16) + act.astype(np.int16)).astype(np.int8)
+    out = gnn_step_batch(C, V, w, mode=mode)
+    tol = 0 if mode == "dense" else 1         # FFT/float rounding can cross an integer
+    assert np.abs(out.astype(np.int16) - ref).max() <= tol
+    assert np.array_equal(gnn_step(C[0], list(V[0]), list(w[0]), mode=mode), out[0])
+    # ragged form, with one center that has no neighbours
+    offsets = [0, 4, 4, 8, 12]
+    ragged = gnn_step_batch(C, np.concatenate([V[0], V[2], V[3]]),
+                            np.concatenate([w[0], w[2], w[3]]), offsets=offsets, mode=mode)
+    assert np.array_equal(ragged[[0, 2, 3]], out[[0, 2, 3]])
+    assert np.array_equal(ragged[1], C[1])
+
+def test_structured_weights_are_small_and_linear():
+    dense, low, circ = (gnn_weight(2048, m) for m in ("dense", "lowrank", "circulant"))
+    assert low.nbytes * 10 < dense.nbytes and circ.nbytes * 10 < dense.nbytes
+    op = CirculantW(10, block=4)
+    W = op(np.eye(10)).T                      # column j = W·e_j
+    X = np.random.default_rng(1).standard_normal((3, 10))
+    assert np.allclose(op(X), X @ W.T)
+    assert set(np.round(W[:4, :4]).ravel()) <= set(range(-3, 4))
+    with pytest.raises(ValueError):
+        gnn_weight(8, "bogus")
+
+
+def test_gelu_exact_and_tanh():
+    from herg.graph_caps.gnn import erf, gelu
+    x = np.linspace(-10, 10, 20001)
+    ref = np.array([math.erf(v) for v in x])
+    assert np.max(np.abs(erf(x) - ref)) < 2e-15
+    assert np.isnan(erf(np.nan)) and erf(np.inf) == 1.0
+    exact = gelu(x)
+    ref = [0.5 * v * (1 + math.erf(v / math.sqrt(2))) for v in x]
+    assert np.allclose(exact, ref, rtol=1e-14, atol=1e-14)
+    assert np.max(np.abs(gelu(x, "tanh") - exact)) < 1e-3
+    with pytest.raises(ValueError):
+        gelu(x, "fast")
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from herg.graph_caps import Capsule
+from herg.graph_caps.store import CapsuleStore
+from herg.graph_caps.gossip import gap_junction_gossip
+
+
+def _store(tmp_path, n=50, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    mu = rng.standard_normal((n, dim)).astype(np.float32)
+    store = CapsuleStore(dim=dim, db_path=str(tmp_path / "db.sqlite"))
+    store.caps.add_many(range(n), np.sign(mu), mu)
+    return store, mu
+
+
+def test_global_gossip_in_place(tmp_path):
+    store, mu = _store(tmp_path)
+    slab = store.caps.mu
+    store.caps.pop(3)
+    store.caps[1].mu = np.zeros(16, dtype=np.float32)
+    ids = store.caps.ids.astype(int)
+    ref = np.stack([mu[i] if i != 1 else np.zeros(16, np.float32) for i in ids])
+    assert np.allclose(store.caps.mu_mean, ref.mean(axis=0))
+    gap_junction_gossip(store, 0.1, block=7)
+    expect = 0.9 * ref + 0.1 * ref.mean(axis=0)
+    assert np.shares_memory(store.caps.mu, slab)
+    assert np.allclose(store.caps.mu, expect, atol=1e-6)
+    assert np.array_equal(store.caps.fast, np.sign(expect))
+    assert np.allclose(store.caps.mu_mean, store.caps.mu.mean(axis=0), atol=1e-6)
+
+
+def test_per_cluster_gossip(tmp_path):
+    store, mu = _store(tmp_path)
+    labels = np.arange(50) % 3
+    gap_junction_gossip(store, 0.5, labels=labels, block=8)
+    for c in range(3):
+        rows = mu[labels == c]
+        assert np.allclose(store.caps.mu[labels == c], 0.5 * rows + 0.5 * rows.mean(axis=0), atol=1e-6)
+    with pytest.raises(ValueError):
+        gap_junction_gossip(store, labels=labels[:-1])
+
+
+def test_gossip_streams_spilled(tmp_path):
+    store, mu = _store(tmp_path, n=10)
+    spilled = [Capsule(100 + i, np.ones(16, np.int8), np.full(16, 2.0, np.float32), None) for i in range(10)]
+    store.write_spilled(spilled)
+    m = (mu.sum(axis=0) + 20.0) / 20
+    gap_junction_gossip(store, 0.1, include_spilled=True, block=3)
+    assert np.allclose(store.caps.mu, 0.9 * mu + 0.1 * m, atol=1e-6)
+    back = [c for caps in store.iter_spilled() for c in caps]
+    assert len(back) == 10
+    assert np.allclose(back[0].mu, 0.9 * 2.0 + 0.1 * m, atol=1e-6)
+    assert np.allclose(store.caps.mu_mean, store.caps.mu.mean(axis=0), atol=1e-6)
@@ -4,8 +4,8 @@ from herg.graph_caps.store import CapsuleStore
 from integrations.llm_hook import hook_forward
 
 
-def test_hook_forward():
-    store = CapsuleStore()
+def test_hook_forward(tmp_path):
+    store = CapsuleStore(db_path=str(tmp_path / "db.sqlite"))
     hidden = torch.zeros(1, 768)
     seed = b"x"
     out = hook_forward(hidden, [seed], store)
@@ -10,3 +10,54 @@ def test_roundtrip(tmp_path):
     read = chunk.read(offs[0])
     assert read == vec
     chunk.close()
+
+
+def test_running_crc_and_flush_policy(tmp_path):
+    import struct, zlib
+    from herg.storage.hvlogfs.chunk import HEADER_FMT, ChecksumError
+    import pytest
+    path = tmp_path / 'c1.chk'
+    chunk = HyperChunk(str(path), flush_every=None)
+    vecs = [bytes([i]) * 1024 for i in range(10)]
+    chunk.append(vecs[:3])
+    chunk.append(vecs[3:])
+    _, count, _, crc, _ = struct.unpack(HEADER_FMT, chunk.mm[:64])
+    assert count == 0                         # header waits for flush/close
+    chunk.close()
+    reopened = HyperChunk(str(path), flush_every=2)
+    _, count, _, crc, _ = struct.unpack(HEADER_FMT, reopened.mm[:64])
+    assert count == 10
+    assert crc == zlib.crc32(reopened.mm[64:64 + 10 * ENTRY_SIZE])
+    reopened.append([vecs[0]])
+    assert struct.unpack(HEADER_FMT, reopened.mm[:64])[1] == 10
+    reopened.append([vecs[1]])
+    assert struct.unpack(HEADER_FMT, reopened.mm[:64])[1] == 12
+    reopened.mm[100] ^= 0xFF
+    reopened.close()
+    with pytest.raises(ChecksumError):
+        HyperChunk(str(path))
+
+
+def test_zero_copy_views(tmp_path):
+    import pytest
+    from herg.storage.hvlogfs.chunk import ChecksumError
+    from herg.graph_caps.loader import HVLogLoader
+    path = tmp_path / 'c2.chk'
+    chunk = HyperChunk(str(path))
+    vecs = [bytes([i]) * 1024 for i in range(5)]
+    offs = chunk.append(vecs)
+    view = chunk.read_view(offs[2])
+    assert bytes(view) == vecs[2] and view.readonly
+    M = chunk.as_matrix()
+    assert M.shape == (5, 1024) and np.shares_memory(M, np.frombuffer(chunk.mm, np.uint8))
+    assert [bytes(r) for r in chunk.read_many([offs[4], offs[0]])] == [vecs[4], vecs[0]]
+    assert chunk.verify().size == 0
+    chunk.mm[offs[3] + 7] ^= 1
+    assert chunk.verify().tolist() == [3]
+    with pytest.raises(ChecksumError):
+        chunk.read_many(offs)
+    chunk.mm[offs[3] + 7] ^= 1
+    del view, M
+    chunk.close()
+    rows = [r for _, r in HVLogLoader(str(path))]
+    assert len(rows) == 5 and rows[1].dtype == np.int8 and np.all(rows[1] == 1)
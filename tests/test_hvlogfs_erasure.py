@@ -0,0 +1,120 @@
+import itertools
+import os
+import numpy as np
+import pytest
+from herg.storage.hvlogfs import VectorStore
+from herg.storage.hvlogfs import store as store_mod
+from herg.storage.hvlogfs.erasure import ReedSolomon, encode_files, decode_files
+from herg.storage.hvlogfs.parity import parity_ok, xor_chunks
+from herg.storage.hvlogfs.scrub import scrub
+
+
+def test_any_m_losses_recoverable():
+    rng = np.random.default_rng(0)
+    for k, m in [(3, 1), (4, 2), (6, 3)]:
+        rs = ReedSolomon(k, m)
+        data = [rng.integers(0, 256, 257, dtype=np.uint8).tobytes() for _ in range(k)]
+        full = data + rs.encode(data)
+        assert full[k] == xor_chunks(*data)          # first shard is plain XOR parity
+        for lost in itertools.combinations(range(k + m), m):
+            assert rs.decode([None if i in lost else s for i, s in enumerate(full)]) == full
+
+
+def test_files_stream(tmp_path):
+    rng = np.random.default_rng(1)
+    rs = ReedSolomon(4, 2)
+    data = [rng.integers(0, 256, n, dtype=np.uint8).tobytes() for n in (1003, 1003, 1003, 517)]
+    paths = [str(tmp_path / f'{i}.bin') for i in range(6)]
+    for p, b in zip(paths, data):
+        with open(p, 'wb') as f:
+            f.write(b)
+    encode_files(rs, paths[:4], paths[4:], window=64)
+    os.remove(paths[0])
+    os.remove(paths[4])
+    decode_files(rs, paths, [0, 4], window=64)
+    with open(paths[0], 'rb') as f:
+        assert f.read() == data[0]
+    with open(paths[4], 'rb') as f:
+        assert f.read() == rs.encode(data)[0][:1003]
+
+
+def test_scrub_recovers_two_lost_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, 'CAPACITY', 8)
+    s = VectorStore(str(tmp_path), group=4, parities=2)
+    s.put_many([(b'k%d' % i, bytes([i]) * 1024) for i in range(33)])     # chunks 0..4
+    s.close()
+    assert {'vec-00000000p.chk', 'vec-00000000p1.chk'} <= set(os.listdir(tmp_path))
+    scrub(str(tmp_path), workers=0, group=4, parities=2)               # remember the chunks
+    os.remove(tmp_path / 'vec-00000001.chk')
+    os.remove(tmp_path / 'vec-00000003.chk')
+    r = scrub(str(tmp_path), workers=0, group=4, parities=2)
+    assert r.repaired == {'vec-00000001.chk': None, 'vec-00000003.chk': None}
+    s = VectorStore(str(tmp_path), group=4, parities=2)
+    assert all(s.get(b'k%d' % i) == bytes([i]) * 1024 for i in range(33))
+    s.close()
+
+
+def _sealed_group(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, 'CAPACITY', 8)
+    s = VectorStore(str(tmp_path), group=4, parities=2)
+    s.put_many([(b'k%d' % i, bytes([i]) * 1024) for i in range(33)])
+    s.close()
+    scrub(str(tmp_path), workers=0, group=4, parities=2)
+
+
+def test_parity_sidecars_written(tmp_path, monkeypatch):
+    _sealed_group(tmp_path, monkeypatch)
+    for name in ('vec-00000000p.chk', 'vec-00000000p1.chk'):
+        assert parity_ok(str(tmp_path / name)) is True
+
+
+def test_scrub_skips_corrupt_parity(tmp_path, monkeypatch):
+    _sealed_group(tmp_path, monkeypatch)
+    with open(tmp_path / 'vec-00000000p.chk', 'r+b') as f:
+        f.seek(100)
+        f.write(b'\xff' * 16)
+    os.remove(tmp_path / 'vec-00000002.chk')
+    r = scrub(str(tmp_path), workers=0, group=4, parities=2)
+    assert r.repaired == {'vec-00000002.chk': None}
+    assert r.parity_rebuilt == ['vec-00000000p.chk']
+    assert parity_ok(str(tmp_path / 'vec-00000000p.chk')) is True
+    s = VectorStore(str(tmp_path), group=4, parities=2)
+    assert all(s.get(b'k%d' % i) == bytes([i]) * 1024 for i in range(33))
+    s.close()
+
+
+def test_scrub_regenerates_missing_parity(tmp_path, monkeypatch):
+    _sealed_group(tmp_path, monkeypatch)
+    want = open(tmp_path / 'vec-00000000p1.chk', 'rb').read()
+    os.remove(tmp_path / 'vec-00000000p1.chk')
+    r = scrub(str(tmp_path), workers=0, group=4, parities=2)
+    assert r.parity_rebuilt == ['vec-00000000p1.chk'] and not r.repaired
+    assert open(tmp_path / 'vec-00000000p1.chk', 'rb').read() == want
+    assert parity_ok(str(tmp_path / 'vec-00000000p1.chk')) is True
+
+
+def test_scrub_verifies_parity_of_clean_group(tmp_path, monkeypatch):
+    _sealed_group(tmp_path, monkeypatch)
+    with open(tmp_path / 'vec-00000000p1.chk', 'r+b') as f:
+        f.seek(100)
+        f.write(b'\xff' * 16)
+    r = scrub(str(tmp_path), workers=0, group=4, parities=2)
+    assert r.checked == [] and not r.repaired
+    assert r.parity_rebuilt == ['vec-00000000p1.chk']
+    assert parity_ok(str(tmp_path / 'vec-00000000p1.chk')) is True
+    assert scrub(str(tmp_path), workers=0, group=4, parities=2).parity_rebuilt == []
+
+
+def test_layout_recorded_in_checkpoint(tmp_path, monkeypatch):
+    _sealed_group(tmp_path, monkeypatch)
+    os.remove(tmp_path / 'vec-00000000.chk')
+    os.remove(tmp_path / 'vec-00000002.chk')
+    r = scrub(str(tmp_path), workers=0)                  # k+m read from checkpoint.json
+    assert r.repaired == {'vec-00000000.chk': None, 'vec-00000002.chk': None}
+    with pytest.raises(ValueError):
+        scrub(str(tmp_path), workers=0, group=3)
+    with pytest.raises(ValueError):
+        VectorStore(str(tmp_path), parities=1)
+    s = VectorStore(str(tmp_path))
+    assert (s.group, s.parities) == (4, 2)
+    s.close()
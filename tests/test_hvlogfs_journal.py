@@ -0,0 +1,72 @@
+import threading
+from herg.storage.hvlogfs import WriteAheadJournal
+from herg.storage.hvlogfs.journal import iter_records
+
+
+def test_group_commit_concurrent(tmp_path):
+    path = str(tmp_path / 'wal')
+    j = WriteAheadJournal(path, max_delay=0.005)
+    futs = {}
+
+    def writer(t):
+        for i in range(100):
+            data = b'%d:%d' % (t, i)
+            futs[data] = j.submit(data)
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    offsets = {data: f.result(timeout=5) for data, f in futs.items()}
+    j.append(b'last')
+    j.close()
+    assert j.records == 801 and j.commits < j.records
+    recs = list(iter_records(path))
+    assert len(recs) == 801 and recs[-1][1] == b'last'
+    assert {data: off for off, data in recs[:-1]} == offsets
+
+
+def test_torn_tail_truncated_on_open(tmp_path):
+    path = str(tmp_path / 'wal')
+    j = WriteAheadJournal(path)
+    j.append(b'a' * 10)
+    j.append(b'b' * 10)
+    j.close()
+    with open(path, 'ab') as f:
+        f.write(b'\x0a\x00\x00\x00\x00\x00\x00\x00bbb')      # torn frame
+    j = WriteAheadJournal(path)
+    j.append(b'c')
+    j.close()
+    assert [d for _, d in iter_records(path)] == [b'a' * 10, b'b' * 10, b'c']
+
+
+def test_unframed_journal_set_aside(tmp_path):
+    import pytest
+    path = tmp_path / 'wal'
+    legacy = b'first record\nsecond record\n'        # pre-framing format
+    path.write_bytes(legacy)
+    j = WriteAheadJournal(str(path))
+    j.append(b'new')
+    j.close()
+    assert (tmp_path / 'wal.unframed').read_bytes() == legacy
+    assert [d for _, d in iter_records(str(path))] == [b'new']
+    path.write_bytes(legacy)
+    with pytest.raises(ValueError):
+        WriteAheadJournal(str(path))
+    assert path.read_bytes() == legacy
+
+
+def test_any_committer_error_fails_waiters(tmp_path):
+    import pytest
+    j = WriteAheadJournal(str(tmp_path / 'wal'))
+
+    def boom(_):
+        raise MemoryError('no room')
+
+    j.f.write = boom
+    with pytest.raises(MemoryError):
+        j.submit(b'x').result(timeout=5)
+    with pytest.raises(MemoryError):
+        j.append(b'y')
+    j.close()
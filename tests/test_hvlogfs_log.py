@@ -0,0 +1,236 @@
+import numpy as np
+from herg.storage.hvlogfs import HVLogFS
+from herg.storage.hvlogfs import log as hvlog_mod
+
+W = "0000beef"                                         # pinned writer tag
+
+
+def test_roundtrip_and_reopen(tmp_path):
+    hv = HVLogFS(str(tmp_path), writer=W)
+    big = np.arange(2048, dtype=np.float32)           # 8 KiB: spans 8 entries
+    hv.append_cap("aa", 1, big, {"energy": np.float32(0.5)})
+    hv.append_cap("bb", 2, np.ones(4, np.int8), {})
+    hv.append_cap("aa", 3, big * 2, {"text": "hi"})
+    hv.close()
+
+    hv = HVLogFS(str(tmp_path), writer=W)
+    assert hv.lsn == 3
+    caps = list(hv.iter_capsules())
+    assert [c.id_int for c in caps] == [1, 2, 3]
+    assert [c.lsn for c in caps] == [1, 2, 3]
+    np.testing.assert_array_equal(caps[0].mu, big)
+    assert caps[0].mu.dtype == np.float32 and caps[0].mu.flags.writeable
+    assert caps[1].mu.dtype == np.int8 and caps[1].mu.tolist() == [1, 1, 1, 1]
+    assert caps[0].meta == {"energy": 0.5} and caps[2].meta == {"text": "hi"}
+    assert [c.id_int for c in hv.iter_capsules("aa")] == [1, 3]
+    assert [c.id_int for c in hv.iter_capsules(since=2)] == [3]
+
+
+def test_rotation_renames_closed_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(hvlog_mod, "CAPACITY", 16)
+    hv = HVLogFS(str(tmp_path), writer=W)
+    vec = np.zeros(512, np.float32)                     # 2 entries per capsule
+    for i in range(20):
+        hv.append_cap("aa", i, vec + i, {"i": i})
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == [f"aa-00000000-w{W}.closed", f"aa-00000000-w{W}.meta.closed",
+                     f"aa-00000001-w{W}.closed", f"aa-00000001-w{W}.meta.closed",
+                     f"aa-00000002-w{W}.chk", f"aa-00000002-w{W}.meta"]
+    chunks = hv.chunks()
+    assert [c.is_closed() for c in chunks] == [True, True, False]
+    assert chunks[0].path.suffix == ".closed"
+    assert [c.id_int for c in chunks[1].capsules()] == list(range(8, 16))
+
+    hv.close()
+    hv = HVLogFS(str(tmp_path), writer=W)
+    caps = list(hv.iter_capsules())
+    assert [c.id_int for c in caps] == list(range(20))
+    assert all(c.mu[0] == c.id_int for c in caps)
+    hv.append_cap("aa", 20, vec, {})
+    assert hv.lsn == 21 and [c.id_int for c in hv.iter_capsules(since=20)] == [20]
+
+
+def test_tombstones_persist(tmp_path):
+    hv = HVLogFS(str(tmp_path), writer=W)
+    vec = np.ones(8, np.float32)
+    hv.append_cap("aa", 7, vec, {})
+    hv.tombstone(7)
+    hv.append_cap("aa", 8, vec, {})
+    for chunk in hv.chunks():                 # sweeper-style access
+        for cap in chunk.capsules():
+            if cap.id_int == 8:
+                chunk.tombstone(cap.id_int)
+        chunk.flush()
+    hv.append_cap("aa", 7, vec, {})           # re-inserted after its tombstone
+    hv.close()
+
+    hv = HVLogFS(str(tmp_path), writer=W)
+    assert list(hv.iter_tombstones()) == [(2, 7), (4, 8)]
+    assert list(hv.iter_tombstones(since=2)) == [(4, 8)]
+    assert [(c.id_int, c.active) for c in hv.iter_capsules()] == [(7, False), (8, False), (7, True)]
+
+
+def test_torn_sidecar_tail_is_dropped(tmp_path):
+    hv = HVLogFS(str(tmp_path), writer=W)
+    hv.append_cap("aa", 1, np.ones(4, np.float32), {})
+    hv.append_cap("aa", 2, np.ones(4, np.float32), {})
+    hv.close()
+    meta = tmp_path / f"aa-00000000-w{W}.meta"
+    with open(meta, "ab") as f:
+        f.write(b'{"lsn":3,"op":"cap","pre')
+    hv = HVLogFS(str(tmp_path), writer=W)
+    assert hv.lsn == 2
+    hv.append_cap("aa", 3, np.full(4, 3, np.float32), {})
+    caps = list(hv.iter_capsules())
+    assert [c.id_int for c in caps] == [1, 2, 3]
+    assert caps[-1].mu.tolist() == [3, 3, 3, 3]
+
+
+def test_prefix_segments_are_isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(hvlog_mod, "CAPACITY", 4)
+    hv = HVLogFS(str(tmp_path), writer=W)
+    for i in range(12):
+        hv.append_cap("aa" if i % 3 else "7f", i, np.full(4, i, np.float32), {})
+    hv.tombstone(4, "aa")
+    assert hv.prefixes() == ["7f", "aa"]
+    assert all(p.name.startswith(("aa-", "7f-")) for p in tmp_path.iterdir())
+
+    opened = []
+    real = hvlog_mod.HyperChunk
+
+    def spy(path, *a, **kw):
+        opened.append(path)
+        return real(path, *a, **kw)
+
+    monkeypatch.setattr(hvlog_mod, "HyperChunk", spy)
+    assert [c.id_int for c in hv.iter_capsules("7f")] == [0, 3, 6, 9]
+    assert opened and all("/7f-" in p for p in opened)
+    assert list(hv.iter_capsules("zz")) == []
+
+    hv.close()
+    hv = HVLogFS(str(tmp_path), writer=W)
+    caps = list(hv.iter_capsules())
+    assert [c.id_int for c in caps] == list(range(12))       # merged back into LSN order
+    assert [c.id_int for c in caps if not c.active] == [4]
+    assert [c.id_int for c in hv.iter_capsules("aa", since=8)] == [8, 10, 11]
+
+
+def test_corrupt_open_chunk_is_quarantined(tmp_path):
+    hv = HVLogFS(str(tmp_path), writer=W)
+    hv.append_cap("aa", 1, np.ones(4, np.float32), {})
+    hv.append_cap("bb", 2, np.ones(4, np.float32), {})
+    hv.close()
+    with open(tmp_path / f"aa-00000000-w{W}.chk", "r+b") as f:
+        f.seek(64 + 3)
+        f.write(b"\xff")
+    hv = HVLogFS(str(tmp_path), writer=W)
+    assert [c.id_int for c in hv.iter_capsules()] == [2]
+    assert sorted(p.name.rsplit(".", 1)[0] for p in (tmp_path / "quarantine").iterdir()) == \
+        [f"aa-00000000-w{W}.chk", f"aa-00000000-w{W}.meta"]
+    hv.append_cap("aa", 3, np.ones(4, np.float32), {})
+    assert [c.id_int for c in hv.iter_capsules("aa")] == [3]
+
+
+def test_corrupt_closed_chunk_is_quarantined_on_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(hvlog_mod, "CAPACITY", 4)
+    hv = HVLogFS(str(tmp_path), writer=W)
+    for i in range(6):                                  # 2 entries each: 3 segments
+        hv.append_cap("aa", i, np.full(512, i, np.float32), {})
+    hv.close()
+    with open(tmp_path / f"aa-00000000-w{W}.closed", "r+b") as f:
+        f.seek(64 + 3)
+        f.write(b"\xff")
+    hv = HVLogFS(str(tmp_path), writer=W)
+    assert [c.id_int for c in hv.iter_capsules("aa")] == [2, 3, 4, 5]
+    assert sorted(p.name.rsplit(".", 1)[0] for p in (tmp_path / "quarantine").iterdir()) == \
+        [f"aa-00000000-w{W}.closed", f"aa-00000000-w{W}.meta.closed"]
+    assert [c.id_int for c in hv.iter_capsules()] == [2, 3, 4, 5]
+    assert [c.path.name for c in hv.chunks()][0] == f"aa-00000001-w{W}.closed"
+
+
+def test_agent_import_is_disk_backed():
+    import herg.hvlogfs
+    assert herg.hvlogfs.HVLogFS is HVLogFS
+
+
+def test_refresh_picks_up_hydrated_segments(tmp_path, monkeypatch):
+    import shutil
+    monkeypatch.setattr(hvlog_mod, "CAPACITY", 4)
+    remote = HVLogFS(str(tmp_path / "remote"), writer=W)
+    for i in range(6):                                  # 2 entries each: 3 segments
+        remote.append_cap("aa", i, np.full(512, i, np.float32), {})
+    remote.close()
+    local = HVLogFS(str(tmp_path / "local"), writer="0000cafe")
+    local.append_cap("bb", 100, np.ones(4, np.float32), {})
+    assert local.refresh() == []
+    for p in (tmp_path / "remote").glob("aa-*.closed"):
+        shutil.copy(p, tmp_path / "local" / p.name)
+    fresh = local.refresh()
+    assert [c.path.name for c in fresh] == [f"aa-00000000-w{W}.closed", f"aa-00000001-w{W}.closed"]
+    assert local.refresh() == []
+    caps = list(local.iter_capsules("aa"))
+    assert [c.id_int for c in caps] == [0, 1, 2, 3]
+    local.append_cap("aa", 7, np.ones(4, np.float32), {})     # new segment after them
+    assert local.lsn == 5 and [c.id_int for c in local.iter_capsules("aa", since=4)] == [7]
+    assert local.chunks()[-1].path.name == "aa-00000002-w0000cafe.chk"
+
+
+def _hydrate(src, dst):
+    import shutil
+    for p in src.glob("aa-*.closed"):
+        shutil.copy(p, dst / p.name)
+
+
+def test_append_then_hydrate_same_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(hvlog_mod, "CAPACITY", 4)
+    remote = HVLogFS(str(tmp_path / "remote"))
+    for i in range(6):
+        remote.append_cap("aa", i, np.full(512, i, np.float32), {})
+    remote.close()
+    local = HVLogFS(str(tmp_path / "local"))             # fresh node appends first
+    local.append_cap("aa", 100, np.full(512, 100, np.float32), {})
+    _hydrate(tmp_path / "remote", tmp_path / "local")
+    assert len(local.refresh()) == 2
+    for i in range(101, 106):                           # seal local segments
+        local.append_cap("aa", i, np.full(512, i, np.float32), {})
+    for p in (tmp_path / "remote").glob("aa-*.closed"):
+        assert (tmp_path / "local" / p.name).read_bytes() == p.read_bytes()
+    ids = sorted(c.id_int for c in local.iter_capsules("aa"))
+    assert ids == [0, 1, 2, 3] + list(range(100, 106))
+
+
+def test_stem_collisions_keep_both_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(hvlog_mod, "CAPACITY", 4)
+    remote = HVLogFS(str(tmp_path / "remote"), writer=W)
+    for i in range(3):
+        remote.append_cap("aa", i, np.full(512, i, np.float32), {})
+    remote.close()
+    local = HVLogFS(str(tmp_path / "local"), writer=W)  # same name for its open segment
+    local.append_cap("aa", 100, np.full(512, 100, np.float32), {})
+    _hydrate(tmp_path / "remote", tmp_path / "local")
+    assert [c.path.name for c in local.refresh()] == [f"aa-00000000-w{W}.closed"]
+    local.append_cap("aa", 101, np.full(512, 101, np.float32), {})
+    assert sorted(c.id_int for c in local.iter_capsules("aa")) == [0, 1, 100, 101]
+    local.close()
+    # the clash found when sealing, before any refresh
+    for p in (tmp_path / "local").glob("aa-*"):
+        p.unlink()
+    local = HVLogFS(str(tmp_path / "local"), writer=W)
+    local.append_cap("aa", 100, np.full(512, 100, np.float32), {})
+    _hydrate(tmp_path / "remote", tmp_path / "local")
+    local.append_cap("aa", 101, np.full(512, 101, np.float32), {})
+    local.append_cap("aa", 102, np.full(512, 102, np.float32), {})   # seals
+    closed = tmp_path / "local" / f"aa-00000000-w{W}.closed"
+    assert closed.read_bytes() == (tmp_path / "remote" / closed.name).read_bytes()
+    local.refresh()
+    assert sorted(c.id_int for c in local.iter_capsules("aa")) == [0, 1, 100, 101, 102]
+    local.close()
+    # ... and at startup
+    for p in (tmp_path / "local").glob("aa-*"):
+        p.unlink()
+    local = HVLogFS(str(tmp_path / "local"), writer=W)
+    local.append_cap("aa", 100, np.full(512, 100, np.float32), {})
+    local.close()
+    _hydrate(tmp_path / "remote", tmp_path / "local")
+    local = HVLogFS(str(tmp_path / "local"), writer=W)
+    assert sorted(c.id_int for c in local.iter_capsules("aa")) == [0, 1, 100]
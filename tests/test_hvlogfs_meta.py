@@ -19,3 +19,69 @@ def test_lookup_latency(tmp_path):
     assert out == vec
     chunk.close(); chunk2.close()
 
+
+
+def test_put_many_reopen_and_torn_tail(tmp_path):
+    path = str(tmp_path / 'meta.idx')
+    idx = MetaIndex(path)
+    idx.put_many([(b'k%d' % i, ('c0.chk', 64 + i)) for i in range(100)])
+    idx.put(b'k5', ('c1.chk', 7))
+    idx.close()
+    with open(path + '.log', 'ab') as f:
+        f.write(b'\x10\x00\x00\x00garbage')        # torn frame
+    idx = MetaIndex(path)
+    assert idx.get(b'k5') == ('c1.chk', 7)
+    assert idx.get(b'k99') == ('c0.chk', 163)
+    assert idx.get(b'missing') is None
+    idx.put(b'new', ('c2.chk', 1))
+    idx.close()
+    assert MetaIndex(path).get(b'new') == ('c2.chk', 1)
+
+
+def test_compaction_and_non_resident(tmp_path):
+    import os
+    path = str(tmp_path / 'meta.idx')
+    idx = MetaIndex(path, compact_every=64)
+    idx.put_many([(b'%04d' % i, ('a.chk', i)) for i in range(200)])
+    idx.put_many([(b'%04d' % i, ('b.chk', i)) for i in range(0, 200, 2)])
+    assert os.path.getsize(path + '.log') == 0     # folded into the snapshot
+    idx.put(b'0001', ('c.chk', 1))
+    idx.close()
+
+    small = MetaIndex(path, resident=False, compact_every=64)
+    assert len(small._index) == 1                  # only the log tail is resident
+    assert small.get(b'0001') == ('c.chk', 1)
+    assert small.get(b'0002') == ('b.chk', 2)
+    assert small.get(b'0003') == ('a.chk', 3)
+    assert small.get(b'9999') is None
+    small.put_many([(b'%04d' % i, ('d.chk', i)) for i in range(150, 250)])
+    assert small.get(b'0001') == ('c.chk', 1)      # survives a merge compaction
+    assert small.get(b'0249') == ('d.chk', 249) and small.get(b'0100') == ('b.chk', 100)
+    small.close()
+
+
+def test_legacy_pickle_snapshot(tmp_path):
+    import pickle
+    path = str(tmp_path / 'meta.idx')
+    with open(path, 'wb') as f:
+        pickle.dump({b'old': ('x.chk', 64)}, f)
+    idx = MetaIndex(path, resident=False)
+    assert idx.get(b'old') == ('x.chk', 64)
+    idx.close()
+
+
+def test_truncated_files_raise_value_error(tmp_path):
+    import pickle
+    import pytest
+    path = str(tmp_path / 'meta.idx')
+    idx = MetaIndex(path)
+    idx.put_many([(b'k%d' % i, ('x.chk', i)) for i in range(10)])
+    idx.compact()
+    idx.close()
+    data = open(path, 'rb').read()
+    legacy = pickle.dumps({b'old': ('x.chk', 64)})
+    for blob in (data[:-3], data[:20], data[:5], legacy[:-4], legacy[:6]):
+        with open(path, 'wb') as f:
+            f.write(blob)
+        with pytest.raises(ValueError):
+            MetaIndex(path)
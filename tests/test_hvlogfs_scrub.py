@@ -0,0 +1,70 @@
+import json
+import os
+import time
+from herg.storage.hvlogfs import VectorStore, ENTRY_SIZE
+from herg.storage.hvlogfs import store as store_mod
+from herg.storage.hvlogfs.scrub import scrub, check_chunk
+
+
+def _vec(i):
+    return bytes([i]) * 1024
+
+
+def _fill(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, 'CAPACITY', 8)
+    s = VectorStore(str(tmp_path))
+    s.put_many([(b'k%d' % i, _vec(i)) for i in range(49)])      # chunks 0..5 full, 6 open
+    s.close()
+
+
+def _flip(path, row):
+    with open(path, 'r+b') as f:
+        f.seek(64 + row * ENTRY_SIZE + 10)
+        b = f.read(1)
+        f.seek(-1, 1)
+        f.write(bytes([b[0] ^ 0xFF]))
+
+
+def test_incremental_scrub_repairs_from_parity(tmp_path, monkeypatch):
+    _fill(tmp_path, monkeypatch)
+    r = scrub(str(tmp_path), workers=2)
+    assert len(r.checked) == 7 and not r.repaired and not r.unrepairable
+    r = scrub(str(tmp_path), workers=2)
+    assert r.checked == [] and r.skipped == 7
+
+    _flip(tmp_path / 'vec-00000001.chk', 3)
+    os.remove(tmp_path / 'vec-00000003.chk')
+    report = str(tmp_path / 'report.json')
+    r = scrub(str(tmp_path), workers=0, report_path=report)
+    assert r.checked == ['vec-00000001.chk', 'vec-00000003.chk']
+    assert r.repaired == {'vec-00000001.chk': [3], 'vec-00000003.chk': None}
+    assert json.load(open(report))['repaired'] == {'vec-00000001.chk': [3], 'vec-00000003.chk': None}
+    s = VectorStore(str(tmp_path))
+    assert all(s.get(b'k%d' % i) == _vec(i) for i in range(49))
+    s.close()
+
+    _flip(tmp_path / 'vec-00000004.chk', 0)
+    _flip(tmp_path / 'vec-00000005.chk', 7)
+    r = scrub(str(tmp_path), workers=0)
+    assert r.unrepairable == {'vec-00000004.chk': [0], 'vec-00000005.chk': [7]}
+    assert scrub(str(tmp_path), workers=0).checked == ['vec-00000004.chk', 'vec-00000005.chk']
+
+
+def test_rate_limit(tmp_path, monkeypatch):
+    _fill(tmp_path, monkeypatch)
+    path = str(tmp_path / 'vec-00000000.chk')
+    t = time.perf_counter()
+    bad, nbytes = check_chunk(path, rate=8 * ENTRY_SIZE / 0.2)
+    assert bad == [] and time.perf_counter() - t >= 0.15
+
+
+def test_bad_parity_never_overwrites_chunk(tmp_path, monkeypatch):
+    _fill(tmp_path, monkeypatch)
+    scrub(str(tmp_path), workers=0)
+    with open(tmp_path / 'vec-00000000p.chk', 'r+b') as f:
+        f.write(b'\0' * 16)                                   # damage the parity header
+    _flip(tmp_path / 'vec-00000001.chk', 5)
+    r = scrub(str(tmp_path), workers=0)
+    assert r.unrepairable == {'vec-00000001.chk': [5]} and not r.repaired
+    assert check_chunk(str(tmp_path / 'vec-00000001.chk'))[0] == [5]    # only the row
+    assert not any(p.name.endswith('.rebuild') for p in tmp_path.iterdir())
@@ -0,0 +1,79 @@
+import os
+from herg.storage.hvlogfs import VectorStore
+from herg.storage.hvlogfs import store as store_mod
+
+
+def _vec(i):
+    return bytes([i % 256]) * 1024
+
+
+def _crash(s):
+    s.journal.close()          # records are durable; nothing else is flushed
+
+
+def test_roundtrip_and_clean_reopen(tmp_path):
+    s = VectorStore(str(tmp_path))
+    s.put_many([(b'k%d' % i, _vec(i)) for i in range(10)])
+    s.put(b'k3', _vec(99))
+    assert s.get(b'k3') == _vec(99) and s.get(b'nope') is None
+    s.close()
+    s = VectorStore(str(tmp_path))
+    assert s.replayed == 0
+    assert s.get(b'k3') == _vec(99) and s.get(b'k9') == _vec(9)
+    s.close()
+
+
+def test_replay_after_crash(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, 'CAPACITY', 8)
+    s = VectorStore(str(tmp_path), checkpoint_bytes=None)
+    s.put_many([(b'k%d' % i, _vec(i)) for i in range(20)])       # chunks 0..2
+    _crash(s)
+    with open(tmp_path / 'vec-00000002.chk', 'r+b') as f:
+        f.write(b'\0' * 64)                                      # header never hit disk
+    os.unlink(tmp_path / 'meta.idx.log')                         # nor did the index
+
+    s = VectorStore(str(tmp_path))
+    assert s.replayed == 20
+    assert all(s.get(b'k%d' % i) == _vec(i) for i in range(20))
+    assert sorted(n for n in os.listdir(tmp_path) if n.startswith('wal-')) == ['wal-00000002']
+    s.put(b'k20', _vec(20))
+    _crash(s)
+    s = VectorStore(str(tmp_path))
+    assert s.replayed == 1                                       # only past the checkpoint
+    assert s.get(b'k20') == _vec(20) and s.get(b'k19') == _vec(19)
+    s.close()
+
+
+def test_periodic_checkpoints_bound_replay(tmp_path):
+    s = VectorStore(str(tmp_path), checkpoint_bytes=4096)
+    for i in range(20):
+        s.put(b'k%d' % i, _vec(i))
+    _crash(s)
+    assert len([n for n in os.listdir(tmp_path) if n.startswith('wal-')]) == 1
+    s = VectorStore(str(tmp_path))
+    assert s.replayed < 4
+    assert all(s.get(b'k%d' % i) == _vec(i) for i in range(20))
+    s.close()
+
+
+def test_failing_journal_releases_inflight(tmp_path):
+    import threading
+    import pytest
+    s = VectorStore(str(tmp_path))
+    submit, calls = s.journal.submit, []
+
+    def flaky(rec):
+        calls.append(rec)
+        if len(calls) > 3:
+            raise OSError(5, 'Input/output error')
+        return submit(rec)
+
+    s.journal.submit = flaky
+    with pytest.raises(OSError):
+        s.put_many([(b'k%d' % i, _vec(i)) for i in range(10)])
+    assert s._inflight == 0
+    assert s.get(b'k2') == _vec(2) and s.get(b'k3') is None
+    closer = threading.Thread(target=s.close)
+    closer.start()
+    closer.join(10)
+    assert not closer.is_alive()
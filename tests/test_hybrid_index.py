@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "herg-agent"))
+
+from agent.encoder_ext import expand_seeds
+from herg.distance import hybrid_hamming_cross
+from herg.faiss_wrapper import HybridIndex, MIHIndex
+
+LANE = (64, 32, 32)
+
+
+def test_batched_search_matches_brute():
+    X, _ = expand_seeds([bytes([i]) * 16 for i in range(100)], LANE)
+    idx = HybridIndex(LANE)
+    for i in range(0, 100, 7):          # many small adds exercise growth
+        idx.add(X[i:i + 7])
+    assert idx.ntotal == 100
+    D, I = idx.search(X[:5], 4)
+    assert D.shape == I.shape == (5, 4)
+    ref = hybrid_hamming_cross(X[:5], X, LANE)
+    assert np.array_equal(I[:, 0], np.arange(5))
+    assert np.array_equal(D, np.sort(ref, axis=1)[:, :4].astype(np.float32))
+
+
+def test_ids_and_removal_like_faiss():
+    X, _ = expand_seeds([bytes([i]) * 16 for i in range(6)], LANE)
+    idx = HybridIndex(LANE)
+    idx.add_with_ids(X, np.arange(100, 106))
+    assert idx.remove_ids(np.array([101, 104, 999])) == 2
+    assert idx.ntotal == 4
+    D, I = idx.search(X[1], 6)
+    assert 101 not in I and I[0, 0] != -1
+    assert list(I[0, 4:]) == [-1, -1]
+    D, I = idx.search(X[2], 1)
+    assert I[0, 0] == 102 and D[0, 0] == 0
+
+
+def test_mih_matches_flat_scan():
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 256, size=(3000, 256), dtype=np.uint8)
+    lane = (1024, 256, 256)
+    flat, mih = HybridIndex(lane), MIHIndex(lane, m=16)
+    for i in range(0, 3000, 1000):      # leaves an unsorted tail
+        flat.add(X[i:i + 1000])
+        mih.add(X[i:i + 1000])
+    flat.remove_ids(np.arange(0, 3000, 5))
+    mih.remove_ids(np.arange(0, 3000, 5))
+    Q = X[[1, 2, 7, 2999]].copy()
+    Q[:, :4] ^= 1                       # near duplicates
+    Q = np.vstack([Q, rng.integers(0, 256, size=(2, 256), dtype=np.uint8)])
+    for k in (1, 3):
+        D_flat, I_flat = flat.search(Q, k)
+        D_mih, I_mih = mih.search(Q, k)
+        assert np.array_equal(D_flat, D_mih)
+        assert np.array_equal(I_flat[:4, 0], I_mih[:4, 0])
+    mih.search(Q[:1], 1)
+    assert mih.last_candidates < 3000
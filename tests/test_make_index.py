@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "herg-agent"))
+
+faiss = pytest.importorskip("faiss")
+
+from herg.config import Config
+from herg.faiss_wrapper import make_index, min_train_size, train_sample_size
+
+
+def _cfg(kind):
+    return Config(index_type=kind, nlist=4, pq_m=4, nprobe=4, hnsw_m=8)
+
+
+def test_default_is_flat():
+    assert isinstance(make_index(16), faiss.IndexFlatL2)
+
+
+@pytest.mark.parametrize("kind,cls", [
+    ("ivf_flat", "IndexIVFFlat"),
+    ("ivf_pq", "IndexIVFPQ"),
+    ("hnsw", "IndexHNSWFlat"),
+])
+def test_configured_types(kind, cls):
+    cfg = _cfg(kind)
+    xb = np.random.default_rng(0).standard_normal((max(min_train_size(cfg), 64), 16)).astype(np.float32)
+    index = make_index(16, cfg, xb)
+    assert type(index).__name__ == cls
+    ids = faiss.IndexIDMap(index)
+    ids.add_with_ids(xb[:50], np.arange(50))
+    D, I = ids.search(xb[:1], 1)
+    assert I[0, 0] == 0
+
+
+def test_small_training_set_falls_back(monkeypatch):
+    cfg = _cfg("ivf_pq")
+    xb = np.zeros((min_train_size(cfg) - 1, 16), np.float32)
+    assert isinstance(make_index(16, cfg, xb), faiss.IndexFlatL2)
+    monkeypatch.setenv("USE_FLAT", "1")
+    assert isinstance(make_index(16, _cfg("hnsw")), faiss.IndexFlatL2)
+
+
+def test_train_sample_size():
+    for kind in ("ivf_flat", "ivf_pq"):
+        cfg = _cfg(kind)
+        assert min_train_size(cfg) <= train_sample_size(cfg) <= 2 * min_train_size(cfg)
+    assert train_sample_size(_cfg("hnsw")) == 0
+
+
+def test_pq_m_must_divide_dim():
+    with pytest.raises(ValueError):
+        make_index(18, _cfg("ivf_pq"))
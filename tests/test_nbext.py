@@ -12,7 +12,8 @@ def get_shell():
     return ip
 
 
-def test_herg_magics(tmp_path):
+def test_herg_magics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)                 # the magics open the default db
     ip = get_shell()
     load_ipython_extension(ip)
 
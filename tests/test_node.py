@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
 from fastapi.testclient import TestClient
 import pytest
@@ -8,7 +9,7 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "herg-agent"))
 
 os.environ['SHARD_KEY'] = 'aa'
-os.environ['HVLOG_DIR'] = '/tmp/hvlog'
+os.environ['HVLOG_DIR'] = tempfile.mkdtemp(prefix='hvlog-')
 try:
     from agent import node
     from agent import utils
@@ -25,3 +26,59 @@ def test_insert_and_query():
     q = {'seed': 'hello', 'top_k': 1}
     out = client.post('/query', data=utils.add_prefix(q)).json()
     assert out and out[0]['dist'] == 0.0
+
+
+def test_incremental_rebuild():
+    import asyncio
+    import numpy as np
+    asyncio.run(node._rebuild())
+    base = node.index.ntotal
+    vec = np.ones(node.DIM, np.float32)
+    node.hvlog.append_cap('aa', 9001, vec, {})
+    node.hvlog.append_cap('aa', 9002, vec, {})
+    asyncio.run(node._rebuild())
+    assert node.index.ntotal == base + 2
+    assert node.rebuild_stats['added'] == 2
+    asyncio.run(node._rebuild())            # nothing new: no re-adds
+    assert node.index.ntotal == base + 2
+    assert node.rebuild_stats['delta'] == 0
+    node.hvlog.tombstone(9001)
+    asyncio.run(node._rebuild())
+    assert node.index.ntotal == base + 1
+    assert node.rebuild_stats['removed'] == 1
+    assert client.get('/metrics').json()['index_rebuild']['lsn'] == node.hvlog.lsn
+
+
+def test_trains_after_hydration(monkeypatch):
+    import asyncio
+    import faiss
+    import numpy as np
+    from herg.config import Config
+    cfg = Config(index_type='ivf_flat', nlist=4, nprobe=4)
+    monkeypatch.setattr(node.config, 'load', lambda: cfg)
+    monkeypatch.setattr(node, 'index', node.index)           # restored afterwards
+    rng = np.random.default_rng(0)
+    for i in range(200):
+        node.hvlog.append_cap('aa', 10_000 + i, rng.standard_normal(node.DIM).astype(np.float32), {})
+    asyncio.run(node._train_when_ready(asyncio.sleep(0)))
+    assert isinstance(faiss.downcast_index(node.index.index), faiss.IndexIVFFlat)
+    assert node.index.ntotal == len(node.id_map)
+
+
+def test_rebuild_indexes_hydrated_segments(tmp_path, monkeypatch):
+    import asyncio
+    import shutil
+    import numpy as np
+    from herg.storage.hvlogfs import HVLogFS
+    from herg.storage.hvlogfs import log as hvlog_mod
+    monkeypatch.setattr(hvlog_mod, 'CAPACITY', 8)
+    remote = HVLogFS(str(tmp_path), writer='0000beef')
+    for i in range(2):                                  # one 8-entry capsule per segment
+        remote.append_cap('aa', 20_000 + i, np.full(node.DIM, i, np.float32), {})
+    remote.close()
+    src = tmp_path / 'aa-00000000-w0000beef'
+    dst = node.HVLOG_DIR / 'aa-90000000-w0000beef'     # the remote's numbering
+    shutil.copy(f'{src}.closed', f'{dst}.closed')
+    shutil.copy(f'{src}.meta.closed', f'{dst}.meta.closed')
+    asyncio.run(node._rebuild())
+    assert 20_000 in node.id_map and 20_001 not in node.id_map
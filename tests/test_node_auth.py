@@ -1,6 +1,7 @@
 import os
 import sys
 import importlib
+import tempfile
 from pathlib import Path
 from fastapi.testclient import TestClient
 
@@ -9,10 +10,12 @@ sys.path.append(str(ROOT / "herg-agent"))
 
 from agent import utils, node
 
+HVLOG_DIR = tempfile.mkdtemp(prefix='hvlog-')
+
 
 def _make_client(with_key: bool):
     os.environ['SHARD_KEY'] = 'aa'
-    os.environ['HVLOG_DIR'] = '/tmp/hvlog'
+    os.environ['HVLOG_DIR'] = HVLOG_DIR
     if with_key:
         os.environ['NODE_KEY'] = 'test'
     else:
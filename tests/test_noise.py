@@ -4,9 +4,9 @@ from herg.encoder import seed_to_hyper
 from herg import backend as B
 
 
-def test_bitflip():
+def test_bitflip(tmp_path):
     rng = np.random.default_rng(1)
-    store = CapsuleStore(dim=240)
+    store = CapsuleStore(dim=240, db_path=str(tmp_path / "db.sqlite"))
     seeds = [rng.integers(0,256,32,dtype=np.uint8).tobytes() for _ in range(8)]
     ids = []
     for s in seeds:
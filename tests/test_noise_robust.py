@@ -4,10 +4,10 @@ from herg.graph_caps.store import CapsuleStore
 from herg import backend as B
 
 
-def test_noise_recall():
+def test_noise_recall(tmp_path):
     rng = np.random.default_rng(0)
     seeds = [rng.integers(0, 256, size=32, dtype=np.uint8).tobytes() for _ in range(8)]
-    store = CapsuleStore(dim=240)
+    store = CapsuleStore(dim=240, db_path=str(tmp_path / "db.sqlite"))
     ids = []
     for s in seeds:
         cap = store.spawn(s)
@@ -6,12 +6,43 @@ from herg import backend as B
 import pytest
 
 
+def _device():
+    """Device that B.tensor(..., device="cuda") lands on for this backend."""
+    return B.device_of(B.tensor(np.zeros(1), dtype=np.int8, device="cuda"))
+
+
 def test_promote_demote(tmp_path):
-    store = CapsuleStore()
+    store = CapsuleStore(db_path=str(tmp_path / "db.sqlite"))
     cap = store.spawn(b"x", ts=0)
     cap.demote()
     assert B.device_of(cap.vec) == "cpu"
+    before = B.as_numpy(cap.fast).copy()
     cap.promote(dim=2048)
-    if B.device_of(cap.vec) == "cpu":
-        pytest.skip("No GPU available")
-    assert B.device_of(cap.vec) != "cpu"
+    assert B.device_of(cap.vec) == _device()
+    row = store.caps.fast[store.caps.row_of(cap.id)]
+    assert np.array_equal(B.as_numpy(cap.fast), row) and not np.array_equal(row, before)
+    assert set(np.unique(row)) <= {-1, 0, 1}
+    cap.demote()
+    assert B.device_of(cap.vec) == "cpu"
+
+
+def test_to_reads_table_row(tmp_path):
+    store = CapsuleStore(dim=16, db_path=str(tmp_path / "db.sqlite"))
+    cap = store.spawn(b"x", ts=0)
+    cap.to("cuda")
+    assert B.device_of(cap.mu) == _device()
+    store.caps.add_mu(store.caps.row_of(cap.id), np.ones(16, np.float32))   # table-wide write
+    assert np.array_equal(B.as_numpy(cap.mu), store.caps.mu[store.caps.row_of(cap.id)])
+    store.caps.pop(cap.id)
+    assert cap._table is None and B.device_of(cap.mu) == _device()
+
+
+def test_promote_cannot_resize_table_row(tmp_path):
+    store = CapsuleStore(db_path=str(tmp_path / "db.sqlite"))
+    cap = store.spawn(b"x", ts=0)
+    with pytest.raises(ValueError):
+        cap.promote(dim=6000)
+    assert B.as_numpy(cap.fast).shape == (2048,)
+    free = Capsule(7, np.ones(2048, np.int8), np.ones(2048, np.float32), None)
+    free.promote(dim=6000)
+    assert B.as_numpy(free.fast).shape == (6000,)
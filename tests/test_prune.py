@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from herg.graph_caps.store import CapsuleStore
+from herg.graph_caps.prune import sticky_pool_prune, merge_candidates
+
+
+def _clustered(n=400, dim=128, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.standard_normal((n // 4, dim)).astype(np.float32)
+    dup = base[rng.integers(0, n // 4, n - n // 4)]
+    noise = 0.05 * rng.standard_normal(dup.shape).astype(np.float32)
+    return np.concatenate([base, dup + noise])
+
+
+def test_exact_candidates_match_bruteforce():
+    mu = _clustered()
+    U = mu / np.linalg.norm(mu, axis=1, keepdims=True)
+    S = U @ U.T
+    bi, bj = np.nonzero(np.triu(S > 0.98, 1))
+    i, j = merge_candidates(mu, mode="exact", block=64)
+    assert np.array_equal(i, bi) and np.array_equal(j, bj)
+    ai, aj = merge_candidates(mu, mode="approx")
+    found = set(zip(ai.tolist(), aj.tolist()))
+    assert found <= set(zip(bi.tolist(), bj.tolist()))
+    assert len(found) >= 0.9 * bi.size
+
+
+@pytest.mark.parametrize("mode", ["exact", "approx"])
+def test_prune_merges_duplicates(tmp_path, mode):
+    mu = _clustered()
+    i, j = merge_candidates(mu, mode="exact")
+    lonely = min(set(range(len(mu))) - set(i.tolist()) - set(j.tolist()))
+
+    def pruned(name):
+        store = CapsuleStore(dim=mu.shape[1], db_path=str(tmp_path / name))
+        store.caps.add_many(range(len(mu)), np.sign(mu), mu)
+        store.caps[lonely].energy = -1.0
+        sticky_pool_prune(store, mode=mode)
+        return store
+
+    store = pruned("a.sqlite")
+    assert lonely not in store.caps
+    assert len(store.caps) <= 100
+    # absorbed energy moves to the survivor
+    assert np.isclose(store.caps.energy.sum(), len(mu) - 1)
+    assert np.array_equal(store.caps.fast, np.sign(store.caps.mu))
+    again = pruned("b.sqlite")
+    assert list(again.caps) == list(store.caps)
+    assert np.array_equal(again.caps.mu, store.caps.mu)
+
+
+def test_prune_is_blockwise_and_bounded(tmp_path):
+    mu = _clustered()
+
+    def pruned(name, rows, **kw):
+        store = CapsuleStore(dim=rows.shape[1], db_path=str(tmp_path / name))
+        store.caps.add_many(range(len(rows)), np.sign(rows), rows)
+        sticky_pool_prune(store, **kw)
+        return store
+
+    a, b = pruned("a.sqlite", mu), pruned("b.sqlite", mu, block=7)
+    assert list(a.caps) == list(b.caps) and np.array_equal(a.caps.mu, b.caps.mu)
+    # a converged population has O(N²) similar pairs but collapses in one block
+    same = np.tile(np.random.default_rng(1).standard_normal((1, 64)).astype(np.float32), (20000, 1))
+    assert len(pruned("c.sqlite", same, block=64).caps) == 1
@@ -5,9 +5,9 @@ from herg.encoder import seed_to_hyper
 from herg import backend as B
 
 
-def test_retention_50tasks():
+def test_retention_50tasks(tmp_path):
     rng = np.random.default_rng(0)
-    store = CapsuleStore(dim=240)
+    store = CapsuleStore(dim=240, db_path=str(tmp_path / "db.sqlite"))
     seeds = [rng.integers(0,256,32,dtype=np.uint8).tobytes() for _ in range(50)]
     ids = []
     for s in seeds:
@@ -1,11 +1,13 @@
+import os
 import subprocess
 import sys
 from herg.graph_caps.store import CapsuleStore
 from herg.snapshot import save_snapshot, load_snapshot
 
 
-def test_save_and_load(tmp_path):
-    store = CapsuleStore()
+def test_save_and_load(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)                 # load_snapshot opens the default db
+    store = CapsuleStore(db_path=str(tmp_path / "db.sqlite"))
     store.spawn(b"x", ts=0)
     file = tmp_path / "brain.pkl"
     save_snapshot(store, str(file))
@@ -16,15 +18,17 @@ def test_save_and_load(tmp_path):
 
 def test_cli_save_load(tmp_path, capsys):
     file = tmp_path / "brain.pkl"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]))
     subprocess.run([
         sys.executable,
         "-c",
         f"import sys; from cli_legacy import main; sys.argv=['herg','save','{file}']; main()",
-    ], check=True)
+    ], check=True, cwd=tmp_path, env=env)
     assert file.exists()
     capture = subprocess.run([
         sys.executable,
         "-c",
         f"import sys; from cli_legacy import main; sys.argv=['herg','load','{file}']; main()",
-    ], check=True, capture_output=True, text=True)
+    ], check=True, capture_output=True, text=True, cwd=tmp_path, env=env)
     assert "Loaded 0 capsules" in capture.stdout
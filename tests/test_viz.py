@@ -4,7 +4,7 @@ from herg.viz import viz_dot
 
 
 def test_viz_dot(tmp_path):
-    store = CapsuleStore()
+    store = CapsuleStore(db_path=str(tmp_path / "db.sqlite"))
     a = store.spawn(b"a", ts=0)
     b = store.spawn(b"b", ts=0)
     store.edges.add_edge(a.id, b.id, 1)